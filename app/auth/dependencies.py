@@ -3,41 +3,93 @@ from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from sqlalchemy.orm import Session
 
-from app.database.db import SessionLocal
+from app.auth.principal import Principal, principal_cache
+from app.config import settings
+from app.database.session import get_db, run_db
+from app.models.employee import Employee
 from app.models.user import User
 from app.utils.token import SECRET_KEY, ALGORITHM
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-
-def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
-):
-    credentials_exception = HTTPException(
+def _credentials_exception():
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
 
+
+def _decode_token(token: str) -> dict:
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         user_id: str | None = payload.get("sub")
         if user_id is None:
-            raise credentials_exception
-    except JWTError:
-        raise credentials_exception
+            raise _credentials_exception()
+        payload["sub"] = int(user_id)
+    except (JWTError, ValueError):
+        raise _credentials_exception()
+
+    return payload
+
+
+def load_principal(db: Session, user_id: int) -> Principal | None:
+    # User and employee id in one round trip
+    row = db.query(
+        User.id, User.email, User.role, Employee.id
+    ).outerjoin(
+        Employee, Employee.user_id == User.id
+    ).filter(
+        User.id == user_id
+    ).first()
+
+    if row is None:
+        return None
+
+    principal = Principal(
+        id=row[0], email=row[1], role=row[2], employee_id=row[3]
+    )
+    principal_cache.set(principal)
+    return principal
+
+
+async def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db)
+) -> Principal:
+    payload = _decode_token(token)
+    user_id = payload["sub"]
+
+    principal = principal_cache.get(user_id)
+    if principal is None:
+        principal = await run_db(db, load_principal, user_id)
+
+    if principal is None:
+        raise _credentials_exception()
+
+    return principal
+
+
+async def get_current_claims(
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db)
+) -> Principal:
+    # For endpoints that only need the user id and role. With
+    # DAYFLOW_AUTH_CLAIMS_ONLY the signed role claim is trusted and the
+    # users table is never read; otherwise this is get_current_user.
+    payload = _decode_token(token)
+    user_id = payload["sub"]
+
+    principal = principal_cache.get(user_id)
+    if principal is not None:
+        return principal
+
+    if settings.auth_claims_only and payload.get("role"):
+        return Principal(id=user_id, role=payload["role"])
 
-    user = db.query(User).filter(User.id == int(user_id)).first()
-    if user is None:
-        raise credentials_exception
+    principal = await run_db(db, load_principal, user_id)
+    if principal is None:
+        raise _credentials_exception()
 
-    return user
+    return principal
@@ -0,0 +1,111 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.employee import Employee
+from app.models.user import User
+
+
+@dataclass(frozen=True)
+class Principal:
+    id: int
+    role: str
+    email: Optional[str] = None
+    employee_id: Optional[int] = None
+
+
+class PrincipalCache:
+    # Bounded LRU with a per-entry TTL, shared by all request threads
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: int) -> Optional[Principal]:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+
+            principal, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[user_id]
+                return None
+
+            self._entries.move_to_end(user_id)
+            return principal
+
+    def set(self, principal: Principal):
+        if self.maxsize <= 0:
+            return
+
+        with self._lock:
+            self._entries[principal.id] = (
+                principal, time.monotonic() + self.ttl
+            )
+            self._entries.move_to_end(principal.id)
+
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: int):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+principal_cache = PrincipalCache(
+    settings.principal_cache_size, settings.principal_cache_ttl
+)
+
+
+# -------------------------
+# INVALIDATION
+# -------------------------
+# Changed user ids are collected during flush and dropped from the cache
+# once the transaction commits, so other requests never re-cache the
+# pre-commit state for longer than one request.
+def _mark_stale(target, *user_ids):
+    session = inspect(target).session
+    if session is None:
+        return
+
+    stale = session.info.setdefault("stale_principals", set())
+    stale.update(uid for uid in user_ids if uid is not None)
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _user_changed(mapper, connection, target):
+    _mark_stale(target, target.id)
+
+
+@event.listens_for(Employee, "after_insert")
+@event.listens_for(Employee, "after_update")
+@event.listens_for(Employee, "after_delete")
+def _employee_changed(mapper, connection, target):
+    # the profile may have been moved to another user
+    history = inspect(target).attrs.user_id.history
+    _mark_stale(target, target.user_id, *(history.deleted or ()))
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session):
+    for user_id in session.info.pop("stale_principals", ()):
+        principal_cache.invalidate(user_id)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_rolled_back(session, previous_transaction):
+    session.info.pop("stale_principals", None)
@@ -0,0 +1,106 @@
+import argparse
+import logging
+from datetime import date
+
+from app import models  # noqa: F401  register every table
+from app.database.db import Base, SessionLocal, engine
+from app.database.migrations import DuplicateRowsError, upgrade_schema
+from app.utils.attendance_archive import archive_attendance, first_open_day
+from app.utils.attendance_rollup import rebuild_attendance_rollups
+from app.utils.leave_balance import recompute_leave_balances
+
+
+def migrate(args):
+    # main() has already brought the schema up to date
+    print(f"Database schema is up to date ({len(Base.metadata.tables)} tables)")
+
+
+def rebuild_rollups(args):
+    db = SessionLocal()
+    try:
+        count = rebuild_attendance_rollups(db, args.year, args.month)
+        db.commit()
+    finally:
+        db.close()
+
+    print(f"Rebuilt {count} attendance rollups")
+
+
+def recompute_balances(args):
+    db = SessionLocal()
+    try:
+        count = recompute_leave_balances(db, args.year)
+        db.commit()
+    finally:
+        db.close()
+
+    print(f"Recomputed {count} leave balances")
+
+
+def archive(args):
+    before = date.fromisoformat(args.before) if args.before else date.today()
+    current = first_open_day()
+    if (before.year, before.month) > (current.year, current.month):
+        before = current
+        print(f"The current month stays live; archiving before {before}")
+
+    db = SessionLocal()
+    try:
+        months, rows = archive_attendance(
+            db, before,
+            on_month=lambda done, total: print(f"Archived month {done}/{total}")
+        )
+    finally:
+        db.close()
+
+    print(f"Archived {rows} attendance rows from {months} closed months")
+
+
+def main(argv=None):
+    logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser(prog="python -m app.cli")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    schema = commands.add_parser(
+        "migrate",
+        help="create missing tables and indexes; run once before starting workers"
+    )
+    schema.set_defaults(handler=migrate)
+
+    rollups = commands.add_parser(
+        "rebuild-rollups",
+        help="recompute monthly attendance rollups from raw attendance"
+    )
+    rollups.add_argument("--year", type=int)
+    rollups.add_argument("--month", type=int)
+    rollups.set_defaults(handler=rebuild_rollups)
+
+    balances = commands.add_parser(
+        "recompute-leave-balances",
+        help="recompute the leave ledger from leave requests"
+    )
+    balances.add_argument("--year", type=int)
+    balances.set_defaults(handler=recompute_balances)
+
+    archiving = commands.add_parser(
+        "archive-attendance",
+        help="compact raw attendance of closed months into the archive"
+    )
+    archiving.add_argument(
+        "--before",
+        help="archive months that ended before this date's month "
+             "(YYYY-MM-DD, default: today)"
+    )
+    archiving.set_defaults(handler=archive)
+
+    args = parser.parse_args(argv)
+    try:
+        upgrade_schema(engine)
+    except DuplicateRowsError as exc:
+        parser.exit(1, f"Migration stopped: {exc}\n")
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+import os
+from dataclasses import dataclass, field
+
+
+def _env_str(name: str, default: str):
+    return lambda: os.getenv(name, default)
+
+
+def _env_int(name: str, default: int):
+    return lambda: int(os.getenv(name, default))
+
+
+def _env_float(name: str, default: float):
+    return lambda: float(os.getenv(name, default))
+
+
+def _env_bool(name: str, default: bool):
+    def read():
+        value = os.getenv(name)
+        if value is None:
+            return default
+        return value.strip().lower() in ("1", "true", "yes", "on")
+    return read
+
+
+def _default_password_workers():
+    return max(1, (os.cpu_count() or 2) // 2)
+
+
+@dataclass
+class Settings:
+    # Principal cache used by get_current_user
+    principal_cache_size: int = field(
+        default_factory=_env_int("DAYFLOW_PRINCIPAL_CACHE_SIZE", 10000)
+    )
+    principal_cache_ttl: float = field(
+        default_factory=_env_float("DAYFLOW_PRINCIPAL_CACHE_TTL", 60.0)
+    )
+    # Trust the signed role claim instead of loading the user row
+    auth_claims_only: bool = field(
+        default_factory=_env_bool("DAYFLOW_AUTH_CLAIMS_ONLY", False)
+    )
+    # Password hashing: bcrypt cost and the dedicated process pool.
+    # 0 workers runs bcrypt on the request thread pool instead.
+    bcrypt_rounds: int = field(
+        default_factory=_env_int("DAYFLOW_BCRYPT_ROUNDS", 12)
+    )
+    password_workers: int = field(
+        default_factory=_env_int(
+            "DAYFLOW_PASSWORD_WORKERS", _default_password_workers()
+        )
+    )
+    password_queue_limit: int = field(
+        default_factory=_env_int("DAYFLOW_PASSWORD_QUEUE_LIMIT", 64)
+    )
+    # Token-bucket admission control for /auth/login and /auth/signup,
+    # checked before any database or bcrypt work: per client IP and per
+    # email, `burst` attempts at once refilled at `per_minute`. Each
+    # limiter remembers at most `keys` IPs/emails (least recently seen
+    # dropped first).
+    auth_rate_limit: bool = field(
+        default_factory=_env_bool("DAYFLOW_AUTH_RATE_LIMIT", True)
+    )
+    auth_ip_per_minute: float = field(
+        default_factory=_env_float("DAYFLOW_AUTH_IP_PER_MINUTE", 300.0)
+    )
+    auth_ip_burst: int = field(
+        default_factory=_env_int("DAYFLOW_AUTH_IP_BURST", 60)
+    )
+    auth_email_per_minute: float = field(
+        default_factory=_env_float("DAYFLOW_AUTH_EMAIL_PER_MINUTE", 6.0)
+    )
+    auth_email_burst: int = field(
+        default_factory=_env_int("DAYFLOW_AUTH_EMAIL_BURST", 10)
+    )
+    auth_rate_limit_keys: int = field(
+        default_factory=_env_int("DAYFLOW_AUTH_RATE_LIMIT_KEYS", 100000)
+    )
+    # Database engine
+    database_url: str = field(
+        default_factory=_env_str("DATABASE_URL", "sqlite:///./dayflow.db")
+    )
+    # Defaults to DATABASE_URL with the aiosqlite driver
+    async_database_url: str = field(
+        default_factory=_env_str("DAYFLOW_ASYNC_DATABASE_URL", "")
+    )
+    db_pool_size: int = field(
+        default_factory=_env_int("DAYFLOW_DB_POOL_SIZE", 20)
+    )
+    db_max_overflow: int = field(
+        default_factory=_env_int("DAYFLOW_DB_MAX_OVERFLOW", 20)
+    )
+    db_pool_timeout: float = field(
+        default_factory=_env_float("DAYFLOW_DB_POOL_TIMEOUT", 30.0)
+    )
+    db_pool_recycle: int = field(
+        default_factory=_env_int("DAYFLOW_DB_POOL_RECYCLE", 3600)
+    )
+    db_pool_pre_ping: bool = field(
+        default_factory=_env_bool("DAYFLOW_DB_POOL_PRE_PING", False)
+    )
+    # SQLite pragma profile applied to every new connection
+    sqlite_journal_mode: str = field(
+        default_factory=_env_str("DAYFLOW_SQLITE_JOURNAL_MODE", "WAL")
+    )
+    sqlite_synchronous: str = field(
+        default_factory=_env_str("DAYFLOW_SQLITE_SYNCHRONOUS", "NORMAL")
+    )
+    sqlite_busy_timeout_ms: int = field(
+        default_factory=_env_int("DAYFLOW_SQLITE_BUSY_TIMEOUT_MS", 5000)
+    )
+    sqlite_cache_size_kib: int = field(
+        default_factory=_env_int("DAYFLOW_SQLITE_CACHE_SIZE_KIB", 65536)
+    )
+    sqlite_mmap_size: int = field(
+        default_factory=_env_int("DAYFLOW_SQLITE_MMAP_SIZE", 268435456)
+    )
+    sqlite_temp_store: str = field(
+        default_factory=_env_str("DAYFLOW_SQLITE_TEMP_STORE", "MEMORY")
+    )
+    # Group commit for check-in/check-out bursts
+    group_commit: bool = field(
+        default_factory=_env_bool("DAYFLOW_GROUP_COMMIT", False)
+    )
+    group_commit_window_ms: float = field(
+        default_factory=_env_float("DAYFLOW_GROUP_COMMIT_WINDOW_MS", 5.0)
+    )
+    group_commit_max_batch: int = field(
+        default_factory=_env_int("DAYFLOW_GROUP_COMMIT_MAX_BATCH", 128)
+    )
+    # Serve requests through AsyncSession (aiosqlite) instead of the
+    # synchronous session on the thread pool
+    db_async: bool = field(
+        default_factory=_env_bool("DAYFLOW_DB_ASYNC", False)
+    )
+    # Read routing: GET requests and CSV/NDJSON streams read through a second
+    # engine. DAYFLOW_READ_DATABASE_URL points it at a replica; otherwise
+    # DAYFLOW_DB_READ_ROUTING opens the SQLite (WAL) file again with mode=ro.
+    read_database_url: str = field(
+        default_factory=_env_str("DAYFLOW_READ_DATABASE_URL", "")
+    )
+    db_read_routing: bool = field(
+        default_factory=_env_bool("DAYFLOW_DB_READ_ROUTING", False)
+    )
+    # Yearly leave entitlement in days, "Type=days" separated by commas.
+    # Only these types and the unlimited "Unpaid" type can be applied for.
+    leave_entitlements: str = field(
+        default_factory=_env_str("DAYFLOW_LEAVE_ENTITLEMENTS", "Paid=20,Sick=10")
+    )
+    # Background jobs: worker threads per process, how many jobs a process
+    # accepts at once, and when a silent running job counts as abandoned
+    job_workers: int = field(
+        default_factory=_env_int("DAYFLOW_JOB_WORKERS", 1)
+    )
+    job_queue_limit: int = field(
+        default_factory=_env_int("DAYFLOW_JOB_QUEUE_LIMIT", 100)
+    )
+    job_stale_after: float = field(
+        default_factory=_env_float("DAYFLOW_JOB_STALE_AFTER", 30.0)
+    )
+    job_max_attempts: int = field(
+        default_factory=_env_int("DAYFLOW_JOB_MAX_ATTEMPTS", 3)
+    )
+    # Where export jobs write their files, and how many days a finished
+    # export stays downloadable before its file is deleted (0 keeps them)
+    export_dir: str = field(
+        default_factory=_env_str("DAYFLOW_EXPORT_DIR", "./exports")
+    )
+    export_retention_days: float = field(
+        default_factory=_env_float("DAYFLOW_EXPORT_RETENTION_DAYS", 7.0)
+    )
+    # Create missing tables/indexes when a worker starts. Off by default:
+    # run `python -m app.cli migrate` once before starting the workers.
+    schema_auto_create: bool = field(
+        default_factory=_env_bool("DAYFLOW_SCHEMA_AUTO_CREATE", False)
+    )
+    # Prime the connection pool, JWT code path, password workers and
+    # compiled statements before the worker accepts requests
+    warmup: bool = field(
+        default_factory=_env_bool("DAYFLOW_WARMUP", False)
+    )
+    # Request/SQL instrumentation. The Prometheus /metrics endpoint is only
+    # served with a token set; scrapers send "Authorization: Bearer <token>"
+    metrics_enabled: bool = field(
+        default_factory=_env_bool("DAYFLOW_METRICS", True)
+    )
+    metrics_token: str = field(
+        default_factory=_env_str("DAYFLOW_METRICS_TOKEN", "")
+    )
+
+
+settings = Settings()
@@ -1,12 +1,252 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+import logging
 
-DATABASE_URL = "sqlite:///./dayflow.db"
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
+from sqlalchemy.sql.dml import UpdateBase
 
-engine = create_engine(
-    DATABASE_URL, connect_args={"check_same_thread": False}
+from app.config import settings
+
+logger = logging.getLogger("dayflow.db")
+
+SQLITE_PRAGMAS = ("journal_mode", "synchronous", "busy_timeout",
+                  "cache_size", "mmap_size", "temp_store")
+
+
+def _is_sqlite(url):
+    return make_url(url).get_backend_name() == "sqlite"
+
+
+def _is_memory(url):
+    return make_url(url).database in (None, "", ":memory:")
+
+
+def _async_url(url):
+    if settings.async_database_url:
+        return settings.async_database_url
+
+    if not _is_sqlite(url):
+        raise ValueError(
+            "DAYFLOW_ASYNC_DATABASE_URL must be set for non-SQLite databases"
+        )
+
+    return make_url(url).set(drivername="sqlite+aiosqlite").render_as_string(
+        hide_password=False
+    )
+
+
+def _read_url(url):
+    # None = reads share the primary engine
+    if settings.read_database_url:
+        return settings.read_database_url
+    if not settings.db_read_routing:
+        return None
+
+    if not _is_sqlite(url) or _is_memory(url):
+        raise ValueError(
+            "DAYFLOW_READ_DATABASE_URL must be set unless the database is a "
+            "SQLite file"
+        )
+
+    # same WAL file, opened read-only
+    parsed = make_url(url)
+    return parsed.set(
+        database=f"file:{parsed.database}",
+        query={**parsed.query, "mode": "ro", "uri": "true"}
+    ).render_as_string(hide_password=False)
+
+
+def _async_read_url(url):
+    if not _is_sqlite(url):
+        raise ValueError(
+            "DAYFLOW_DB_ASYNC supports read routing to SQLite only"
+        )
+
+    return make_url(url).set(drivername="sqlite+aiosqlite").render_as_string(
+        hide_password=False
+    )
+
+
+def _execute_pragmas(dbapi_connection, statements):
+    cursor = dbapi_connection.cursor()
+    try:
+        for statement in statements:
+            cursor.execute(statement)
+    finally:
+        cursor.close()
+
+
+def _connection_pragmas():
+    return [
+        f"PRAGMA busy_timeout={settings.sqlite_busy_timeout_ms}",
+        # negative cache_size is in KiB rather than pages
+        f"PRAGMA cache_size=-{settings.sqlite_cache_size_kib}",
+        f"PRAGMA mmap_size={settings.sqlite_mmap_size}",
+        f"PRAGMA temp_store={settings.sqlite_temp_store}",
+    ]
+
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    _execute_pragmas(dbapi_connection, [
+        f"PRAGMA journal_mode={settings.sqlite_journal_mode}",
+        f"PRAGMA synchronous={settings.sqlite_synchronous}",
+        *_connection_pragmas(),
+    ])
+
+
+def _apply_sqlite_read_pragmas(dbapi_connection, connection_record):
+    # Setting journal_mode is a write; a read-only connection follows the
+    # mode the primary already put the file in
+    _execute_pragmas(dbapi_connection, [
+        *_connection_pragmas(),
+        "PRAGMA query_only=1",
+    ])
+
+
+def _engine_options(url):
+    options = {}
+
+    if _is_sqlite(url):
+        options["connect_args"] = {"check_same_thread": False}
+        if _is_memory(url):
+            # in-memory databases keep the default single-connection pool
+            return options
+
+    options.update(
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+        pool_pre_ping=settings.db_pool_pre_ping,
+    )
+    return options
+
+
+def _pragma_listener(read_only):
+    return _apply_sqlite_read_pragmas if read_only else _apply_sqlite_pragmas
+
+
+def create_db_engine(url=None, read_only=False):
+    url = url or settings.database_url
+    new_engine = create_engine(url, **_engine_options(url))
+
+    if _is_sqlite(url):
+        event.listen(new_engine, "connect", _pragma_listener(read_only))
+
+    return new_engine
+
+
+def create_async_db_engine(url=None, read_only=False):
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    url = url or _async_url(settings.database_url)
+    new_engine = create_async_engine(url, **_engine_options(url))
+
+    if _is_sqlite(url):
+        event.listen(
+            new_engine.sync_engine, "connect", _pragma_listener(read_only)
+        )
+
+    return new_engine
+
+
+def describe_engine(target):
+    pool = target.pool
+    info = {
+        "url": target.url.render_as_string(hide_password=True),
+        "pool": type(pool).__name__,
+    }
+
+    if hasattr(pool, "size"):
+        info["pool_size"] = pool.size()
+        info["max_overflow"] = settings.db_max_overflow
+        info["pool_timeout"] = pool.timeout()
+
+    if target.dialect.name == "sqlite":
+        with target.connect() as conn:
+            for pragma in SQLITE_PRAGMAS:
+                info[pragma] = conn.execute(text(f"PRAGMA {pragma}")).scalar()
+
+    return info
+
+
+def log_engine_settings():
+    logger.info("Database engine: %s", describe_engine(engine))
+    if read_engine is not None:
+        logger.info("Read engine: %s", describe_engine(read_engine))
+    if async_engine is not None:
+        logger.info(
+            "Async database engine: %s",
+            async_engine.url.render_as_string(hide_password=True)
+        )
+
+
+# -------------------------
+# READ / WRITE ROUTING
+# -------------------------
+class RoutingSession(Session):
+    # Sessions flagged info["read_only"] (GET requests, CSV/NDJSON streams)
+    # read through the read engine. The first write sends the session to the
+    # primary for good, so everything after it reads the request's own writes.
+    def __init__(self, *args, read_bind=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.read_bind = read_bind
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if self.read_bind is not None and self.info.get("read_only"):
+            if not self._flushing and not isinstance(clause, UpdateBase):
+                return self.read_bind
+            self.info["read_only"] = False
+
+        return super().get_bind(mapper, clause=clause, **kwargs)
+
+
+DATABASE_URL = settings.database_url
+READ_DATABASE_URL = _read_url(DATABASE_URL)
+
+engine = create_db_engine(DATABASE_URL)
+
+# Read-only engine, only built when read routing is configured
+read_engine = None
+if READ_DATABASE_URL:
+    read_engine = create_db_engine(READ_DATABASE_URL, read_only=True)
+
+SessionLocal = sessionmaker(
+    class_=RoutingSession,
+    autocommit=False,
+    autoflush=False,
+    bind=engine,
+    read_bind=read_engine
 )
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def read_session():
+    # Session for read-only work that outlives a request (streams, exports)
+    db = SessionLocal()
+    db.info["read_only"] = True
+    return db
+
+
+# Async engine, only built when DAYFLOW_DB_ASYNC is on (needs aiosqlite)
+async_engine = None
+async_read_engine = None
+AsyncSessionLocal = None
+
+if settings.db_async:
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+
+    async_engine = create_async_db_engine()
+    if READ_DATABASE_URL:
+        async_read_engine = create_async_db_engine(
+            _async_read_url(READ_DATABASE_URL), read_only=True
+        )
+
+    AsyncSessionLocal = async_sessionmaker(
+        bind=async_engine,
+        sync_session_class=RoutingSession,
+        read_bind=async_read_engine.sync_engine if async_read_engine else None,
+        autoflush=False,
+        expire_on_commit=False
+    )
 
 Base = declarative_base()
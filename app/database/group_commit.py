@@ -0,0 +1,146 @@
+import asyncio
+import logging
+
+from fastapi import HTTPException
+from sqlalchemy.exc import IntegrityError
+from starlette.concurrency import run_in_threadpool
+
+from app.config import settings
+from app.database.db import SessionLocal
+
+logger = logging.getLogger("dayflow.group_commit")
+
+
+def commit_one(db, fn, *args):
+    # Apply one mutation in its own transaction. A concurrent writer can win
+    # a unique-index race between our read and our commit; re-running fn
+    # after the rollback turns that into its normal validation error.
+    try:
+        result = fn(db, *args)
+        db.commit()
+        return result
+    except IntegrityError:
+        db.rollback()
+        result = fn(db, *args)
+        db.commit()
+        return result
+
+
+class GroupCommitWriter:
+    # Collects mutations from concurrent requests for a few milliseconds (or
+    # until max_batch) and applies them in one transaction, so a burst costs
+    # one commit/fsync instead of one per request.
+    #
+    # Submitted functions are called as fn(session, *args). They must not
+    # commit, and must raise HTTPException for validation failures before
+    # touching the session.
+
+    def __init__(self, session_factory, window_ms: float, max_batch: int):
+        self.session_factory = session_factory
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self._queue = None
+        self._task = None
+
+    @property
+    def running(self):
+        return self._task is not None and not self._task.done()
+
+    async def start(self):
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if not self.running:
+            return
+        await self._queue.put(None)
+        await self._task
+        self._task = None
+
+    async def submit(self, fn, *args):
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((fn, args, future))
+        return await future
+
+    async def _collect(self):
+        first = await self._queue.get()
+        if first is None:
+            return [], True
+
+        batch = [first]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.window
+
+        while len(batch) < self.max_batch:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(self._queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            if item is None:
+                return batch, True
+            batch.append(item)
+
+        return batch, False
+
+    async def _run(self):
+        stopping = False
+        while not stopping:
+            batch, stopping = await self._collect()
+            if not batch:
+                continue
+
+            try:
+                outcomes = await run_in_threadpool(self._apply, batch)
+            except Exception as exc:
+                logger.exception("Group commit batch failed")
+                outcomes = [(False, exc)] * len(batch)
+
+            for (_, _, future), (ok, value) in zip(batch, outcomes):
+                if future.done():
+                    continue
+                if ok:
+                    future.set_result(value)
+                else:
+                    future.set_exception(value)
+
+    def _apply(self, batch):
+        db = self.session_factory()
+        try:
+            outcomes = []
+            for fn, args, _ in batch:
+                try:
+                    value = fn(db, *args)
+                    # later items in the batch must see this one
+                    db.flush()
+                    outcomes.append((True, value))
+                except HTTPException as exc:
+                    outcomes.append((False, exc))
+                except Exception:
+                    # unexpected failure: fall back to one commit per item
+                    db.rollback()
+                    return self._apply_one_by_one(db, batch)
+
+            db.commit()
+            return outcomes
+        finally:
+            db.close()
+
+    def _apply_one_by_one(self, db, batch):
+        outcomes = []
+        for fn, args, _ in batch:
+            try:
+                outcomes.append((True, commit_one(db, fn, *args)))
+            except Exception as exc:
+                db.rollback()
+                outcomes.append((False, exc))
+        return outcomes
+
+
+group_writer = GroupCommitWriter(
+    SessionLocal,
+    settings.group_commit_window_ms,
+    settings.group_commit_max_batch
+)
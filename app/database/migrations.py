@@ -0,0 +1,186 @@
+import logging
+
+from sqlalchemy import func, inspect, select
+
+from app.database.db import Base
+
+logger = logging.getLogger("dayflow.migrations")
+
+
+class DuplicateRowsError(RuntimeError):
+    def __init__(self, table, columns, groups, total):
+        self.table = table
+        self.columns = columns
+        self.groups = groups
+        self.total = total
+
+        listed = "; ".join(
+            f"({', '.join(str(value) for value in key)}) x{count}"
+            for key, count in groups
+        )
+        more = f" (first {len(groups)} shown)" if total > len(groups) else ""
+        super().__init__(
+            f"{table} has {total} duplicate ({', '.join(columns)}) groups{more}: "
+            f"{listed}. Resolve them by hand, then run the migration again."
+        )
+
+
+def _check_duplicates(conn, table, index, shown=20):
+    # Older databases had no uniqueness rules. Which row of a group is the
+    # right one (a paid payroll, a corrected check-out) is not ours to guess,
+    # so refuse to build the unique index until someone has cleaned up.
+    columns = [table.c[col.name] for col in index.columns]
+    groups = select(*columns, func.count().label("rows")).group_by(
+        *columns
+    ).having(func.count() > 1)
+
+    total = conn.execute(
+        select(func.count()).select_from(groups.subquery())
+    ).scalar()
+    if not total:
+        return
+
+    rows = conn.execute(groups.order_by(*columns).limit(shown)).all()
+    raise DuplicateRowsError(
+        table.name,
+        [column.name for column in columns],
+        [(tuple(row[:-1]), row[-1]) for row in rows],
+        total
+    )
+
+
+def _add_missing_columns(conn, inspector, table):
+    # create_all never alters existing tables; columns added to a model
+    # later must be nullable so old rows can stay as they are
+    existing = {column["name"] for column in inspector.get_columns(table.name)}
+
+    for column in table.columns:
+        if column.name in existing:
+            continue
+        if not column.nullable:
+            raise RuntimeError(
+                f"Cannot add NOT NULL column {table.name}.{column.name} "
+                "to an existing table"
+            )
+
+        column_type = column.type.compile(dialect=conn.dialect)
+        conn.exec_driver_sql(
+            f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"
+        )
+        logger.info("Added column %s.%s", table.name, column.name)
+
+
+def _sqlite_autoincrement(conn, table):
+    # SQLite reuses the highest rowid after a delete unless the table was
+    # created with AUTOINCREMENT, which cannot be switched on in place:
+    # rebuild the table, then start its sequence past every id handed out
+    if conn.dialect.name != "sqlite" or not table.kwargs.get("sqlite_autoincrement"):
+        return
+
+    sql = conn.exec_driver_sql(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?",
+        (table.name,)
+    ).scalar()
+    if "AUTOINCREMENT" in sql.upper():
+        return
+
+    old = f"_{table.name}_old"
+    columns = ", ".join(column.name for column in table.columns)
+
+    conn.exec_driver_sql(f"ALTER TABLE {table.name} RENAME TO {old}")
+    for index in table.indexes:
+        conn.exec_driver_sql(f"DROP INDEX IF EXISTS {index.name}")
+    table.create(bind=conn)
+    conn.exec_driver_sql(
+        f"INSERT INTO {table.name} ({columns}) SELECT {columns} FROM {old}"
+    )
+    conn.exec_driver_sql(f"DROP TABLE {old}")
+
+    highest = conn.execute(select(func.max(table.c.id))).scalar() or 0
+    if table.name == "attendance":
+        from app.utils.attendance_archive import max_archived_id
+        highest = max(highest, max_archived_id(conn))
+
+    conn.exec_driver_sql(
+        "DELETE FROM sqlite_sequence WHERE name = ?", (table.name,)
+    )
+    conn.exec_driver_sql(
+        "INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)",
+        (table.name, highest)
+    )
+    logger.info("Rebuilt %s with AUTOINCREMENT (next id %s)", table.name, highest + 1)
+
+
+def _is_empty(conn, table_name):
+    table = Base.metadata.tables[table_name]
+    return conn.execute(select(table.c.id).limit(1)).first() is None
+
+
+def _backfill(conn):
+    # Derived tables start out empty on an existing database, including
+    # when an earlier migration created them and then stopped
+    from app.utils.attendance_rollup import rebuild_attendance_rollups
+    from app.utils.leave_balance import recompute_leave_balances
+
+    if _is_empty(conn, "attendance_monthly"):
+        count = rebuild_attendance_rollups(conn)
+        if count:
+            logger.info("Backfilled %s attendance rollups", count)
+
+    if _is_empty(conn, "leave_balances"):
+        count = recompute_leave_balances(conn)
+        if count:
+            logger.info("Backfilled %s leave balances", count)
+
+
+def _missing_unique_indexes(conn, existing_tables):
+    inspector = inspect(conn)
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        columns = {column["name"] for column in inspector.get_columns(table.name)}
+        existing = {ix["name"] for ix in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if (index.unique and index.name not in existing
+                    and {col.name for col in index.columns} <= columns):
+                yield table, index
+
+
+def upgrade_schema(engine):
+    from app import models  # noqa: F401  register every table
+
+    existing_tables = set(inspect(engine).get_table_names())
+
+    # Refuse before changing anything, so a rerun after the clean-up
+    # starts from the same state
+    with engine.connect() as conn:
+        for table, index in _missing_unique_indexes(conn, existing_tables):
+            _check_duplicates(conn, table, index)
+
+    # create_all only creates missing tables; columns and indexes added to
+    # models later never reach tables that already exist, so add them here.
+    Base.metadata.create_all(bind=engine)
+
+    with engine.begin() as conn:
+        inspector = inspect(conn)
+
+        for table in Base.metadata.sorted_tables:
+            if table.name in existing_tables:
+                _add_missing_columns(conn, inspector, table)
+
+            existing = {ix["name"] for ix in inspector.get_indexes(table.name)}
+
+            for index in table.indexes:
+                if index.name in existing:
+                    continue
+
+                if index.unique:
+                    _check_duplicates(conn, table, index)
+
+                index.create(bind=conn)
+
+            if table.name in existing_tables:
+                _sqlite_autoincrement(conn, table)
+
+        if existing_tables:
+            _backfill(conn)
@@ -0,0 +1,35 @@
+from fastapi import Request
+from starlette.concurrency import run_in_threadpool
+
+from app.database import db as database
+
+READ_METHODS = ("GET", "HEAD")
+
+
+async def get_db(request: Request):
+    # Shared session dependency for every router. GET/HEAD sessions read
+    # through the read engine when routing is on (see RoutingSession).
+    read_only = request.method in READ_METHODS
+
+    if database.AsyncSessionLocal is not None:
+        async with database.AsyncSessionLocal() as db:
+            db.info["read_only"] = read_only
+            yield db
+        return
+
+    db = database.SessionLocal()
+    db.info["read_only"] = read_only
+    try:
+        yield db
+    finally:
+        await run_in_threadpool(db.close)
+
+
+async def run_db(db, fn, *args, **kwargs):
+    # Run fn(session, *args) written against the synchronous Session API.
+    # AsyncSession runs it on the event loop through run_sync; a plain
+    # Session runs it on the thread pool.
+    if hasattr(db, "run_sync"):
+        return await db.run_sync(fn, *args, **kwargs)
+
+    return await run_in_threadpool(fn, db, *args, **kwargs)
@@ -1,45 +1,142 @@
-from fastapi import FastAPI, Depends
+import logging
+from contextlib import asynccontextmanager
+from dataclasses import fields
 
-from app.routes.auth import router as auth_router
-from app.database.db import engine, Base
+from fastapi import Depends, FastAPI
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse
 
-# 👇 IMPORT MODELS (VERY IMPORTANT)
-from app.models import user, employee
-from app.routes.employee import router as employee_router
+from app import models  # noqa: F401  register every table
 from app.auth.dependencies import get_current_user
-from app.models.user import User
+from app.auth.principal import Principal
+from app.config import Settings, settings as default_settings
+from app.database import db as database
+from app.database.group_commit import group_writer
+from app.database.migrations import upgrade_schema
+from app.routes.analytics import router as analytics_router
 from app.routes.attendance import router as attendance_router
-from app.models import user, employee, attendance, leave
+from app.routes.auth import router as auth_router
+from app.routes.employee import router as employee_router
+from app.routes.jobs import router as jobs_router
 from app.routes.leave import router as leave_router
-from app.database.db import engine, Base
-from app import models
+from app.routes.metrics import router as metrics_router
 from app.routes.payroll import router as payroll_router
+from app.schemas.auth import MeResponse
+from app.schemas.common import MessageResponse
+from app.utils.jobs import job_runner
+from app.utils.leave_index import leave_index
+from app.utils.metrics import MetricsMiddleware, install_db_hooks
+from app.utils.security import shutdown_password_pool, warm_password_pool
+from app.utils.warmup import warm_up
 
+# Application loggers report at INFO unless configured otherwise
+app_logger = logging.getLogger("dayflow")
+if not app_logger.handlers:
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter("%(levelname)s:     %(name)s - %(message)s"))
+    app_logger.addHandler(_handler)
+    app_logger.setLevel(logging.INFO)
 
 
+def _load_leave_index():
+    with database.SessionLocal() as db:
+        leave_index.rebuild(db)
 
 
-app = FastAPI(title="Dayflow HRMS")
-
-app.include_router(employee_router)
-app.include_router(attendance_router)
-app.include_router(leave_router)
-app.include_router(payroll_router)
+def _lifespan(settings: Settings):
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        database.log_engine_settings()
+        if settings.schema_auto_create:
+            await run_in_threadpool(upgrade_schema, database.engine)
+        await run_in_threadpool(_load_leave_index)
+        if settings.warmup:
+            await run_in_threadpool(warm_up, settings.db_pool_size)
+            await warm_password_pool()
+        if settings.group_commit:
+            await group_writer.start()
+        await run_in_threadpool(job_runner.start)
+        yield
+        await run_in_threadpool(job_runner.stop)
+        await group_writer.stop()
+        shutdown_password_pool()
+        if database.async_engine is not None:
+            await database.async_engine.dispose()
+        if database.async_read_engine is not None:
+            await database.async_read_engine.dispose()
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+    return lifespan
 
-# Include auth routes
-app.include_router(auth_router)
 
-@app.get("/")
-def root():
+async def root():
     return {"message": "Dayflow HRMS API is running"}
 
-@app.get("/me")
-def read_me(current_user: User = Depends(get_current_user)):
+
+async def read_me(current_user: Principal = Depends(get_current_user)):
     return {
         "id": current_user.id,
         "email": current_user.email,
         "role": current_user.role
     }
+
+
+# What create_app(settings) decides per app. Engines and pools, the group
+# writer window, caches, rate limiters, the job runner and the password pool
+# are built once per process from the environment (app.config.settings).
+APP_SETTINGS = (
+    "schema_auto_create",
+    "warmup",
+    "group_commit",
+    "metrics_enabled",
+    "metrics_token",
+)
+
+
+def _check_app_settings(settings: Settings):
+    process_wide = [
+        field.name for field in fields(Settings)
+        if field.name not in APP_SETTINGS
+        and getattr(settings, field.name) != getattr(default_settings, field.name)
+    ]
+    if process_wide:
+        raise ValueError(
+            "create_app cannot change process-wide settings "
+            f"({', '.join(process_wide)}); set them in the environment"
+        )
+
+
+def create_app(settings: Settings = None):
+    # Building the app touches no database; the schema is set up out of
+    # band with `python -m app.cli migrate` (or DAYFLOW_SCHEMA_AUTO_CREATE).
+    # Only APP_SETTINGS may differ from the process-wide settings.
+    settings = settings or default_settings
+    _check_app_settings(settings)
+
+    app = FastAPI(
+        title="Dayflow HRMS",
+        lifespan=_lifespan(settings),
+        default_response_class=ORJSONResponse
+    )
+    app.state.settings = settings
+
+    app.include_router(employee_router)
+    app.include_router(attendance_router)
+    app.include_router(leave_router)
+    app.include_router(payroll_router)
+    app.include_router(analytics_router)
+    app.include_router(auth_router)
+    app.include_router(jobs_router)
+
+    if settings.metrics_enabled:
+        install_db_hooks()
+        app.add_middleware(MetricsMiddleware, router=app.router)
+        if settings.metrics_token:
+            app.include_router(metrics_router)
+
+    app.add_api_route("/", root, methods=["GET"], response_model=MessageResponse)
+    app.add_api_route("/me", read_me, methods=["GET"], response_model=MeResponse)
+
+    return app
+
+
+app = create_app()
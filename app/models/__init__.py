@@ -3,4 +3,9 @@ from .employee import Employee
 from .attendance import Attendance
 from .leave import LeaveRequest
 from .payroll import Payroll
+from .attendance_monthly import AttendanceMonthly
 
+from .leave_balance import LeaveBalance
+from .record_version import RecordVersion
+from .job import Job
+from .attendance_archive import AttendanceArchive
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Date, Time, ForeignKey
+from sqlalchemy import Column, Integer, Date, Time, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from datetime import date
 
@@ -17,3 +17,15 @@ class Attendance(Base):
     work_hours = Column(Integer, nullable=True)  # minutes
 
     employee = relationship("Employee", backref="attendance_records")
+
+    __table_args__ = (
+        # one attendance row per employee per day
+        Index(
+            "uq_attendance_employee_date",
+            "employee_id", "attendance_date",
+            unique=True
+        ),
+        Index("ix_attendance_date", "attendance_date"),
+        # archived rows keep their ids, so live ids must never be reused
+        {"sqlite_autoincrement": True},
+    )
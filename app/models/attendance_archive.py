@@ -0,0 +1,38 @@
+from sqlalchemy import Column, Integer, LargeBinary, ForeignKey, Index
+
+from app.database.db import Base
+
+
+class AttendanceArchive(Base):
+    # One row per employee per closed month, written by
+    # `python -m app.cli archive-attendance`: bit d-1 of the bitmaps stands
+    # for day d, and `records` packs the days with attendance in day order
+    # (see app.utils.attendance_archive)
+    __tablename__ = "attendance_archive"
+
+    id = Column(Integer, primary_key=True, index=True)
+    employee_id = Column(Integer, ForeignKey("employees.id"), nullable=False)
+
+    year = Column(Integer, nullable=False)
+    month = Column(Integer, nullable=False)
+
+    day_bitmap = Column(Integer, nullable=False, default=0)
+    present_bitmap = Column(Integer, nullable=False, default=0)
+
+    present_days = Column(Integer, nullable=False, default=0)
+    total_days = Column(Integer, nullable=False, default=0)
+    work_minutes = Column(Integer, nullable=False, default=0)
+
+    records = Column(LargeBinary, nullable=False)
+
+    __table_args__ = (
+        Index(
+            "uq_attendance_archive_employee_period",
+            "employee_id", "year", "month",
+            unique=True
+        ),
+        Index("ix_attendance_archive_period", "year", "month"),
+        # ids are never reused, so (count, max id) of a month changes
+        # whenever the month is rewritten
+        {"sqlite_autoincrement": True},
+    )
@@ -0,0 +1,28 @@
+from sqlalchemy import Column, Integer, ForeignKey, Index
+
+from app.database.db import Base
+
+
+class AttendanceMonthly(Base):
+    # Rollup of attendance per employee per month, kept current by
+    # check-in/check-out and rebuilt with `python -m app.cli rebuild-rollups`
+    __tablename__ = "attendance_monthly"
+
+    id = Column(Integer, primary_key=True, index=True)
+    employee_id = Column(Integer, ForeignKey("employees.id"), nullable=False)
+
+    year = Column(Integer, nullable=False)
+    month = Column(Integer, nullable=False)
+
+    present_days = Column(Integer, nullable=False, default=0)
+    total_days = Column(Integer, nullable=False, default=0)
+    work_minutes = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        Index(
+            "uq_attendance_monthly_employee_period",
+            "employee_id", "year", "month",
+            unique=True
+        ),
+        Index("ix_attendance_monthly_period", "year", "month"),
+    )
@@ -0,0 +1,31 @@
+from sqlalchemy import Column, Integer, String, DateTime, JSON, ForeignKey, Index
+from datetime import datetime
+
+from app.database.db import Base
+
+
+class Job(Base):
+    # Background job run by the in-process JobRunner (app/utils/jobs.py)
+    __tablename__ = "jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_type = Column(String, nullable=False)
+
+    status = Column(String, nullable=False, default="queued")  # queued, running, succeeded, failed, expired
+    progress = Column(Integer, nullable=False, default=0)  # percent
+    params = Column(JSON, nullable=True)
+    result = Column(JSON, nullable=True)
+    error = Column(String, nullable=True)
+
+    attempts = Column(Integer, nullable=False, default=0)
+    owner = Column(String, nullable=True)  # worker running it
+    created_by = Column(Integer, ForeignKey("users.id"), nullable=True)
+
+    created_at = Column(DateTime, default=datetime.now)
+    started_at = Column(DateTime, nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_jobs_status", "status"),
+    )
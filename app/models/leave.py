@@ -1,6 +1,6 @@
-from sqlalchemy import Column, Integer, Date, String, ForeignKey
+from sqlalchemy import Column, Integer, Date, DateTime, String, ForeignKey, Index
 from sqlalchemy.orm import relationship
-from datetime import date
+from datetime import date, datetime
 
 from app.database.db import Base
 
@@ -18,5 +18,15 @@ class LeaveRequest(Base):
     reason = Column(String, nullable=True)
     status = Column(String, default="Pending")  # Pending, Approved, Rejected
     applied_on = Column(Date, default=date.today)
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
 
     employee = relationship("Employee", backref="leave_requests")
+
+    __table_args__ = (
+        Index(
+            "ix_leave_requests_employee_period",
+            "employee_id", "start_date", "end_date"
+        ),
+        Index("ix_leave_requests_updated_at", "updated_at"),
+        Index("ix_leave_requests_status", "status"),
+    )
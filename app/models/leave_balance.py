@@ -0,0 +1,28 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, Index
+
+from app.database.db import Base
+
+
+class LeaveBalance(Base):
+    # Leave ledger per employee, leave type and year, kept current by
+    # apply/approve/reject and rebuilt with
+    # `python -m app.cli recompute-leave-balances`
+    __tablename__ = "leave_balances"
+
+    id = Column(Integer, primary_key=True, index=True)
+    employee_id = Column(Integer, ForeignKey("employees.id"), nullable=False)
+
+    leave_type = Column(String, nullable=False)
+    year = Column(Integer, nullable=False)
+
+    entitlement = Column(Integer, nullable=True)  # NULL = unlimited
+    used_days = Column(Integer, nullable=False, default=0)
+    pending_days = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        Index(
+            "uq_leave_balances_employee_type_year",
+            "employee_id", "leave_type", "year",
+            unique=True
+        ),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Float, String, ForeignKey
+from sqlalchemy import Column, Integer, Float, String, ForeignKey, Index
 from app.database.db import Base
 
 
@@ -15,3 +15,13 @@ class Payroll(Base):
     salary_amount = Column(Float, nullable=False)
 
     status = Column(String, default="Generated")  # Generated / Paid
+
+    __table_args__ = (
+        # one payroll per employee per month
+        Index(
+            "uq_payrolls_employee_period",
+            "employee_id", "year", "month",
+            unique=True
+        ),
+        Index("ix_payrolls_period", "year", "month"),
+    )
@@ -0,0 +1,24 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, Index
+
+from app.database.db import Base
+
+
+class RecordVersion(Base):
+    # Change counter per employee and resource ("profile", "attendance",
+    # "leaves", "payroll"), bumped in the same transaction as every write and
+    # used as the ETag of the employee's own read endpoints. No row = version 0.
+    __tablename__ = "record_versions"
+
+    id = Column(Integer, primary_key=True, index=True)
+    employee_id = Column(Integer, ForeignKey("employees.id"), nullable=False)
+
+    resource = Column(String, nullable=False)
+    version = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        Index(
+            "uq_record_versions_employee_resource",
+            "employee_id", "resource",
+            unique=True
+        ),
+    )
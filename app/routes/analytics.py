@@ -0,0 +1,261 @@
+import threading
+from collections import OrderedDict
+from datetime import date, timedelta
+from typing import Optional
+
+import numpy as np
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.auth.dependencies import get_current_claims
+from app.auth.principal import Principal
+from app.database.session import get_db, run_db
+from app.models.attendance import Attendance
+from app.models.employee import Employee
+from app.schemas.analytics import PresenceMatrix
+from app.utils.attendance_archive import ArchivedAttendance, archived_months
+
+router = APIRouter(prefix="/analytics", tags=["Analytics"])
+
+MAX_RANGE_DAYS = 366
+UNASSIGNED = "Unassigned"
+
+
+# -------------------------
+# CLOSED-DAY CACHE
+# -------------------------
+# Attendance for days before today no longer changes, so their per-department
+# aggregates are cached: day -> {department: (present, avg_work_minutes)}.
+# Departments do change; entries are kept with a stamp of the employees
+# table (count, max id, latest updated_at) and dropped when any worker or
+# script has written to it since.
+class _DayCache:
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._days = OrderedDict()
+        self._stamp = None
+        self._lock = threading.Lock()
+
+    def _check(self, stamp):
+        if stamp != self._stamp:
+            self._days.clear()
+            self._stamp = stamp
+
+    def get_many(self, days, stamp):
+        with self._lock:
+            self._check(stamp)
+            found = {}
+            for day in days:
+                if day in self._days:
+                    self._days.move_to_end(day)
+                    found[day] = self._days[day]
+            return found
+
+    def put_many(self, values, stamp):
+        with self._lock:
+            self._check(stamp)
+            for day, cells in values.items():
+                self._days[day] = cells
+                self._days.move_to_end(day)
+            while len(self._days) > self.maxsize:
+                self._days.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._days.clear()
+            self._stamp = None
+
+
+presence_cache = _DayCache(maxsize=3 * MAX_RANGE_DAYS)
+
+
+def _employee_stamp(db: Session):
+    return tuple(db.query(
+        func.count(Employee.id),
+        func.max(Employee.id),
+        func.max(Employee.updated_at)
+    ).one())
+
+
+# -------------------------
+# PRESENCE MATRIX
+# -------------------------
+def _department_column():
+    return func.coalesce(Employee.department, UNASSIGNED)
+
+
+def _add_archived_days(db: Session, start: date, end: date, department,
+                       totals):
+    # Same aggregates for archived months, grouped with numpy
+    for year, month in archived_months(db, start, end):
+        data = ArchivedAttendance(db, year, month, with_employee=True)
+        names, codes = np.unique(
+            np.array([name or UNASSIGNED for name in data.departments],
+                     dtype=object),
+            return_inverse=True
+        )
+
+        keep = data.within(start, end)
+        if department:
+            keep &= names[codes][data.owner] == department
+        index = np.flatnonzero(keep)
+
+        offsets = (data.dates[index] - np.datetime64(start, "D")).astype(np.int64)
+        keys = offsets * len(names) + codes[data.owner[index]]
+        size = ((end - start).days + 1) * len(names)
+        timed = data.minutes[index] >= 0
+
+        rows = np.bincount(keys, minlength=size)
+        present = np.bincount(
+            keys, weights=data.check_in[index] >= 0, minlength=size
+        )
+        minutes = np.bincount(
+            keys, weights=np.where(timed, data.minutes[index], 0), minlength=size
+        )
+        timed = np.bincount(keys, weights=timed, minlength=size)
+
+        for key in np.flatnonzero(rows):
+            offset, code = divmod(int(key), len(names))
+            cell = totals.setdefault(
+                (start + timedelta(days=offset), names[code]), [0, 0, 0]
+            )
+            cell[0] += int(present[key])
+            cell[1] += int(minutes[key])
+            cell[2] += int(timed[key])
+
+
+def _load_days(db: Session, days, department):
+    # One grouped query for every requested day, plus archived months
+    dept = _department_column()
+    query = db.query(
+        Attendance.attendance_date,
+        dept,
+        func.count(Attendance.check_in),
+        func.sum(Attendance.work_hours),
+        func.count(Attendance.work_hours)
+    ).join(
+        Employee, Employee.id == Attendance.employee_id
+    ).filter(
+        Attendance.attendance_date >= min(days),
+        Attendance.attendance_date <= max(days)
+    )
+
+    if department:
+        query = query.filter(dept == department)
+
+    # (day, department) -> [present, work minutes, rows with work minutes]
+    totals = {}
+    for day, dept_name, present, minutes, timed in query.group_by(
+        Attendance.attendance_date, dept
+    ):
+        totals[(day, dept_name)] = [present, minutes or 0, timed]
+
+    _add_archived_days(db, min(days), max(days), department, totals)
+
+    cells = {day: {} for day in days}
+    for (day, dept_name), (present, minutes, timed) in totals.items():
+        if day in cells:
+            cells[day][dept_name] = (present, minutes / timed if timed else None)
+
+    return cells
+
+
+def _presence_matrix(db: Session, start_date: date, end_date: date,
+                     department: Optional[str]):
+    days = [
+        start_date + timedelta(days=offset)
+        for offset in range((end_date - start_date).days + 1)
+    ]
+    today = date.today()
+
+    # department filter results are not cached; they are a subset anyway
+    stamp = None if department else _employee_stamp(db)
+    cells = {} if department else presence_cache.get_many(
+        [day for day in days if day < today], stamp
+    )
+    missing = [day for day in days if day not in cells]
+
+    if missing:
+        loaded = _load_days(db, missing, department)
+        cells.update(loaded)
+        if not department:
+            presence_cache.put_many(
+                {day: value for day, value in loaded.items() if day < today},
+                stamp
+            )
+
+    dept = _department_column()
+    headcount_query = db.query(dept, func.count(Employee.id))
+    if department:
+        headcount_query = headcount_query.filter(dept == department)
+    headcounts = dict(headcount_query.group_by(dept).all())
+
+    departments = sorted(
+        set(headcounts).union(*(cells[day].keys() for day in days))
+    )
+    dept_index = {name: i for i, name in enumerate(departments)}
+
+    present = np.zeros((len(departments), len(days)), dtype=np.int64)
+    avg_minutes = np.full((len(departments), len(days)), np.nan)
+
+    for j, day in enumerate(days):
+        for name, (count, minutes) in cells[day].items():
+            i = dept_index[name]
+            present[i, j] = count
+            if minutes is not None:
+                avg_minutes[i, j] = minutes
+
+    headcount = np.array(
+        [headcounts.get(name, 0) for name in departments], dtype=np.int64
+    )
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rate = np.where(
+            headcount[:, None] > 0,
+            np.round(present / headcount[:, None] * 100, 2),
+            0.0
+        )
+
+    avg_minutes = np.round(avg_minutes, 1)
+
+    return {
+        "start_date": start_date,
+        "end_date": end_date,
+        "days": days,
+        "departments": departments,
+        "headcount": headcount.tolist(),
+        "present": present.tolist(),
+        "presence_percentage": rate.tolist(),
+        "avg_work_minutes": np.where(
+            np.isnan(avg_minutes), None, avg_minutes
+        ).tolist(),
+    }
+
+
+@router.get("/presence", response_model=PresenceMatrix)
+async def get_department_presence(
+    start_date: date,
+    end_date: date,
+    department: Optional[str] = Query(None),
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_claims)
+):
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Access denied")
+
+    if start_date > end_date:
+        raise HTTPException(
+            status_code=400,
+            detail="Start date cannot be after end date"
+        )
+
+    if (end_date - start_date).days >= MAX_RANGE_DAYS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Date range cannot exceed {MAX_RANGE_DAYS} days"
+        )
+
+    return await run_db(
+        db, _presence_matrix, start_date, end_date, department
+    )
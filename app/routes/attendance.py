@@ -1,63 +1,89 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+import heapq
+from operator import itemgetter
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
-from sqlalchemy import func
 from datetime import datetime, date
-from typing import Optional
+from typing import List, Optional, Union
 
-from app.database.db import SessionLocal
+from app.database.group_commit import commit_one, group_writer
+from app.database.session import get_db, run_db
 from app.models.attendance import Attendance
 from app.models.employee import Employee
-from app.models.user import User
-from app.auth.dependencies import get_current_user
+from app.auth.dependencies import get_current_user, get_current_claims
+from app.auth.principal import Principal
+from app.utils.attendance_archive import (
+    archived_attendance_of,
+    iter_archived_attendance,
+    iter_archived_export_rows,
+    newest_archived_day,
+)
+from app.utils.attendance_rollup import bump_attendance_rollup, get_attendance_rollup
+from app.utils.export import csv_response
+from app.schemas.attendance import (
+    AttendanceOut,
+    AttendanceSummary,
+    CheckInResponse,
+    CheckOutResponse,
+)
+from app.schemas.common import Page
+from app.utils.pagination import (
+    merge_newest_first,
+    paginate,
+    row_to_dict,
+    schema_columns,
+)
+from app.utils.record_versions import bump_record_version, conditional_get
 
 router = APIRouter(prefix="/attendance", tags=["Attendance"])
 
+ATTENDANCE_COLUMNS = schema_columns(Attendance, AttendanceOut)
 
-# -------------------------
-# DATABASE DEPENDENCY
-# -------------------------
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+
+def _require_employee(current_user: Principal):
+    if current_user.employee_id is None:
+        raise HTTPException(status_code=404, detail="Employee profile not found")
+
+    return current_user.employee_id
+
+
+async def _write(db: Session, record, employee_id: int):
+    # Through the group-commit writer when it runs, else its own transaction
+    if group_writer.running:
+        return await group_writer.submit(record, employee_id)
+
+    return await run_db(db, commit_one, record, employee_id)
 
 
 # -------------------------
 # CHECK-IN
 # -------------------------
-@router.post("/check-in")
-def check_in(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
-):
-    employee = db.query(Employee).filter(
-        Employee.user_id == current_user.id
-    ).first()
-
-    if not employee:
-        raise HTTPException(status_code=404, detail="Employee profile not found")
-
+def _record_check_in(db: Session, employee_id: int):
     today = date.today()
 
     existing = db.query(Attendance).filter(
-        Attendance.employee_id == employee.id,
+        Attendance.employee_id == employee_id,
         Attendance.attendance_date == today
     ).first()
 
     if existing and existing.check_in:
         raise HTTPException(status_code=400, detail="Already checked in today")
 
-    attendance = Attendance(
-        employee_id=employee.id,
-        attendance_date=today,
-        check_in=datetime.now().time()
-    )
+    # only one attendance row per employee per day
+    if existing:
+        attendance = existing
+        attendance.check_in = datetime.now().time()
+        bump_attendance_rollup(db, employee_id, today, present=1)
+    else:
+        attendance = Attendance(
+            employee_id=employee_id,
+            attendance_date=today,
+            check_in=datetime.now().time()
+        )
+        db.add(attendance)
+        bump_attendance_rollup(db, employee_id, today, present=1, total=1)
 
-    db.add(attendance)
-    db.commit()
-    db.refresh(attendance)
+    bump_record_version(db, employee_id, "attendance")
 
     return {
         "message": "Check-in successful",
@@ -65,25 +91,24 @@ def check_in(
     }
 
 
-# -------------------------
-# CHECK-OUT
-# -------------------------
-@router.post("/check-out")
-def check_out(
+@router.post("/check-in", response_model=CheckInResponse)
+async def check_in(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
-    employee = db.query(Employee).filter(
-        Employee.user_id == current_user.id
-    ).first()
+    employee_id = _require_employee(current_user)
 
-    if not employee:
-        raise HTTPException(status_code=404, detail="Employee profile not found")
+    return await _write(db, _record_check_in, employee_id)
 
+
+# -------------------------
+# CHECK-OUT
+# -------------------------
+def _record_check_out(db: Session, employee_id: int):
     today = date.today()
 
     attendance = db.query(Attendance).filter(
-        Attendance.employee_id == employee.id,
+        Attendance.employee_id == employee_id,
         Attendance.attendance_date == today
     ).first()
 
@@ -102,8 +127,10 @@ def check_out(
         (check_out_dt - check_in_dt).total_seconds() / 60
     )
 
-    db.commit()
-    db.refresh(attendance)
+    bump_attendance_rollup(
+        db, employee_id, today, minutes=attendance.work_hours
+    )
+    bump_record_version(db, employee_id, "attendance")
 
     return {
         "message": "Check-out successful",
@@ -112,76 +139,108 @@ def check_out(
     }
 
 
+@router.post("/check-out", response_model=CheckOutResponse)
+async def check_out(
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    employee_id = _require_employee(current_user)
+
+    return await _write(db, _record_check_out, employee_id)
+
+
 # -------------------------
 # EMPLOYEE: MY ATTENDANCE
 # -------------------------
-@router.get("/me")
-def get_my_attendance(
+def _my_attendance(db: Session, employee_id: int):
+    live = db.query(*ATTENDANCE_COLUMNS).filter(
+        Attendance.employee_id == employee_id
+    ).order_by(Attendance.attendance_date.desc()).all()
+
+    # closed months may have been moved to the archive
+    archived = archived_attendance_of(db, employee_id)
+    if not archived:
+        return live
+
+    return list(merge_newest_first(
+        (row_to_dict(row) for row in live),
+        archived,
+        [Attendance.attendance_date]
+    ))
+
+
+@router.get("/me", response_model=List[AttendanceOut])
+async def get_my_attendance(
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
-    employee = db.query(Employee).filter(
-        Employee.user_id == current_user.id
-    ).first()
+    employee_id = _require_employee(current_user)
 
-    if not employee:
-        raise HTTPException(status_code=404, detail="Employee profile not found")
-
-    return db.query(Attendance).filter(
-        Attendance.employee_id == employee.id
-    ).order_by(Attendance.attendance_date.desc()).all()
+    return await conditional_get(
+        db, request, response, "attendance", employee_id,
+        _my_attendance, employee_id
+    )
 
 
 # -------------------------
 # ADMIN: ALL ATTENDANCE
 # -------------------------
-@router.get("/all")
-def get_all_attendance(
+@router.get(
+    "/all",
+    response_model=Union[List[AttendanceOut], Page[AttendanceOut]]
+)
+async def get_all_attendance(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_claims),
     start_date: Optional[date] = Query(None),
     end_date: Optional[date] = Query(None),
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: Optional[str] = Query(None),
+    stream: bool = Query(False),
 ):
     if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Access denied")
 
-    query = db.query(Attendance)
+    def build_query(session: Session):
+        query = session.query(*ATTENDANCE_COLUMNS)
+
+        if start_date:
+            query = query.filter(Attendance.attendance_date >= start_date)
+        if end_date:
+            query = query.filter(Attendance.attendance_date <= end_date)
 
-    if start_date:
-        query = query.filter(Attendance.attendance_date >= start_date)
-    if end_date:
-        query = query.filter(Attendance.attendance_date <= end_date)
+        return query
 
-    return query.order_by(Attendance.attendance_date.desc()).all()
+    def archived(session: Session, after):
+        return (
+            newest_archived_day(session, start_date, end_date),
+            iter_archived_attendance(session, start_date, end_date, after)
+        )
+
+    return await paginate(
+        db,
+        build_query,
+        [Attendance.attendance_date, Attendance.id],
+        limit=limit,
+        cursor=cursor,
+        stream=stream,
+        archived=archived
+    )
 
 
 # -------------------------
 # ATTENDANCE SUMMARY
 # -------------------------
-@router.get("/me/summary")
-def get_my_attendance_summary(
-    month: int,
-    year: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
-):
-    employee = db.query(Employee).filter(
-        Employee.user_id == current_user.id
-    ).first()
-
-    if not employee:
-        raise HTTPException(status_code=404, detail="Employee profile not found")
+def _attendance_summary(db: Session, employee_id: int, month: int, year: int):
+    # read from the monthly rollup instead of counting raw rows
+    rollup = get_attendance_rollup(db, employee_id, year, month)
 
-    records = db.query(Attendance).filter(
-        Attendance.employee_id == employee.id,
-        func.strftime("%m", Attendance.attendance_date) == f"{month:02d}",
-        func.strftime("%Y", Attendance.attendance_date) == str(year)
-    ).all()
-
-    total_days = len(records)
+    total_days = rollup.total_days if rollup else 0
 
     # ✅ PRESENT = check_in exists
-    present_days = len([r for r in records if r.check_in is not None])
+    present_days = rollup.present_days if rollup else 0
 
     return {
         "month": month,
@@ -193,3 +252,80 @@ def get_my_attendance_summary(
             if total_days > 0 else 0
         )
     }
+
+
+@router.get("/me/summary", response_model=AttendanceSummary)
+async def get_my_attendance_summary(
+    month: int,
+    year: int,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    employee_id = _require_employee(current_user)
+
+    return await run_db(db, _attendance_summary, employee_id, month, year)
+
+
+# -------------------------
+# CSV EXPORT (ADMIN)
+# -------------------------
+ATTENDANCE_EXPORT_HEADER = [
+    "attendance_date", "employee_id", "full_name", "department",
+    "check_in", "check_out", "work_minutes"
+]
+
+
+def attendance_export_query(start_date=None, end_date=None, department=None):
+    def build_query(session: Session):
+        query = session.query(
+            Attendance.attendance_date,
+            Attendance.employee_id,
+            Employee.full_name,
+            Employee.department,
+            Attendance.check_in,
+            Attendance.check_out,
+            Attendance.work_hours
+        ).join(Employee, Employee.id == Attendance.employee_id)
+
+        if start_date:
+            query = query.filter(Attendance.attendance_date >= start_date)
+        if end_date:
+            query = query.filter(Attendance.attendance_date <= end_date)
+        if department:
+            query = query.filter(Employee.department == department)
+
+        return query.order_by(Attendance.attendance_date, Attendance.employee_id)
+
+    return build_query
+
+
+def attendance_export_merge(start_date=None, end_date=None, department=None):
+    # Archived months come in already shaped and ordered like the query
+    def merge(session: Session, rows):
+        return heapq.merge(
+            rows,
+            iter_archived_export_rows(session, start_date, end_date, department),
+            key=itemgetter(0, 1)
+        )
+
+    return merge
+
+
+@router.get("/export")
+async def export_attendance(
+    current_user: Principal = Depends(get_current_claims),
+    start_date: Optional[date] = Query(None),
+    end_date: Optional[date] = Query(None),
+    department: Optional[str] = Query(None),
+    gzip: bool = Query(False),
+):
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Access denied")
+
+    return csv_response(
+        attendance_export_query(start_date, end_date, department),
+        ATTENDANCE_EXPORT_HEADER,
+        "attendance.csv",
+        gzip=gzip,
+        merge=attendance_export_merge(start_date, end_date, department)
+    )
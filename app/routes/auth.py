@@ -1,42 +1,96 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.orm import Session
 
-from app.database.db import SessionLocal, engine, Base
+from app.database.session import get_db, run_db
 from app.models.user import User
-from app.utils.security import hash_password, verify_password
+from app.utils.rate_limit import admit
+from app.utils.security import (
+    PasswordHasherBusy,
+    hash_password_async,
+    normalize_email,
+    verify_password_async,
+)
 from app.utils.token import create_access_token
-from app.schemas.auth import SignupRequest, LoginRequest
+from app.schemas.auth import (
+    LoginRequest,
+    SignupRequest,
+    SignupResponse,
+    TokenResponse,
+)
 
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
 
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+def _find_user(db: Session, email: str):
+    # Accounts created before emails were normalised are stored as typed
+    normalized = normalize_email(email)
+    users = db.query(User).filter(
+        User.email.in_({normalized, email.strip()})
+    ).all()
+    user = min(users, key=lambda u: u.email != normalized, default=None)
+
+    # end the read so the connection goes back to the pool while bcrypt runs
+    if user:
+        db.expunge(user)
+    db.rollback()
+
+    return user
+
+
+def _save_user(db: Session, user: User):
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    return user
+
+
+def _password_pool_busy():
+    return HTTPException(
+        status_code=503,
+        detail="Too many authentication requests, please retry",
+        headers={"Retry-After": "1"}
+    )
 
 
-@router.post("/signup")
-def signup(
+# -------------------------
+# ADMISSION CONTROL
+# -------------------------
+# Decorator dependencies run before the endpoint's own, so a throttled
+# attempt never opens a session or reaches bcrypt
+async def _admit_signup(request: Request, payload: SignupRequest):
+    admit("signup", request, payload.email)
+
+
+async def _admit_login(request: Request, payload: LoginRequest):
+    admit("login", request, payload.email)
+
+
+@router.post(
+    "/signup",
+    response_model=SignupResponse,
+    dependencies=[Depends(_admit_signup)]
+)
+async def signup(
     payload: SignupRequest,
     db: Session = Depends(get_db)
 ):
-    user = db.query(User).filter(User.email == payload.email).first()
+    user = await run_db(db, _find_user, payload.email)
     if user:
         raise HTTPException(status_code=400, detail="User already exists")
 
+    try:
+        hashed = await hash_password_async(payload.password)
+    except PasswordHasherBusy:
+        raise _password_pool_busy()
+
     new_user = User(
-        email=payload.email,
-        password=hash_password(payload.password),
+        email=normalize_email(payload.email),
+        password=hashed,
         role=payload.role
     )
 
-    db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    new_user = await run_db(db, _save_user, new_user)
 
     return {
         "message": "User registered successfully",
@@ -45,14 +99,25 @@ def signup(
     }
 
 
-@router.post("/login")
-def login(
+@router.post(
+    "/login",
+    response_model=TokenResponse,
+    dependencies=[Depends(_admit_login)]
+)
+async def login(
     payload: LoginRequest,
     db: Session = Depends(get_db)
 ):
-    user = db.query(User).filter(User.email == payload.email).first()
+    user = await run_db(db, _find_user, payload.email)
+
+    try:
+        valid = bool(user) and await verify_password_async(
+            payload.password, user.password
+        )
+    except PasswordHasherBusy:
+        raise _password_pool_busy()
 
-    if not user or not verify_password(payload.password, user.password):
+    if not valid:
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
     token = create_access_token(
@@ -1,30 +1,30 @@
-from fastapi import APIRouter, Depends, HTTPException
+import csv
+import io
+
+from fastapi import (
+    APIRouter, Depends, File, HTTPException, Request, Response, UploadFile
+)
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
-from app.database.db import SessionLocal
+from app.database.session import get_db, run_db
 from app.models.employee import Employee
 from app.models.user import User
-from app.auth.dependencies import get_current_user
+from app.auth.dependencies import get_current_user, get_current_claims
+from app.auth.principal import Principal
+from app.schemas.employee import EmployeeImportResult, EmployeeOut
+from app.utils.record_versions import conditional_get
+from app.utils.security import hash_passwords_async, normalize_email
 
 router = APIRouter(prefix="/employees", tags=["Employees"])
 
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-
-@router.get("/me")
-def get_my_profile(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
-):
-    employee = db.query(Employee).filter(
-        Employee.user_id == current_user.id
-    ).first()
+def _my_profile(db: Session, current_user: Principal):
+    employee = None
+    if current_user.employee_id is not None:
+        employee = db.get(Employee, current_user.employee_id)
 
     # ✅ AUTO-CREATE EMPLOYEE PROFILE (REQUIRED FIELDS)
     if not employee:
@@ -39,19 +39,255 @@ def get_my_profile(
     return employee
 
 
-@router.get("/{employee_id}")
-def get_employee_by_id(
-    employee_id: int,
+@router.get("/me", response_model=EmployeeOut)
+async def get_my_profile(
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
+):
+    return await conditional_get(
+        db, request, response, "profile", current_user.employee_id,
+        _my_profile, current_user
+    )
+
+
+# -------------------------
+# BULK IMPORT (ADMIN)
+# -------------------------
+IMPORT_BATCH_SIZE = 500
+IMPORT_REQUIRED_COLUMNS = {"email", "password"}
+IMPORT_PROFILE_COLUMNS = ("department", "designation", "phone", "address")
+IMPORT_ROLES = ("employee", "admin")
+
+
+def _clean_import_row(row: dict):
+    # -> (record, error)
+    email = normalize_email(row.get("email") or "")
+    password = row.get("password") or ""
+    role = (row.get("role") or "employee").strip().lower()
+
+    if not email or "@" not in email:
+        return None, "Invalid email"
+    if not password:
+        return None, "Password is required"
+    if role not in IMPORT_ROLES:
+        return None, f"Role must be one of {', '.join(IMPORT_ROLES)}"
+
+    record = {
+        "email": email,
+        "password": password,
+        "role": role,
+        "full_name": (row.get("full_name") or "").strip() or email.split("@")[0],
+    }
+    for column in IMPORT_PROFILE_COLUMNS:
+        record[column] = (row.get(column) or "").strip() or None
+
+    return record, None
+
+
+def _open_import_reader(raw):
+    # Decodes the upload as it is read instead of loading it whole
+    try:
+        reader = csv.DictReader(
+            io.TextIOWrapper(raw, encoding="utf-8-sig", newline="")
+        )
+        fieldnames = reader.fieldnames or ()
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="CSV must be UTF-8 encoded")
+    except csv.Error as exc:
+        raise HTTPException(status_code=400, detail=f"Invalid CSV: {exc}")
+
+    missing = IMPORT_REQUIRED_COLUMNS - set(fieldnames)
+    if missing:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Missing CSV columns: {', '.join(sorted(missing))}"
+        )
+    return reader
+
+
+def _next_import_rows(reader):
+    # Decoding and CSV parsing are CPU work; the route runs this in the
+    # threadpool, one batch at a time -> ([(line_number, row)], error)
+    rows = []
+    try:
+        for row in reader:
+            rows.append((reader.line_num, row))
+            if len(rows) >= IMPORT_BATCH_SIZE:
+                break
+    except UnicodeDecodeError:
+        return rows, "CSV must be UTF-8 encoded"
+    except csv.Error as exc:
+        return rows, f"Invalid CSV: {exc}"
+    return rows, None
+
+
+def _existing_emails(db: Session, emails):
+    found = {
+        email for (email,) in db.query(User.email).filter(User.email.in_(emails))
+    }
+    db.rollback()
+    return found
+
+
+def _insert_people(db: Session, records):
+    users = db.execute(
+        insert(User).returning(User.id, User.email, sort_by_parameter_order=True),
+        [
+            {"email": r["email"], "password": r["password"], "role": r["role"]}
+            for r in records
+        ]
+    ).all()
+
+    db.execute(insert(Employee), [
+        {
+            "user_id": user_id,
+            "full_name": r["full_name"],
+            **{column: r[column] for column in IMPORT_PROFILE_COLUMNS}
+        }
+        for (user_id, _), r in zip(users, records)
+    ])
+
+
+def _insert_import_batch(db: Session, batch):
+    # batch: [(row_number, record)]; one transaction for the whole batch,
+    # falling back to row by row if someone else took an email meanwhile
+    try:
+        _insert_people(db, [record for _, record in batch])
+        db.commit()
+        return []
+    except IntegrityError:
+        db.rollback()
+
+    errors = []
+    for row_number, record in batch:
+        try:
+            _insert_people(db, [record])
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            errors.append({
+                "row": row_number,
+                "email": record["email"],
+                "error": "User already exists"
+            })
+    return errors
+
+
+async def _import_batch(db: Session, batch, errors):
+    existing = await run_db(
+        db, _existing_emails, [record["email"] for _, record in batch]
+    )
+
+    fresh = []
+    for row_number, record in batch:
+        if record["email"] in existing:
+            errors.append({
+                "row": row_number,
+                "email": record["email"],
+                "error": "User already exists"
+            })
+        else:
+            fresh.append((row_number, record))
+
+    if not fresh:
+        return 0
+
+    hashed = await hash_passwords_async(
+        [record["password"] for _, record in fresh]
+    )
+    for (_, record), password in zip(fresh, hashed):
+        record["password"] = password
+
+    failed = await run_db(db, _insert_import_batch, fresh)
+    errors.extend(failed)
+
+    return len(fresh) - len(failed)
+
+
+@router.post("/import", response_model=EmployeeImportResult)
+async def import_employees(
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_claims)
 ):
     if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Access denied")
 
-    employee = db.query(Employee).filter(
+    # Columns: email, password, role, full_name, department, designation,
+    # phone, address; only email and password are required
+    reader = await run_in_threadpool(_open_import_reader, file.file)
+
+    errors = []
+    seen = set()
+    total_rows = 0
+    created = 0
+
+    while True:
+        rows, read_error = await run_in_threadpool(_next_import_rows, reader)
+        if read_error and not total_rows:
+            raise HTTPException(status_code=400, detail=read_error)
+        total_rows += len(rows)
+
+        batch = []
+        for row_number, row in rows:
+            record, error = _clean_import_row(row)
+            if record and record["email"] in seen:
+                error = "Duplicate email in file"
+            if error:
+                errors.append({
+                    "row": row_number,
+                    "email": (row.get("email") or "").strip() or None,
+                    "error": error
+                })
+                continue
+
+            seen.add(record["email"])
+            batch.append((row_number, record))
+
+        if batch:
+            created += await _import_batch(db, batch, errors)
+
+        # Earlier batches are already committed, so a bad line halfway
+        # through ends the import and is reported like any other row
+        if read_error:
+            errors.append({
+                "row": reader.line_num,
+                "email": None,
+                "error": read_error
+            })
+            break
+        if len(rows) < IMPORT_BATCH_SIZE:
+            break
+
+    errors.sort(key=lambda error: error["row"])
+
+    return {
+        "total_rows": total_rows,
+        "created": created,
+        "failed": len(errors),
+        "errors": errors
+    }
+
+
+def _employee_by_id(db: Session, employee_id: int):
+    return db.query(Employee).filter(
         Employee.id == employee_id
     ).first()
 
+
+@router.get("/{employee_id}", response_model=EmployeeOut)
+async def get_employee_by_id(
+    employee_id: int,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_claims)
+):
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Access denied")
+
+    employee = await run_db(db, _employee_by_id, employee_id)
+
     if not employee:
         raise HTTPException(status_code=404, detail="Employee not found")
 
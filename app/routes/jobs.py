@@ -0,0 +1,382 @@
+import os
+import uuid
+from datetime import date, timedelta
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import FileResponse
+from sqlalchemy.orm import Session
+
+from app.auth.dependencies import get_current_claims
+from app.auth.principal import Principal
+from app.config import settings
+from app.database.session import get_db, run_db
+from app.models.job import Job
+from app.routes.attendance import (
+    ATTENDANCE_EXPORT_HEADER,
+    attendance_export_merge,
+    attendance_export_query,
+)
+from app.routes.payroll import (
+    PAYROLL_EXPORT_HEADER,
+    payroll_export_filename,
+    payroll_export_query,
+    run_payroll_batch,
+)
+from app.schemas.job import JobOut
+from app.utils.attendance_archive import (
+    archive_attendance,
+    count_archived_attendance,
+)
+from app.utils.attendance_rollup import rebuild_attendance_rollups
+from app.utils.export import iter_csv
+from app.utils.jobs import JobQueueFull, job_runner
+from app.utils.leave_balance import recompute_leave_balances
+
+router = APIRouter(prefix="/jobs", tags=["Jobs"])
+
+
+# -------------------------
+# JOB HANDLERS
+# -------------------------
+# Each one runs in a job worker thread with its own session; all of them
+# can safely start over after an interruption.
+def _payroll_batch_job(db: Session, params: dict, progress):
+    return run_payroll_batch(
+        db,
+        params["month"],
+        params["year"],
+        params["base_salary"],
+        params.get("department"),
+        params.get("overwrite", False)
+    )
+
+
+def _rebuild_rollups_job(db: Session, params: dict, progress):
+    count = rebuild_attendance_rollups(db, params.get("year"), params.get("month"))
+    db.commit()
+    return {"rollups": count}
+
+
+def _recompute_balances_job(db: Session, params: dict, progress):
+    count = recompute_leave_balances(db, params.get("year"))
+    db.commit()
+    return {"balances": count}
+
+
+def _archive_attendance_job(db: Session, params: dict, progress):
+    months, rows = archive_attendance(
+        db,
+        date.fromisoformat(params["before"]),
+        on_month=lambda done, total: progress(done * 100 // total)
+    )
+    return {"months": months, "rows": rows}
+
+
+def _export_source(params: dict):
+    # (build_query, merge, count_archived, header, filename)
+    if params["kind"] == "payroll":
+        return (
+            payroll_export_query(
+                params.get("month"), params.get("year"), params.get("department")
+            ),
+            None,
+            None,
+            PAYROLL_EXPORT_HEADER,
+            payroll_export_filename(params.get("month"), params.get("year"))
+        )
+
+    start_date = params.get("start_date")
+    start_date = start_date and date.fromisoformat(start_date)
+    end_date = params.get("end_date")
+    end_date = end_date and date.fromisoformat(end_date)
+    department = params.get("department")
+
+    return (
+        attendance_export_query(start_date, end_date, department),
+        attendance_export_merge(start_date, end_date, department),
+        lambda db: count_archived_attendance(db, start_date, end_date, department),
+        ATTENDANCE_EXPORT_HEADER,
+        "attendance.csv"
+    )
+
+
+def _export_job(db: Session, params: dict, progress):
+    # Same CSV as the streaming endpoints, written to DAYFLOW_EXPORT_DIR
+    build_query, merge, count_archived, header, filename = _export_source(params)
+    gzip = params.get("gzip", False)
+    if gzip:
+        filename += ".gz"
+
+    total = build_query(db).order_by(None).count()
+    if count_archived:
+        total += count_archived(db)
+    db.rollback()
+
+    reported = -1
+    written = 0
+
+    def on_rows(rows):
+        nonlocal reported, written
+        written = rows
+        percent = min(100, rows * 100 // total) if total else 100
+        if percent != reported:
+            reported = percent
+            progress(percent)
+
+    os.makedirs(settings.export_dir, exist_ok=True)
+    stored = f"{uuid.uuid4().hex}-{filename}"
+    path = os.path.join(settings.export_dir, stored)
+
+    part = path + ".part"
+    try:
+        with open(part, "wb") as handle:
+            for chunk in iter_csv(build_query, header, gzip=gzip,
+                                  on_rows=on_rows, merge=merge):
+                handle.write(chunk)
+        os.replace(part, path)
+    finally:
+        # a failed or interrupted export leaves nothing behind
+        if os.path.exists(part):
+            os.remove(part)
+
+    return {
+        "file": stored,
+        "filename": filename,
+        "rows": written,
+        "bytes": os.path.getsize(path)
+    }
+
+
+def _remove_export_file(result: dict):
+    if result.get("file"):
+        try:
+            os.remove(os.path.join(settings.export_dir, result["file"]))
+        except FileNotFoundError:
+            pass
+
+
+job_runner.register("payroll_batch", _payroll_batch_job)
+job_runner.register("rebuild_rollups", _rebuild_rollups_job)
+job_runner.register("recompute_leave_balances", _recompute_balances_job)
+job_runner.register("archive_attendance", _archive_attendance_job)
+job_runner.register(
+    "export", _export_job,
+    expire=_remove_export_file,
+    expire_after=timedelta(days=settings.export_retention_days)
+)
+
+
+# -------------------------
+# ENQUEUE (ADMIN)
+# -------------------------
+async def _enqueue(db: Session, response: Response, current_user: Principal,
+                   job_type: str, params: dict):
+    try:
+        job = await run_db(
+            db, job_runner.enqueue, job_type, params, current_user.id
+        )
+    except JobQueueFull:
+        raise HTTPException(
+            status_code=503,
+            detail="Too many background jobs, please retry later",
+            headers={"Retry-After": "30"}
+        )
+
+    response.headers["Location"] = f"/jobs/{job.id}"
+    return job
+
+
+@router.post("/payroll-batch", response_model=JobOut, status_code=202)
+async def enqueue_payroll_batch(
+    response: Response,
+    month: int,
+    year: int,
+    base_salary: float,
+    department: Optional[str] = Query(None),
+    overwrite: bool = Query(False),
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_claims)
+):
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Access denied")
+
+    return await _enqueue(db, response, current_user, "payroll_batch", {
+        "month": month,
+        "year": year,
+        "base_salary": base_salary,
+        "department": department,
+        "overwrite": overwrite
+    })
+
+
+@router.post("/rebuild-rollups", response_model=JobOut, status_code=202)
+async def enqueue_rebuild_rollups(
+    response: Response,
+    year: Optional[int] = Query(None),
+    month: Optional[int] = Query(None),
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_claims)
+):
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Access denied")
+
+    return await _enqueue(db, response, current_user, "rebuild_rollups", {
+        "year": year,
+        "month": month
+    })
+
+
+@router.post("/recompute-leave-balances", response_model=JobOut, status_code=202)
+async def enqueue_recompute_leave_balances(
+    response: Response,
+    year: Optional[int] = Query(None),
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_claims)
+):
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Access denied")
+
+    return await _enqueue(
+        db, response, current_user, "recompute_leave_balances", {"year": year}
+    )
+
+
+@router.post("/archive-attendance", response_model=JobOut, status_code=202)
+async def enqueue_archive_attendance(
+    response: Response,
+    before: Optional[date] = Query(None),
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_claims)
+):
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Access denied")
+
+    # Only whole months before `before` (default: the current month)
+    before = before or date.today()
+    if (before.year, before.month) > (date.today().year, date.today().month):
+        raise HTTPException(
+            status_code=400,
+            detail="Cannot archive the current month or later"
+        )
+
+    return await _enqueue(db, response, current_user, "archive_attendance", {
+        "before": before.isoformat()
+    })
+
+
+@router.post("/export/payroll", response_model=JobOut, status_code=202)
+async def enqueue_payroll_export(
+    response: Response,
+    month: Optional[int] = Query(None),
+    year: Optional[int] = Query(None),
+    department: Optional[str] = Query(None),
+    gzip: bool = Query(False),
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_claims)
+):
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Access denied")
+
+    return await _enqueue(db, response, current_user, "export", {
+        "kind": "payroll",
+        "month": month,
+        "year": year,
+        "department": department,
+        "gzip": gzip
+    })
+
+
+@router.post("/export/attendance", response_model=JobOut, status_code=202)
+async def enqueue_attendance_export(
+    response: Response,
+    start_date: Optional[date] = Query(None),
+    end_date: Optional[date] = Query(None),
+    department: Optional[str] = Query(None),
+    gzip: bool = Query(False),
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_claims)
+):
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Access denied")
+
+    return await _enqueue(db, response, current_user, "export", {
+        "kind": "attendance",
+        "start_date": start_date and start_date.isoformat(),
+        "end_date": end_date and end_date.isoformat(),
+        "department": department,
+        "gzip": gzip
+    })
+
+
+# -------------------------
+# STATUS (ADMIN)
+# -------------------------
+def _recent_jobs(db: Session, status: Optional[str], limit: int):
+    query = db.query(Job)
+    if status:
+        query = query.filter(Job.status == status)
+    return query.order_by(Job.id.desc()).limit(limit).all()
+
+
+@router.get("", response_model=List[JobOut])
+async def list_jobs(
+    status: Optional[str] = Query(None),
+    limit: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_claims)
+):
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Access denied")
+
+    return await run_db(db, _recent_jobs, status, limit)
+
+
+def _job_by_id(db: Session, job_id: int):
+    return db.get(Job, job_id)
+
+
+async def _get_job(db: Session, job_id: int):
+    job = await run_db(db, _job_by_id, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.get("/{job_id}", response_model=JobOut)
+async def get_job(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_claims)
+):
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Access denied")
+
+    return await _get_job(db, job_id)
+
+
+@router.get("/{job_id}/download")
+async def download_job_file(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_claims)
+):
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Access denied")
+
+    job = await _get_job(db, job_id)
+    if job.job_type == "export" and job.status == "expired":
+        raise HTTPException(status_code=410, detail="Export file has expired")
+    if job.job_type != "export" or job.status != "succeeded":
+        raise HTTPException(status_code=409, detail="Job has no file to download")
+
+    path = os.path.join(settings.export_dir, job.result["file"])
+    if not os.path.exists(path):
+        raise HTTPException(status_code=410, detail="Export file no longer exists")
+
+    filename = job.result["filename"]
+    return FileResponse(
+        path,
+        filename=filename,
+        media_type="application/gzip" if filename.endswith(".gz") else "text/csv"
+    )
@@ -1,55 +1,73 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import update
 from sqlalchemy.orm import Session
+from datetime import date
+from typing import List, Optional, Union
 
-from app.database.db import SessionLocal
+from app.database.session import get_db, run_db
 from app.models.leave import LeaveRequest
 from app.models.employee import Employee
-from app.models.user import User
-from app.auth.dependencies import get_current_user
-from app.schemas.leave import LeaveApplyRequest
+from app.auth.dependencies import get_current_user, get_current_claims
+from app.auth.principal import Principal
+from app.schemas.common import Page
+from app.schemas.leave import (
+    LeaveAbsence,
+    LeaveActionResponse,
+    LeaveApplyRequest,
+    LeaveBalanceResponse,
+    LeaveBulkDecisionRequest,
+    LeaveBulkDecisionResponse,
+    LeaveOut,
+)
+from app.utils.leave_balance import (
+    InsufficientLeaveBalance,
+    canonical_leave_type,
+    get_leave_balances,
+    reserve_leave_days,
+    settle_leave_batch,
+    settle_leave_days,
+)
+from app.utils.leave_index import (
+    LeaveOverlapError,
+    check_leave_overlap,
+    leave_index,
+)
+from app.utils.pagination import paginate, schema_columns
+from app.utils.record_versions import (
+    bump_record_version,
+    bump_record_versions,
+    conditional_get,
+)
 
 router = APIRouter(prefix="/leaves", tags=["Leaves"])
 
+LEAVE_COLUMNS = schema_columns(LeaveRequest, LeaveOut)
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+
+def get_or_create_employee_id(db: Session, current_user: Principal):
+    if current_user.employee_id is not None:
+        return current_user.employee_id
+
+    employee = Employee(
+        user_id=current_user.id,
+        full_name=current_user.email.split("@")[0]
+    )
+    db.add(employee)
+    db.commit()
+    db.refresh(employee)
+
+    return employee.id
 
 
 # ---------------------------
 # APPLY LEAVE (EMPLOYEE)
 # ---------------------------
-@router.post("/apply")
-def apply_leave(
-    payload: LeaveApplyRequest,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
-):
+def _apply_leave(db: Session, current_user: Principal, payload: LeaveApplyRequest):
     # 🔑 AUTO-CREATE EMPLOYEE PROFILE
-    employee = db.query(Employee).filter(
-        Employee.user_id == current_user.id
-    ).first()
-
-    if not employee:
-        employee = Employee(
-            user_id=current_user.id,
-            name=current_user.email.split("@")[0]
-        )
-        db.add(employee)
-        db.commit()
-        db.refresh(employee)
-
-    if payload.start_date > payload.end_date:
-        raise HTTPException(
-            status_code=400,
-            detail="Start date cannot be after end date"
-        )
+    employee_id = get_or_create_employee_id(db, current_user)
 
     leave = LeaveRequest(
-        employee_id=employee.id,
+        employee_id=employee_id,
         leave_type=payload.leave_type,
         start_date=payload.start_date,
         end_date=payload.end_date,
@@ -57,9 +75,34 @@ def apply_leave(
         status="Pending"
     )
 
-    db.add(leave)
-    db.commit()
-    db.refresh(leave)
+    # Bumping the version first locks this employee's leaves row, so two
+    # workers applying at once check for overlaps one after the other
+    try:
+        bump_record_version(db, employee_id, "leaves")
+        check_leave_overlap(
+            db, employee_id, payload.start_date, payload.end_date
+        )
+        reserve_leave_days(
+            db, employee_id, payload.leave_type,
+            payload.start_date, payload.end_date
+        )
+        db.add(leave)
+        db.commit()
+        db.refresh(leave)
+    except LeaveOverlapError as exc:
+        db.rollback()
+        raise HTTPException(
+            status_code=400,
+            detail=f"Leave overlaps existing requests: {exc.leave_ids}"
+        )
+    except InsufficientLeaveBalance as exc:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=str(exc))
+
+    leave_index.record(
+        leave.id, employee_id, leave.leave_type,
+        leave.start_date, leave.end_date, leave.status
+    )
 
     return {
         "message": "Leave request submitted",
@@ -68,18 +111,88 @@ def apply_leave(
     }
 
 
+@router.post("/apply", response_model=LeaveActionResponse)
+async def apply_leave(
+    payload: LeaveApplyRequest,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    if payload.start_date > payload.end_date:
+        raise HTTPException(
+            status_code=400,
+            detail="Start date cannot be after end date"
+        )
+
+    leave_type = canonical_leave_type(payload.leave_type)
+    if leave_type is None:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown leave type: {payload.leave_type}"
+        )
+    payload.leave_type = leave_type
+
+    return await run_db(db, _apply_leave, current_user, payload)
+
+
 # ---------------------------
-# ADMIN APPROVE LEAVE
+# WHO IS OUT (ADMIN)
 # ---------------------------
-@router.put("/{leave_id}/approve")
-def approve_leave(
-    leave_id: int,
+def _who_is_out(db: Session, start_date: date, end_date: date,
+                department: Optional[str]):
+    leave_index.ensure_current(db)
+    entries = leave_index.out_between(start_date, end_date)
+    if not entries:
+        return []
+
+    query = db.query(
+        Employee.id, Employee.full_name, Employee.department
+    ).filter(Employee.id.in_({entry.employee_id for entry in entries}))
+    if department:
+        query = query.filter(Employee.department == department)
+    employees = {row.id: row for row in query}
+
+    out = [
+        {
+            "leave_id": entry.leave_id,
+            "employee_id": entry.employee_id,
+            "full_name": employees[entry.employee_id].full_name,
+            "department": employees[entry.employee_id].department,
+            "leave_type": entry.leave_type,
+            "start_date": entry.start_date,
+            "end_date": entry.end_date
+        }
+        for entry in entries
+        if entry.employee_id in employees
+    ]
+    out.sort(key=lambda item: (item["start_date"], item["leave_id"]))
+
+    return out
+
+
+@router.get("/out", response_model=List[LeaveAbsence])
+async def get_who_is_out(
+    start_date: date = Query(..., alias="from"),
+    end_date: date = Query(..., alias="to"),
+    department: Optional[str] = Query(None),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_claims)
 ):
     if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Access denied")
 
+    if start_date > end_date:
+        raise HTTPException(
+            status_code=400,
+            detail="Start date cannot be after end date"
+        )
+
+    return await run_db(db, _who_is_out, start_date, end_date, department)
+
+
+# ---------------------------
+# ADMIN APPROVE / REJECT LEAVE
+# ---------------------------
+def _decide_leave(db: Session, leave_id: int, new_status: str):
     leave = db.query(LeaveRequest).filter(
         LeaveRequest.id == leave_id
     ).first()
@@ -93,91 +206,200 @@ def approve_leave(
             detail=f"Leave already {leave.status}"
         )
 
-    leave.status = "Approved"
+    # only the first decision wins; the ledger moves in the same transaction
+    updated = db.query(LeaveRequest).filter(
+        LeaveRequest.id == leave_id,
+        LeaveRequest.status == "Pending"
+    ).update({LeaveRequest.status: new_status}, synchronize_session=False)
+
+    if not updated:
+        db.rollback()
+        raise HTTPException(status_code=400, detail="Leave already decided")
+
+    settle_leave_days(
+        db, leave.employee_id, leave.leave_type,
+        leave.start_date, leave.end_date, new_status
+    )
+    bump_record_version(db, leave.employee_id, "leaves")
     db.commit()
     db.refresh(leave)
 
+    leave_index.record(
+        leave.id, leave.employee_id, leave.leave_type,
+        leave.start_date, leave.end_date, leave.status
+    )
+
     return {
-        "message": "Leave approved",
+        "message": f"Leave {new_status.lower()}",
         "leave_id": leave.id,
         "status": leave.status
     }
 
 
-# ---------------------------
-# ADMIN REJECT LEAVE
-# ---------------------------
-@router.put("/{leave_id}/reject")
-def reject_leave(
+@router.put("/{leave_id}/approve", response_model=LeaveActionResponse)
+async def approve_leave(
     leave_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_claims)
 ):
     if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Access denied")
 
-    leave = db.query(LeaveRequest).filter(
-        LeaveRequest.id == leave_id
-    ).first()
+    return await run_db(db, _decide_leave, leave_id, "Approved")
 
-    if not leave:
-        raise HTTPException(status_code=404, detail="Leave request not found")
 
-    if leave.status != "Pending":
-        raise HTTPException(
-            status_code=400,
-            detail=f"Leave already {leave.status}"
+@router.put("/{leave_id}/reject", response_model=LeaveActionResponse)
+async def reject_leave(
+    leave_id: int,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_claims)
+):
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Access denied")
+
+    return await run_db(db, _decide_leave, leave_id, "Rejected")
+
+
+# ---------------------------
+# ADMIN BULK APPROVE / REJECT
+# ---------------------------
+BULK_ACTIONS = {"approve": "Approved", "reject": "Rejected"}
+
+
+def _decide_leaves(db: Session, leave_ids, new_status: str):
+    # Same rules as one-by-one decisions, in a single set-based UPDATE
+    leave_ids = list(dict.fromkeys(leave_ids))
+
+    decided = db.execute(
+        update(LeaveRequest).where(
+            LeaveRequest.id.in_(leave_ids),
+            LeaveRequest.status == "Pending"
+        ).values(status=new_status).returning(
+            LeaveRequest.id,
+            LeaveRequest.employee_id,
+            LeaveRequest.leave_type,
+            LeaveRequest.start_date,
+            LeaveRequest.end_date
         )
+    ).all()
+
+    settle_leave_batch(db, [row[1:] for row in decided], new_status)
+    bump_record_versions(db, {row.employee_id for row in decided}, "leaves")
+
+    applied = {row.id for row in decided}
+    missing = [leave_id for leave_id in leave_ids if leave_id not in applied]
+    current = dict(
+        db.query(LeaveRequest.id, LeaveRequest.status).filter(
+            LeaveRequest.id.in_(missing)
+        ).all()
+    ) if missing else {}
 
-    leave.status = "Rejected"
     db.commit()
-    db.refresh(leave)
+
+    for row in decided:
+        leave_index.record(*row, new_status)
+
+    results = []
+    for leave_id in leave_ids:
+        if leave_id in applied:
+            result = "applied"
+        elif leave_id in current:
+            result = f"already_{(current[leave_id] or 'decided').lower()}"
+        else:
+            result = "not_found"
+        results.append({"leave_id": leave_id, "result": result})
 
     return {
-        "message": "Leave rejected",
-        "leave_id": leave.id,
-        "status": leave.status
+        "status": new_status,
+        "applied": len(applied),
+        "results": results
     }
 
 
+@router.post("/bulk", response_model=LeaveBulkDecisionResponse)
+async def decide_leaves_bulk(
+    payload: LeaveBulkDecisionRequest,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_claims)
+):
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Access denied")
+
+    return await run_db(
+        db, _decide_leaves, payload.leave_ids, BULK_ACTIONS[payload.action]
+    )
+
+
 # ---------------------------
 # EMPLOYEE VIEW OWN LEAVES
 # ---------------------------
-@router.get("/me")
-def get_my_leaves(
+def _my_leaves(db: Session, current_user: Principal):
+    # 🔑 AUTO-CREATE EMPLOYEE PROFILE
+    employee_id = get_or_create_employee_id(db, current_user)
+
+    return db.query(*LEAVE_COLUMNS).filter(
+        LeaveRequest.employee_id == employee_id
+    ).all()
+
+
+@router.get("/me", response_model=List[LeaveOut])
+async def get_my_leaves(
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
-    # 🔑 AUTO-CREATE EMPLOYEE PROFILE
-    employee = db.query(Employee).filter(
-        Employee.user_id == current_user.id
-    ).first()
+    return await conditional_get(
+        db, request, response, "leaves", current_user.employee_id,
+        _my_leaves, current_user
+    )
 
-    if not employee:
-        employee = Employee(
-            user_id=current_user.id,
-            name=current_user.email.split("@")[0]
-        )
-        db.add(employee)
-        db.commit()
-        db.refresh(employee)
 
-    leaves = db.query(LeaveRequest).filter(
-        LeaveRequest.employee_id == employee.id
-    ).all()
+# ---------------------------
+# EMPLOYEE LEAVE BALANCE
+# ---------------------------
+def _my_balance(db: Session, current_user: Principal, year: int):
+    employee_id = get_or_create_employee_id(db, current_user)
+
+    return {
+        "year": year,
+        "balances": get_leave_balances(db, employee_id, year)
+    }
 
-    return leaves
+
+@router.get("/me/balance", response_model=LeaveBalanceResponse)
+async def get_my_leave_balance(
+    year: Optional[int] = Query(None),
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    return await run_db(
+        db, _my_balance, current_user, year or date.today().year
+    )
 
 
 # ---------------------------
 # ADMIN VIEW ALL LEAVES
 # ---------------------------
-@router.get("/all")
-def get_all_leaves(
+@router.get(
+    "/all",
+    response_model=Union[List[LeaveOut], Page[LeaveOut]]
+)
+async def get_all_leaves(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_claims),
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: Optional[str] = Query(None),
+    stream: bool = Query(False),
 ):
     if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Access denied")
 
-    return db.query(LeaveRequest).all()
+    return await paginate(
+        db,
+        lambda session: session.query(*LEAVE_COLUMNS),
+        [LeaveRequest.start_date, LeaveRequest.id],
+        limit=limit,
+        cursor=cursor,
+        stream=stream
+    )
@@ -0,0 +1,23 @@
+import secrets
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import PlainTextResponse
+
+from app.utils.metrics import metrics
+
+router = APIRouter(tags=["Metrics"])
+
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def get_metrics(request: Request):
+    # Prometheus scrapes without a user login, so a shared token keeps the
+    # endpoint private; create_app only mounts it when one is configured
+    token = request.app.state.settings.metrics_token
+    supplied = request.headers.get("authorization", "")
+    if not token or not secrets.compare_digest(supplied, f"Bearer {token}"):
+        raise HTTPException(status_code=403, detail="Access denied")
+
+    return PlainTextResponse(
+        metrics.render(),
+        media_type="text/plain; version=0.0.4"
+    )
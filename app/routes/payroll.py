@@ -1,38 +1,44 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, insert, update
+from typing import List, Optional, Union
 
-from app.database.db import SessionLocal
+from app.database.session import get_db, run_db
 from app.models.payroll import Payroll
 from app.models.employee import Employee
-from app.models.attendance import Attendance
-from app.models.user import User
-from app.auth.dependencies import get_current_user
+from app.models.attendance_monthly import AttendanceMonthly
+from app.auth.dependencies import get_current_user, get_current_claims
+from app.auth.principal import Principal
+from app.utils.attendance_rollup import get_attendance_rollup
+from app.utils.export import csv_response
+from app.schemas.common import Page
+from app.schemas.payroll import (
+    PayrollBatchSummary,
+    PayrollGenerated,
+    PayrollOut,
+    PayrollSimulation,
+    PayrollSimulationRequest,
+)
+from app.utils.pagination import paginate, schema_columns
+from app.utils.payroll_simulation import simulate_payroll
+from app.utils.record_versions import (
+    bump_record_version,
+    bump_record_versions,
+    conditional_get,
+)
 
 router = APIRouter(prefix="/payroll", tags=["Payroll"])
 
+PAYROLL_COLUMNS = schema_columns(Payroll, PayrollOut)
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
 
-
-@router.post("/generate")
-def generate_payroll(
+def _generate_payroll(
+    db: Session,
     employee_id: int,
     month: int,
     year: int,
-    base_salary: float,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    base_salary: float
 ):
-    # 🔐 Admin only
-    if current_user.role != "admin":
-        raise HTTPException(status_code=403, detail="Access denied")
-
     employee = db.query(Employee).filter(
         Employee.id == employee_id
     ).first()
@@ -40,17 +46,25 @@ def generate_payroll(
     if not employee:
         raise HTTPException(status_code=404, detail="Employee not found")
 
-    records = db.query(Attendance).filter(
-        Attendance.employee_id == employee_id,
-        func.strftime("%m", Attendance.attendance_date) == f"{month:02d}",
-        func.strftime("%Y", Attendance.attendance_date) == str(year)
-    ).all()
+    existing = db.query(Payroll.id).filter(
+        Payroll.employee_id == employee_id,
+        Payroll.year == year,
+        Payroll.month == month
+    ).first()
+
+    if existing:
+        raise HTTPException(
+            status_code=400,
+            detail="Payroll already generated for this month"
+        )
 
-    if not records:
+    rollup = get_attendance_rollup(db, employee_id, year, month)
+
+    if not rollup or not rollup.total_days:
         raise HTTPException(status_code=400, detail="No attendance records found")
 
-    total_days = len(records)
-    present_days = len([r for r in records if r.check_in is not None])
+    total_days = rollup.total_days
+    present_days = rollup.present_days
 
     salary_amount = round(
         (present_days / total_days) * base_salary, 2
@@ -65,6 +79,7 @@ def generate_payroll(
     )
 
     db.add(payroll)
+    bump_record_version(db, employee_id, "payroll")
     db.commit()
     db.refresh(payroll)
 
@@ -76,26 +91,169 @@ def generate_payroll(
         "salary_amount": salary_amount,
         "status": payroll.status
     }
-from typing import Optional
-from fastapi import Query
 
 
-@router.get("/me")
-def get_my_payroll(
+@router.post("/generate", response_model=PayrollGenerated)
+async def generate_payroll(
+    employee_id: int,
+    month: int,
+    year: int,
+    base_salary: float,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
-    month: Optional[int] = Query(None),
-    year: Optional[int] = Query(None),
+    current_user: Principal = Depends(get_current_claims)
 ):
-    employee = db.query(Employee).filter(
-        Employee.user_id == current_user.id
-    ).first()
+    # 🔐 Admin only
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Access denied")
 
-    if not employee:
-        raise HTTPException(status_code=404, detail="Employee profile not found")
+    return await run_db(
+        db, _generate_payroll, employee_id, month, year, base_salary
+    )
 
-    query = db.query(Payroll).filter(
-        Payroll.employee_id == employee.id
+
+def run_payroll_batch(
+    db: Session,
+    month: int,
+    year: int,
+    base_salary: float,
+    department: Optional[str] = None,
+    overwrite: bool = False
+):
+    # One pass over the monthly rollups: total and present days per employee
+    stats_query = db.query(
+        AttendanceMonthly.employee_id,
+        AttendanceMonthly.total_days,
+        AttendanceMonthly.present_days
+    ).join(
+        Employee, Employee.id == AttendanceMonthly.employee_id
+    ).filter(
+        AttendanceMonthly.year == year,
+        AttendanceMonthly.month == month,
+        AttendanceMonthly.total_days > 0
+    )
+
+    employee_query = db.query(func.count(Employee.id))
+
+    if department:
+        stats_query = stats_query.filter(Employee.department == department)
+        employee_query = employee_query.filter(Employee.department == department)
+
+    stats = stats_query.all()
+
+    existing = {
+        employee_id: (payroll_id, status)
+        for employee_id, payroll_id, status in db.query(
+            Payroll.employee_id, Payroll.id, Payroll.status
+        ).filter(
+            Payroll.month == month,
+            Payroll.year == year
+        ).all()
+    }
+
+    new_rows = []
+    updated_rows = []
+    changed = []
+    skipped_existing = 0
+    skipped_paid = 0
+
+    for employee_id, total_days, present_days in stats:
+        salary_amount = round(
+            (present_days / total_days) * base_salary, 2
+        )
+
+        if employee_id in existing:
+            payroll_id, payroll_status = existing[employee_id]
+
+            # Never overwrite a payroll that has already been paid out
+            if payroll_status == "Paid":
+                skipped_paid += 1
+            elif not overwrite:
+                skipped_existing += 1
+            else:
+                updated_rows.append({
+                    "id": payroll_id,
+                    "present_days": present_days,
+                    "salary_amount": salary_amount,
+                    "status": "Generated"
+                })
+                changed.append(employee_id)
+            continue
+
+        new_rows.append({
+            "employee_id": employee_id,
+            "month": month,
+            "year": year,
+            "present_days": present_days,
+            "salary_amount": salary_amount,
+            "status": "Generated"
+        })
+        changed.append(employee_id)
+
+    # Single transaction for the whole run
+    if new_rows:
+        db.execute(insert(Payroll), new_rows)
+    if updated_rows:
+        db.execute(update(Payroll), updated_rows)
+    bump_record_versions(db, changed, "payroll")
+    db.commit()
+
+    return {
+        "month": month,
+        "year": year,
+        "department": department,
+        "employees_with_attendance": len(stats),
+        "skipped_no_attendance": employee_query.scalar() - len(stats),
+        "created": len(new_rows),
+        "updated": len(updated_rows),
+        "skipped_existing": skipped_existing,
+        "skipped_paid": skipped_paid
+    }
+
+
+@router.post("/generate/batch", response_model=PayrollBatchSummary)
+async def generate_payroll_batch(
+    month: int,
+    year: int,
+    base_salary: float,
+    department: Optional[str] = Query(None),
+    overwrite: bool = Query(False),
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_claims)
+):
+    # 🔐 Admin only
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Access denied")
+
+    return await run_db(
+        db, run_payroll_batch, month, year, base_salary, department, overwrite
+    )
+
+
+# -------------------------
+# WHAT-IF SIMULATION (ADMIN)
+# -------------------------
+@router.post("/simulate", response_model=PayrollSimulation)
+async def simulate_payroll_rules(
+    payload: PayrollSimulationRequest,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_claims)
+):
+    # 🔐 Admin only
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Access denied")
+
+    # nothing is persisted, so the read engine can serve it
+    db.info["read_only"] = True
+
+    return await run_db(
+        db, simulate_payroll, payload.year, payload.month,
+        payload.scenarios, payload.department
+    )
+
+
+def _my_payroll(db: Session, employee_id: int, month, year):
+    query = db.query(*PAYROLL_COLUMNS).filter(
+        Payroll.employee_id == employee_id
     )
 
     if month:
@@ -104,24 +262,125 @@ def get_my_payroll(
         query = query.filter(Payroll.year == year)
 
     return query.order_by(Payroll.year.desc(), Payroll.month.desc()).all()
-@router.get("/all")
-def get_all_payrolls(
+
+
+@router.get("/me", response_model=List[PayrollOut])
+async def get_my_payroll(
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
+    month: Optional[int] = Query(None),
+    year: Optional[int] = Query(None),
+):
+    employee_id = current_user.employee_id
+
+    if employee_id is None:
+        raise HTTPException(status_code=404, detail="Employee profile not found")
+
+    return await conditional_get(
+        db, request, response, "payroll", employee_id,
+        _my_payroll, employee_id, month, year
+    )
+
+
+@router.get(
+    "/all",
+    response_model=Union[List[PayrollOut], Page[PayrollOut]]
+)
+async def get_all_payrolls(
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_claims),
     employee_id: Optional[int] = Query(None),
     month: Optional[int] = Query(None),
     year: Optional[int] = Query(None),
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: Optional[str] = Query(None),
+    stream: bool = Query(False),
 ):
     if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Access denied")
 
-    query = db.query(Payroll)
+    def build_query(session: Session):
+        query = session.query(*PAYROLL_COLUMNS)
 
-    if employee_id:
-        query = query.filter(Payroll.employee_id == employee_id)
-    if month:
-        query = query.filter(Payroll.month == month)
+        if employee_id:
+            query = query.filter(Payroll.employee_id == employee_id)
+        if month:
+            query = query.filter(Payroll.month == month)
+        if year:
+            query = query.filter(Payroll.year == year)
+
+        return query
+
+    return await paginate(
+        db,
+        build_query,
+        [Payroll.year, Payroll.month, Payroll.id],
+        limit=limit,
+        cursor=cursor,
+        stream=stream
+    )
+
+
+# -------------------------
+# CSV EXPORT (ADMIN)
+# -------------------------
+PAYROLL_EXPORT_HEADER = [
+    "payroll_id", "employee_id", "full_name", "department",
+    "year", "month", "present_days", "salary_amount", "status"
+]
+
+
+def payroll_export_query(month=None, year=None, department=None):
+    def build_query(session: Session):
+        query = session.query(
+            Payroll.id,
+            Payroll.employee_id,
+            Employee.full_name,
+            Employee.department,
+            Payroll.year,
+            Payroll.month,
+            Payroll.present_days,
+            Payroll.salary_amount,
+            Payroll.status
+        ).join(Employee, Employee.id == Payroll.employee_id)
+
+        if month:
+            query = query.filter(Payroll.month == month)
+        if year:
+            query = query.filter(Payroll.year == year)
+        if department:
+            query = query.filter(Employee.department == department)
+
+        return query.order_by(Payroll.year, Payroll.month, Payroll.employee_id)
+
+    return build_query
+
+
+def payroll_export_filename(month=None, year=None):
+    filename = "payroll"
     if year:
-        query = query.filter(Payroll.year == year)
+        filename += f"-{year}"
+        if month:
+            filename += f"-{month:02d}"
+    return filename + ".csv"
 
-    return query.order_by(Payroll.year.desc(), Payroll.month.desc()).all()
+
+@router.get("/export")
+async def export_payrolls(
+    current_user: Principal = Depends(get_current_claims),
+    month: Optional[int] = Query(None),
+    year: Optional[int] = Query(None),
+    department: Optional[str] = Query(None),
+    gzip: bool = Query(False),
+):
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Access denied")
+
+    return csv_response(
+        payroll_export_query(month, year, department),
+        PAYROLL_EXPORT_HEADER,
+        payroll_export_filename(month, year),
+        gzip=gzip
+    )
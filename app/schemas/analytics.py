@@ -0,0 +1,15 @@
+from pydantic import BaseModel
+from datetime import date
+from typing import List, Optional
+
+
+class PresenceMatrix(BaseModel):
+    # rows follow `departments`, columns follow `days`
+    start_date: date
+    end_date: date
+    days: List[date]
+    departments: List[str]
+    headcount: List[int]
+    present: List[List[int]]
+    presence_percentage: List[List[float]]
+    avg_work_minutes: List[List[Optional[float]]]
@@ -0,0 +1,33 @@
+from pydantic import BaseModel, ConfigDict
+from datetime import date, time
+from typing import Optional
+
+
+class AttendanceOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    employee_id: int
+    attendance_date: Optional[date] = None
+    check_in: Optional[time] = None
+    check_out: Optional[time] = None
+    work_hours: Optional[int] = None  # minutes
+
+
+class CheckInResponse(BaseModel):
+    message: str
+    check_in_time: time
+
+
+class CheckOutResponse(BaseModel):
+    message: str
+    check_out_time: time
+    work_minutes: int
+
+
+class AttendanceSummary(BaseModel):
+    month: int
+    year: int
+    total_working_days: int
+    present_days: int
+    attendance_percentage: float
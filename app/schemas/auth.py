@@ -10,3 +10,21 @@ class SignupRequest(BaseModel):
 class LoginRequest(BaseModel):
     email: str
     password: str
+
+
+class SignupResponse(BaseModel):
+    message: str
+    user_id: int
+    role: str
+
+
+class TokenResponse(BaseModel):
+    access_token: str
+    token_type: str
+    role: str
+
+
+class MeResponse(BaseModel):
+    id: int
+    email: str
+    role: str
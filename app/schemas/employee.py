@@ -0,0 +1,27 @@
+from pydantic import BaseModel, ConfigDict
+from typing import List, Optional
+
+
+class EmployeeOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    user_id: Optional[int] = None
+    full_name: str
+    department: Optional[str] = None
+    designation: Optional[str] = None
+    phone: Optional[str] = None
+    address: Optional[str] = None
+
+
+class EmployeeImportError(BaseModel):
+    row: int
+    email: Optional[str] = None
+    error: str
+
+
+class EmployeeImportResult(BaseModel):
+    total_rows: int
+    created: int
+    failed: int
+    errors: List[EmployeeImportError]
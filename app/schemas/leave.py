@@ -1,6 +1,6 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, Field
 from datetime import date
-from typing import Optional
+from typing import List, Literal, Optional
 
 
 class LeaveApplyRequest(BaseModel):
@@ -8,3 +8,61 @@ class LeaveApplyRequest(BaseModel):
     start_date: date
     end_date: date
     reason: Optional[str] = None
+
+
+class LeaveBulkDecisionRequest(BaseModel):
+    leave_ids: List[int] = Field(..., min_length=1, max_length=1000)
+    action: Literal["approve", "reject"]
+
+
+class LeaveOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    employee_id: int
+    leave_type: str
+    start_date: date
+    end_date: date
+    reason: Optional[str] = None
+    status: Optional[str] = None
+    applied_on: Optional[date] = None
+
+
+class LeaveActionResponse(BaseModel):
+    message: str
+    leave_id: int
+    status: str
+
+
+class LeaveAbsence(BaseModel):
+    leave_id: int
+    employee_id: int
+    full_name: str
+    department: Optional[str] = None
+    leave_type: str
+    start_date: date
+    end_date: date
+
+
+class LeaveBalanceOut(BaseModel):
+    leave_type: str
+    entitlement: Optional[int] = None  # None = unlimited
+    used_days: int
+    pending_days: int
+    available_days: Optional[int] = None
+
+
+class LeaveBalanceResponse(BaseModel):
+    year: int
+    balances: List[LeaveBalanceOut]
+
+
+class LeaveBulkResult(BaseModel):
+    leave_id: int
+    result: str  # applied / not_found / already_<status>
+
+
+class LeaveBulkDecisionResponse(BaseModel):
+    status: str
+    applied: int
+    results: List[LeaveBulkResult]
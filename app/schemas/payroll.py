@@ -0,0 +1,79 @@
+from pydantic import BaseModel, ConfigDict, Field, PositiveFloat
+from typing import Dict, List, Literal, Optional
+
+
+class PayrollOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    employee_id: int
+    month: int
+    year: int
+    present_days: int
+    salary_amount: float
+    status: Optional[str] = None
+
+
+class PayrollGenerated(BaseModel):
+    employee_id: int
+    month: int
+    year: int
+    present_days: int
+    salary_amount: float
+    status: Optional[str] = None
+
+
+class PayrollBatchSummary(BaseModel):
+    month: int
+    year: int
+    department: Optional[str] = None
+    employees_with_attendance: int
+    skipped_no_attendance: int
+    created: int
+    updated: int
+    skipped_existing: int
+    skipped_paid: int
+
+
+class PayrollRuleSet(BaseModel):
+    name: str = Field(..., min_length=1, max_length=64)
+    base_salary: PositiveFloat
+    # overrides base_salary for employees of these departments
+    department_base_salaries: Dict[str, PositiveFloat] = Field(default_factory=dict)
+    # approved leave of these types counts as present on weekdays
+    paid_leave_types: List[str] = Field(default_factory=list)
+    # days with fewer work minutes than this count as half days
+    half_day_minutes: Optional[int] = Field(None, ge=1, le=1440)
+    # "attendance" (as generate_payroll): days with an attendance row;
+    # "weekdays": every Monday-Friday of the month
+    working_days: Literal["attendance", "weekdays"] = "attendance"
+
+
+class PayrollSimulationRequest(BaseModel):
+    month: int = Field(..., ge=1, le=12)
+    year: int
+    department: Optional[str] = None
+    scenarios: List[PayrollRuleSet] = Field(..., min_length=1, max_length=10)
+
+
+class PayrollScenarioResult(BaseModel):
+    # per-employee lists follow PayrollSimulation.employee_ids
+    name: str
+    present_days: List[float]
+    working_days: List[int]
+    salary_amounts: List[float]
+    deltas: List[float]  # against current_amounts, missing payroll = 0
+    total: float
+    delta_total: float
+    employees_changed: int
+
+
+class PayrollSimulation(BaseModel):
+    month: int
+    year: int
+    department: Optional[str] = None
+    employee_ids: List[int]
+    departments: List[Optional[str]]
+    current_amounts: List[Optional[float]]  # None = no payroll generated yet
+    current_total: float
+    scenarios: List[PayrollScenarioResult]
@@ -0,0 +1,473 @@
+import threading
+from collections import OrderedDict
+from datetime import date, time, timedelta
+
+import numpy as np
+from sqlalchemy import delete, extract, func, insert, select, tuple_
+from sqlalchemy.orm import Session
+
+from app.models.attendance import Attendance
+from app.models.attendance_archive import AttendanceArchive
+from app.models.employee import Employee
+from app.utils.dates import month_range
+from app.utils.record_versions import bump_record_versions
+
+# One packed record per day with attendance, in day order. Times are
+# microseconds since midnight; NULL is stored as -1.
+RECORD = np.dtype([
+    ("id", "<i8"),
+    ("check_in", "<i8"),
+    ("check_out", "<i8"),
+    ("minutes", "<i4"),
+])
+NULL = -1
+
+_DAY_BITS = np.arange(31, dtype=np.int64)
+
+
+def _micros(value):
+    if value is None:
+        return NULL
+    seconds = (value.hour * 60 + value.minute) * 60 + value.second
+    return seconds * 1_000_000 + value.microsecond
+
+
+def _time(micros):
+    if micros < 0:
+        return None
+    seconds, microsecond = divmod(int(micros), 1_000_000)
+    minutes, second = divmod(seconds, 60)
+    hour, minute = divmod(minutes, 60)
+    return time(hour, minute, second, microsecond)
+
+
+# -------------------------
+# PACKING
+# -------------------------
+def pack_month(days):
+    # days: {day of month: (id, check_in, check_out, work_hours)}
+    day_bitmap = present_bitmap = present_days = work_minutes = 0
+    packed = []
+
+    for day in sorted(days):
+        record_id, check_in, check_out, work_hours = days[day]
+        bit = 1 << (day - 1)
+        day_bitmap |= bit
+        if check_in is not None:
+            present_bitmap |= bit
+            present_days += 1
+        work_minutes += work_hours or 0
+        packed.append((
+            record_id,
+            _micros(check_in),
+            _micros(check_out),
+            NULL if work_hours is None else work_hours
+        ))
+
+    return {
+        "day_bitmap": day_bitmap,
+        "present_bitmap": present_bitmap,
+        "present_days": present_days,
+        "total_days": len(packed),
+        "work_minutes": work_minutes,
+        "records": np.array(packed, dtype=RECORD).tobytes(),
+    }
+
+
+def unpack_month(day_bitmap: int, records: bytes):
+    # Inverse of pack_month
+    days = [day + 1 for day in range(31) if day_bitmap >> day & 1]
+    return {
+        day: (
+            int(record["id"]),
+            _time(record["check_in"]),
+            _time(record["check_out"]),
+            None if record["minutes"] < 0 else int(record["minutes"])
+        )
+        for day, record in zip(days, np.frombuffer(records, dtype=RECORD))
+    }
+
+
+# -------------------------
+# ARCHIVING
+# -------------------------
+def first_open_day(today=None):
+    # The current month is never archived: check-ins and check-outs still
+    # land in it
+    today = today or date.today()
+    return date(today.year, today.month, 1)
+
+
+def closed_months(db, before: date):
+    # Months that still have raw attendance and ended before `before`'s month
+    year_col = extract("year", Attendance.attendance_date)
+    month_col = extract("month", Attendance.attendance_date)
+
+    return [
+        (int(year), int(month))
+        for year, month in db.execute(
+            select(year_col, month_col).where(
+                Attendance.attendance_date < date(before.year, before.month, 1)
+            ).group_by(year_col, month_col).order_by(year_col, month_col)
+        )
+    ]
+
+
+def archive_month(db, year: int, month: int):
+    # Move one month of raw attendance into the archive, merged into any
+    # employee-month archived earlier (raw rows win). Runs in the caller's
+    # transaction; returns the number of raw rows moved.
+    start, end = month_range(year, month)
+    in_month = (
+        Attendance.attendance_date >= start,
+        Attendance.attendance_date < end
+    )
+
+    rows = db.execute(
+        select(
+            Attendance.employee_id,
+            Attendance.attendance_date,
+            Attendance.id,
+            Attendance.check_in,
+            Attendance.check_out,
+            Attendance.work_hours
+        ).where(*in_month)
+    ).all()
+    if not rows:
+        return 0
+
+    months = {}
+    for employee_id, day, *record in rows:
+        months.setdefault(employee_id, {})[day.day] = tuple(record)
+
+    period = (AttendanceArchive.year == year, AttendanceArchive.month == month)
+    replaced = []
+    for employee_id, day_bitmap, records in db.execute(
+        select(
+            AttendanceArchive.employee_id,
+            AttendanceArchive.day_bitmap,
+            AttendanceArchive.records
+        ).where(*period)
+    ):
+        if employee_id in months:
+            merged = unpack_month(day_bitmap, records)
+            merged.update(months[employee_id])
+            months[employee_id] = merged
+            replaced.append(employee_id)
+
+    if replaced:
+        db.execute(delete(AttendanceArchive).where(
+            *period, AttendanceArchive.employee_id.in_(replaced)
+        ))
+
+    db.execute(insert(AttendanceArchive), [
+        {"employee_id": employee_id, "year": year, "month": month,
+         **pack_month(days)}
+        for employee_id, days in sorted(months.items())
+    ])
+    db.execute(delete(Attendance).where(*in_month))
+
+    # The rows read the same afterwards, but from a different store
+    bump_record_versions(db, months, "attendance")
+
+    return len(rows)
+
+
+def archive_attendance(db, before: date, on_month=None):
+    # One transaction per month, so check-ins never queue behind more than
+    # a month of rows; on_month(done, total) reports progress
+    months = closed_months(db, min(before, first_open_day()))
+    moved = 0
+
+    for done, (year, month) in enumerate(months, 1):
+        moved += archive_month(db, year, month)
+        db.commit()
+        if on_month:
+            on_month(done, len(months))
+
+    return len(months), moved
+
+
+# -------------------------
+# READING
+# -------------------------
+def _connection(db):
+    # Core rows; the ORM result layer costs more than unpacking a month
+    return db.connection() if isinstance(db, Session) else db
+
+
+def max_archived_id(db):
+    # Highest attendance id packed into the archive
+    highest = 0
+    for (records,) in _connection(db).execute(select(AttendanceArchive.records)):
+        ids = np.frombuffer(records, dtype=RECORD)["id"]
+        if len(ids):
+            highest = max(highest, int(ids.max()))
+    return highest
+
+
+def _day_number(day):
+    return np.datetime64(day, "D").astype(np.int64)
+
+
+def _key(day_number, record_id):
+    # (attendance_date, id) as one sortable int64; ids stay below 2**40
+    return (day_number << 40) | record_id
+
+
+class ArchivedAttendance:
+    # Archive rows unpacked into parallel arrays, one entry per archived
+    # day, in archive row order then day order
+
+    def __init__(self, db, year=None, month=None, employee_id=None,
+                 department=None, with_employee=False):
+        columns = [
+            AttendanceArchive.employee_id,
+            AttendanceArchive.year,
+            AttendanceArchive.month,
+            AttendanceArchive.day_bitmap,
+            AttendanceArchive.records,
+        ]
+        if with_employee:
+            columns += [Employee.full_name, Employee.department]
+
+        query = select(*columns)
+        if with_employee or department:
+            query = query.join(
+                Employee, Employee.id == AttendanceArchive.employee_id
+            )
+        if year is not None:
+            query = query.where(AttendanceArchive.year == year)
+        if month is not None:
+            query = query.where(AttendanceArchive.month == month)
+        if employee_id is not None:
+            query = query.where(AttendanceArchive.employee_id == employee_id)
+        if department:
+            query = query.where(Employee.department == department)
+
+        rows = _connection(db).execute(query).all()
+
+        bitmaps = np.array([row[3] for row in rows], dtype=np.int64)
+        owner, day = np.nonzero((bitmaps[:, None] >> _DAY_BITS) & 1)
+        records = np.frombuffer(
+            b"".join(row[4] for row in rows), dtype=RECORD
+        )
+
+        month_starts = np.array(
+            [f"{row[1]:04d}-{row[2]:02d}" for row in rows],
+            dtype="datetime64[M]"
+        ).astype("datetime64[D]")
+
+        self.owner = owner
+        self.employee_ids = np.array(
+            [row[0] for row in rows], dtype=np.int64
+        )[owner]
+        self.dates = month_starts[owner] + day
+        self.ids = records["id"]
+        self.check_in = records["check_in"]
+        self.check_out = records["check_out"]
+        self.minutes = records["minutes"]
+
+        if with_employee:
+            self.names = [row[5] for row in rows]
+            self.departments = [row[6] for row in rows]
+
+    def __len__(self):
+        return len(self.ids)
+
+    def sort_by_key(self):
+        # Oldest first by (attendance_date, id), with the keys in self.keys
+        keys = _key(self.dates.astype(np.int64), self.ids)
+        order = np.argsort(keys, kind="stable")
+        for name in ("owner", "employee_ids", "dates", "ids",
+                     "check_in", "check_out", "minutes"):
+            setattr(self, name, getattr(self, name)[order])
+        self.keys = keys[order]
+
+    def within(self, start=None, end=None):
+        keep = np.ones(len(self), dtype=bool)
+        if start:
+            keep &= self.dates >= np.datetime64(start, "D")
+        if end:
+            keep &= self.dates <= np.datetime64(end, "D")
+        return keep
+
+    def row(self, i):
+        # Shaped like AttendanceOut
+        return {
+            "id": int(self.ids[i]),
+            "employee_id": int(self.employee_ids[i]),
+            "attendance_date": self.dates[i].item(),
+            "check_in": _time(self.check_in[i]),
+            "check_out": _time(self.check_out[i]),
+            "work_hours": None if self.minutes[i] < 0 else int(self.minutes[i]),
+        }
+
+
+# -------------------------
+# MONTH CACHE
+# -------------------------
+# Paging through /attendance/all reads the same archived month page after
+# page, so the last few months stay unpacked and sorted. Entries are checked
+# against the month's (count, max id) on every use, which also catches
+# months rewritten by another process.
+class _MonthCache:
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._months = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, db, year: int, month: int):
+        stamp = tuple(_connection(db).execute(
+            select(
+                func.count(AttendanceArchive.id),
+                func.max(AttendanceArchive.id)
+            ).where(
+                AttendanceArchive.year == year,
+                AttendanceArchive.month == month
+            )
+        ).one())
+
+        with self._lock:
+            cached = self._months.get((year, month))
+            if cached and cached[0] == stamp:
+                self._months.move_to_end((year, month))
+                return cached[1]
+
+        data = ArchivedAttendance(db, year, month)
+        data.sort_by_key()
+
+        with self._lock:
+            self._months[(year, month)] = (stamp, data)
+            self._months.move_to_end((year, month))
+            while len(self._months) > self.maxsize:
+                self._months.popitem(last=False)
+
+        return data
+
+    def clear(self):
+        with self._lock:
+            self._months.clear()
+
+
+month_cache = _MonthCache(maxsize=2)
+
+
+# -------------------------
+# UNIFIED READS
+# -------------------------
+def archived_months(db, start=None, end=None, department=None,
+                    newest_first=True):
+    # Walks the period index one month at a time (a DISTINCT would scan
+    # every archive row); lazy, so callers can stop after the first month
+    period = tuple_(AttendanceArchive.year, AttendanceArchive.month)
+    order = (
+        (AttendanceArchive.year.desc(), AttendanceArchive.month.desc())
+        if newest_first else
+        (AttendanceArchive.year, AttendanceArchive.month)
+    )
+
+    query = select(AttendanceArchive.year, AttendanceArchive.month)
+    if department:
+        query = query.join(
+            Employee, Employee.id == AttendanceArchive.employee_id
+        ).where(Employee.department == department)
+    if start:
+        query = query.where(period >= (start.year, start.month))
+    if end:
+        query = query.where(period <= (end.year, end.month))
+
+    conn = _connection(db)
+    previous = None
+    while True:
+        step = query
+        if previous:
+            step = step.where(
+                period < previous if newest_first else period > previous
+            )
+        row = conn.execute(step.order_by(*order).limit(1)).first()
+        if row is None:
+            return
+        previous = tuple(row)
+        yield previous
+
+
+def newest_archived_day(db, start=None, end=None):
+    # No archived row in [start, end] is dated after this (None: no archive)
+    newest = next(archived_months(db, start, end), None)
+    if newest is None:
+        return None
+
+    last_day = month_range(*newest)[1] - timedelta(days=1)
+    return min(last_day, end) if end else last_day
+
+
+def iter_archived_attendance(db, start=None, end=None, after=None):
+    # Archived rows newest first by (attendance_date, id), the order of the
+    # live list endpoints; `after` is a keyset cursor into that order
+    lower = _key(_day_number(start), 0) if start else None
+    upper = _key(_day_number(end) + 1, 0) if end else None
+    if after:
+        after_key = _key(_day_number(after[0]), int(after[1]))
+        upper = after_key if upper is None else min(upper, after_key)
+        if end is None or after[0] < end:
+            end = after[0]
+
+    for year, month in archived_months(db, start, end):
+        data = month_cache.get(db, year, month)
+        low = np.searchsorted(data.keys, lower) if lower is not None else 0
+        high = (
+            np.searchsorted(data.keys, upper) if upper is not None
+            else len(data)
+        )
+        for i in range(high - 1, low - 1, -1):
+            yield data.row(i)
+
+
+def archived_attendance_of(db, employee_id: int):
+    # Every archived row of one employee, newest first, in one query
+    data = ArchivedAttendance(db, employee_id=employee_id)
+    return [data.row(i) for i in np.argsort(data.dates)[::-1]]
+
+
+def iter_archived_export_rows(db, start=None, end=None, department=None):
+    # Archived rows shaped like the attendance CSV export, oldest first by
+    # (attendance_date, employee_id)
+    for year, month in archived_months(
+        db, start, end, department, newest_first=False
+    ):
+        data = ArchivedAttendance(
+            db, year, month, department=department, with_employee=True
+        )
+        index = np.flatnonzero(data.within(start, end))
+        index = index[np.lexsort((data.employee_ids[index], data.dates[index]))]
+
+        for i in index:
+            owner = data.owner[i]
+            yield (
+                data.dates[i].item(),
+                int(data.employee_ids[i]),
+                data.names[owner],
+                data.departments[owner],
+                _time(data.check_in[i]),
+                _time(data.check_out[i]),
+                None if data.minutes[i] < 0 else int(data.minutes[i])
+            )
+
+
+def count_archived_attendance(db, start=None, end=None, department=None):
+    # Archived days in the months overlapping [start, end]; exact when the
+    # range covers whole months, which is all progress reporting needs
+    period = (AttendanceArchive.year, AttendanceArchive.month)
+    query = select(func.coalesce(func.sum(AttendanceArchive.total_days), 0))
+
+    if department:
+        query = query.join(
+            Employee, Employee.id == AttendanceArchive.employee_id
+        ).where(Employee.department == department)
+    if start:
+        query = query.where(tuple_(*period) >= (start.year, start.month))
+    if end:
+        query = query.where(tuple_(*period) <= (end.year, end.month))
+
+    return db.execute(query).scalar()
@@ -0,0 +1,94 @@
+from sqlalchemy import delete, extract, func, insert, select, union_all
+
+from app.models.attendance import Attendance
+from app.models.attendance_archive import AttendanceArchive
+from app.models.attendance_monthly import AttendanceMonthly
+
+
+def bump_attendance_rollup(db, employee_id: int, day, present=0, total=0,
+                           minutes=0):
+    # Runs inside the caller's transaction, next to the attendance write
+    updated = db.query(AttendanceMonthly).filter(
+        AttendanceMonthly.employee_id == employee_id,
+        AttendanceMonthly.year == day.year,
+        AttendanceMonthly.month == day.month
+    ).update({
+        AttendanceMonthly.present_days: AttendanceMonthly.present_days + present,
+        AttendanceMonthly.total_days: AttendanceMonthly.total_days + total,
+        AttendanceMonthly.work_minutes: AttendanceMonthly.work_minutes + minutes,
+    }, synchronize_session=False)
+
+    if not updated:
+        db.add(AttendanceMonthly(
+            employee_id=employee_id,
+            year=day.year,
+            month=day.month,
+            present_days=present,
+            total_days=total,
+            work_minutes=minutes
+        ))
+        db.flush()
+
+
+def get_attendance_rollup(db, employee_id: int, year: int, month: int):
+    return db.query(AttendanceMonthly).filter(
+        AttendanceMonthly.employee_id == employee_id,
+        AttendanceMonthly.year == year,
+        AttendanceMonthly.month == month
+    ).first()
+
+
+def rebuild_attendance_rollups(db, year=None, month=None):
+    # Recompute rollups from raw and archived attendance with one
+    # INSERT ... SELECT
+    year_col = extract("year", Attendance.attendance_date)
+    month_col = extract("month", Attendance.attendance_date)
+
+    clear = delete(AttendanceMonthly)
+    live = select(
+        Attendance.employee_id,
+        year_col.label("year"),
+        month_col.label("month"),
+        func.count(Attendance.check_in).label("present_days"),
+        func.count(Attendance.id).label("total_days"),
+        func.coalesce(func.sum(Attendance.work_hours), 0).label("work_minutes")
+    ).group_by(Attendance.employee_id, year_col, month_col)
+    archived = select(
+        AttendanceArchive.employee_id,
+        AttendanceArchive.year,
+        AttendanceArchive.month,
+        AttendanceArchive.present_days,
+        AttendanceArchive.total_days,
+        AttendanceArchive.work_minutes
+    )
+
+    if year is not None:
+        clear = clear.where(AttendanceMonthly.year == year)
+        live = live.where(year_col == year)
+        archived = archived.where(AttendanceArchive.year == year)
+    if month is not None:
+        clear = clear.where(AttendanceMonthly.month == month)
+        live = live.where(month_col == month)
+        archived = archived.where(AttendanceArchive.month == month)
+
+    # an employee-month can have both, after raw rows land in an archived month
+    both = union_all(live, archived).subquery()
+    source = select(
+        both.c.employee_id,
+        both.c.year,
+        both.c.month,
+        func.sum(both.c.present_days),
+        func.sum(both.c.total_days),
+        func.sum(both.c.work_minutes)
+    ).group_by(both.c.employee_id, both.c.year, both.c.month)
+
+    db.execute(clear)
+    result = db.execute(
+        insert(AttendanceMonthly).from_select(
+            ["employee_id", "year", "month",
+             "present_days", "total_days", "work_minutes"],
+            source
+        )
+    )
+
+    return result.rowcount
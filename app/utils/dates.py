@@ -0,0 +1,11 @@
+from datetime import date
+
+
+def month_range(year: int, month: int):
+    # Half-open [start, end) range so filters stay index-friendly
+    start = date(year, month, 1)
+    if month == 12:
+        end = date(year + 1, 1, 1)
+    else:
+        end = date(year, month + 1, 1)
+    return start, end
@@ -0,0 +1,70 @@
+import csv
+import io
+import zlib
+
+from fastapi.responses import StreamingResponse
+
+from app.database.db import read_session
+
+EXPORT_CHUNK_SIZE = 1000
+
+
+def iter_csv(build_query, header, chunk_size=EXPORT_CHUNK_SIZE, gzip=False,
+             on_rows=None, merge=None):
+    # Like the NDJSON stream: the generator owns its session and walks a
+    # server-side cursor, so only one chunk of rows is ever held in memory.
+    # on_rows(count) is called with the running row count after every chunk;
+    # merge(session, rows) may interleave rows from another store.
+    db = read_session()
+    compressor = zlib.compressobj(wbits=31) if gzip else None  # gzip framing
+
+    def encode(text):
+        data = text.encode()
+        if compressor is None:
+            return data
+        # sync-flush every chunk so compressed bytes leave immediately
+        return compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    try:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(header)
+
+        source = build_query(db).yield_per(chunk_size)
+        if merge:
+            source = merge(db, source)
+
+        rows = 0
+        for row in source:
+            writer.writerow(row)
+            rows += 1
+
+            if rows % chunk_size == 0:
+                if on_rows:
+                    on_rows(rows)
+                chunk = encode(buffer.getvalue())
+                buffer.seek(0)
+                buffer.truncate()
+                if chunk:
+                    yield chunk
+
+        if on_rows:
+            on_rows(rows)
+        chunk = encode(buffer.getvalue())
+        if compressor:
+            chunk += compressor.flush()
+        if chunk:
+            yield chunk
+    finally:
+        db.close()
+
+
+def csv_response(build_query, header, filename: str, gzip=False, merge=None):
+    if gzip:
+        filename += ".gz"
+
+    return StreamingResponse(
+        iter_csv(build_query, header, gzip=gzip, merge=merge),
+        media_type="application/gzip" if gzip else "text/csv",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
@@ -0,0 +1,403 @@
+import logging
+import os
+import queue
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import update
+from sqlalchemy.exc import OperationalError
+
+from app.config import settings
+from app.database.db import SessionLocal
+from app.models.job import Job
+from app.utils.metrics import metrics
+
+logger = logging.getLogger("dayflow.jobs")
+
+metrics.counter(
+    "dayflow_jobs_finished_total",
+    "Background jobs finished, by type and final status",
+    ("job_type", "status")
+)
+metrics.gauge("dayflow_jobs_running", "Background jobs running in this process")
+
+
+class JobQueueFull(Exception):
+    pass
+
+
+class JobInterrupted(Exception):
+    # Raised from progress() of a resumable job while the runner stops
+    pass
+
+
+class JobRunner:
+    # Bounded thread pool fed from the jobs table.
+    #
+    # Handlers are called as fn(session, params, progress) and return a
+    # JSON-serialisable result; progress(percent) records progress and keeps
+    # the job's heartbeat fresh. Every state change is a conditional UPDATE,
+    # so several worker processes can share the table: a job only runs in the
+    # worker whose claim succeeded. Jobs whose worker stopped heartbeating
+    # (crash, restart) go back to the queue if their handler is resumable,
+    # otherwise they fail with an error. Handlers registered with `expire`
+    # have their succeeded jobs expired after `expire_after`: expire(result)
+    # removes whatever the job left behind (files) and the job is marked
+    # expired.
+
+    def __init__(self, session_factory, workers: int, queue_limit: int,
+                 stale_after: float, max_attempts: int):
+        self.session_factory = session_factory
+        self.workers = workers
+        self.queue_limit = queue_limit
+        self.stale_after = stale_after
+        self.max_attempts = max_attempts
+        self.worker_id = (
+            f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        )
+        self.handlers = {}
+        self.expirers = {}
+        self._queue = None
+        self._maintainer = None
+        self._stopping = threading.Event()
+        self._submitted = set()
+        self._running = set()
+        self._lock = threading.Lock()
+
+    @property
+    def running(self):
+        return self._queue is not None
+
+    def register(self, job_type: str, fn, resumable=True, expire=None,
+                 expire_after=None):
+        # resumable: safe to run again from the start after an interruption
+        self.handlers[job_type] = (fn, resumable)
+        if expire is not None and expire_after:
+            self.expirers[job_type] = (expire, expire_after)
+
+    def start(self):
+        self._stopping.clear()
+        # Daemon threads rather than a ThreadPoolExecutor: the interpreter
+        # joins executor threads at exit, so a stuck handler would hold up
+        # shutdown however short stop()'s timeout is
+        self._queue = queue.Queue()
+        for number in range(max(1, self.workers)):
+            threading.Thread(
+                target=self._work, args=(self._queue,),
+                name=f"dayflow-job-{number}", daemon=True
+            ).start()
+        self._maintainer = threading.Thread(
+            target=self._maintain, name="dayflow-job-maintainer", daemon=True
+        )
+        self._maintainer.start()
+        self.recover()
+
+    def stop(self, timeout: float = 10.0):
+        # Queued jobs stay queued in the table. Resumable jobs give up at
+        # their next progress() and are requeued; whatever still runs after
+        # `timeout` is left to recovery once its heartbeat goes stale.
+        if not self.running:
+            return
+        self._stopping.set()
+        deadline = time.monotonic() + timeout
+        self._maintainer.join(timeout)
+        with self._lock:
+            jobs, self._queue = self._queue, None
+        for _ in range(max(1, self.workers)):
+            jobs.put(None)
+
+        while time.monotonic() < deadline:
+            with self._lock:
+                if not self._running:
+                    break
+            time.sleep(0.05)
+        else:
+            with self._lock:
+                left = sorted(self._running)
+            logger.warning("Stopped with jobs %s still running", left)
+
+        with self._lock:
+            self._submitted.clear()
+
+    # -------------------------
+    # ENQUEUE
+    # -------------------------
+    def enqueue(self, db, job_type: str, params: dict, user_id=None):
+        if job_type not in self.handlers:
+            raise ValueError(f"Unknown job type: {job_type}")
+
+        with self._lock:
+            if len(self._submitted) >= self.queue_limit:
+                raise JobQueueFull()
+
+        job = Job(
+            job_type=job_type,
+            status="queued",
+            params=params,
+            created_by=user_id
+        )
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+
+        self._submit(job.id)
+        return job
+
+    def _submit(self, job_id: int):
+        with self._lock:
+            if self._queue is None or job_id in self._submitted:
+                return
+            self._submitted.add(job_id)
+            self._queue.put(job_id)
+
+    # -------------------------
+    # EXECUTION
+    # -------------------------
+    def _work(self, jobs):
+        while True:
+            job_id = jobs.get()
+            if job_id is None:
+                return
+            if self._stopping.is_set():
+                # Still queued in the table; recovery submits it again
+                with self._lock:
+                    self._submitted.discard(job_id)
+                continue
+            self._execute(job_id)
+
+    def _execute(self, job_id: int):
+        try:
+            if self._claim(job_id):
+                self._run(job_id)
+        except Exception:
+            logger.exception("Job %s could not be run", job_id)
+        finally:
+            with self._lock:
+                self._submitted.discard(job_id)
+
+    def _claim(self, job_id: int):
+        now = datetime.now()
+        with self.session_factory() as db:
+            claimed = db.execute(
+                update(Job).where(
+                    Job.id == job_id,
+                    Job.status == "queued"
+                ).values(
+                    status="running",
+                    owner=self.worker_id,
+                    attempts=Job.attempts + 1,
+                    started_at=now,
+                    heartbeat_at=now
+                )
+            ).rowcount
+            db.commit()
+        return bool(claimed)
+
+    def _run(self, job_id: int):
+        with self._lock:
+            self._running.add(job_id)
+        metrics.inc("dayflow_jobs_running")
+        started = time.perf_counter()
+
+        with self.session_factory() as db:
+            job = db.get(Job, job_id)
+            job_type, params = job.job_type, job.params or {}
+            fn, resumable = self.handlers.get(job_type, (None, False))
+
+            def report(percent):
+                if resumable and self._stopping.is_set():
+                    raise JobInterrupted()
+                self.progress(job_id, percent)
+
+            try:
+                if fn is None:
+                    raise LookupError(f"Unknown job type: {job_type}")
+                result = fn(db, params, report)
+            except JobInterrupted:
+                db.rollback()
+                status = "interrupted"
+                self._requeue(job_id)
+            except Exception as exc:
+                db.rollback()
+                logger.exception("Job %s (%s) failed", job_id, job_type)
+                status = "failed"
+                self._finish(
+                    job_id, status,
+                    error=str(getattr(exc, "detail", None) or exc)
+                    or type(exc).__name__
+                )
+            else:
+                status = "succeeded"
+                self._finish(job_id, status, result=result)
+            finally:
+                with self._lock:
+                    self._running.discard(job_id)
+                metrics.inc("dayflow_jobs_running", value=-1)
+
+        metrics.inc("dayflow_jobs_finished_total", (job_type, status))
+        logger.info(
+            "Job %s (%s) %s in %.1f s",
+            job_id, job_type, status, time.perf_counter() - started
+        )
+
+    def _owned(self, job_id: int):
+        return (
+            Job.id == job_id,
+            Job.status == "running",
+            Job.owner == self.worker_id,
+        )
+
+    def progress(self, job_id: int, percent: int):
+        # Best effort: a busy database must not fail the job itself
+        try:
+            with self.session_factory() as db:
+                db.execute(update(Job).where(*self._owned(job_id)).values(
+                    progress=max(0, min(100, int(percent))),
+                    heartbeat_at=datetime.now()
+                ))
+                db.commit()
+        except OperationalError:
+            logger.warning("Could not record progress of job %s", job_id)
+
+    def _requeue(self, job_id: int):
+        # Interrupted by shutdown: not a failed attempt
+        with self.session_factory() as db:
+            db.execute(update(Job).where(*self._owned(job_id)).values(
+                status="queued",
+                owner=None,
+                attempts=Job.attempts - 1
+            ))
+            db.commit()
+
+    def _finish(self, job_id: int, status: str, result=None, error=None):
+        values = {
+            "status": status,
+            "result": result,
+            "error": error,
+            "finished_at": datetime.now(),
+        }
+        if status == "succeeded":
+            values["progress"] = 100
+
+        with self.session_factory() as db:
+            finished = db.execute(
+                update(Job).where(*self._owned(job_id)).values(**values)
+            ).rowcount
+            db.commit()
+
+        if not finished:
+            logger.warning(
+                "Job %s was taken over by another worker before it finished",
+                job_id
+            )
+
+    # -------------------------
+    # HEARTBEAT AND RECOVERY
+    # -------------------------
+    def _maintain(self):
+        interval = max(1.0, self.stale_after / 3)
+        while not self._stopping.wait(interval):
+            try:
+                self._heartbeat()
+                self.recover()
+                self.expire_finished()
+            except Exception:
+                logger.exception("Job maintenance failed")
+
+    def _heartbeat(self):
+        with self._lock:
+            running = list(self._running)
+        if not running:
+            return
+
+        with self.session_factory() as db:
+            db.execute(update(Job).where(
+                Job.id.in_(running),
+                Job.owner == self.worker_id
+            ).values(heartbeat_at=datetime.now()))
+            db.commit()
+
+    def recover(self):
+        # Requeue (or fail) jobs whose worker went silent, then pick up
+        # queued jobs nobody is working on
+        now = datetime.now()
+        cutoff = now - timedelta(seconds=self.stale_after)
+
+        with self.session_factory() as db:
+            abandoned = db.query(Job.id, Job.job_type, Job.attempts).filter(
+                Job.status == "running",
+                Job.heartbeat_at < cutoff
+            ).all()
+
+            for job_id, job_type, attempts in abandoned:
+                _, resumable = self.handlers.get(job_type, (None, False))
+                if resumable and attempts < self.max_attempts:
+                    values = {"status": "queued", "owner": None}
+                    logger.warning("Requeueing abandoned job %s (%s)", job_id, job_type)
+                else:
+                    values = {
+                        "status": "failed",
+                        "error": "Interrupted before it finished",
+                        "finished_at": now,
+                    }
+                    logger.warning("Failing abandoned job %s (%s)", job_id, job_type)
+
+                db.execute(update(Job).where(
+                    Job.id == job_id,
+                    Job.status == "running",
+                    Job.heartbeat_at < cutoff
+                ).values(**values))
+            db.commit()
+
+            queued = [
+                job_id for (job_id,) in db.query(Job.id).filter(
+                    Job.status == "queued"
+                ).order_by(Job.id).limit(self.queue_limit)
+            ]
+
+        for job_id in queued:
+            with self._lock:
+                if len(self._submitted) >= self.queue_limit:
+                    break
+            self._submit(job_id)
+
+    # -------------------------
+    # RETENTION
+    # -------------------------
+    def expire_finished(self):
+        now = datetime.now()
+        with self.session_factory() as db:
+            for job_type, (expire, expire_after) in self.expirers.items():
+                old = db.query(Job.id, Job.result).filter(
+                    Job.job_type == job_type,
+                    Job.status == "succeeded",
+                    Job.finished_at < now - expire_after
+                ).order_by(Job.id).all()
+
+                for job_id, result in old:
+                    # whoever flips the status cleans up, once
+                    expired = db.execute(update(Job).where(
+                        Job.id == job_id,
+                        Job.status == "succeeded"
+                    ).values(status="expired")).rowcount
+                    db.commit()
+
+                    if expired:
+                        try:
+                            expire(result or {})
+                        except Exception:
+                            logger.exception("Could not clean up job %s", job_id)
+                        else:
+                            logger.info("Expired job %s (%s)", job_id, job_type)
+
+
+job_runner = JobRunner(
+    SessionLocal,
+    settings.job_workers,
+    settings.job_queue_limit,
+    settings.job_stale_after,
+    settings.job_max_attempts
+)
@@ -0,0 +1,227 @@
+from collections import defaultdict
+from datetime import date, timedelta
+
+from sqlalchemy import delete, insert, or_, select, update
+
+from app.config import settings
+from app.models.leave import LeaveRequest
+from app.models.leave_balance import LeaveBalance
+
+
+UNPAID_LEAVE = "Unpaid"
+
+
+class InsufficientLeaveBalance(Exception):
+    def __init__(self, leave_type: str, year: int, available: int):
+        super().__init__(
+            f"Insufficient {leave_type} leave balance for {year}: "
+            f"{available} days available"
+        )
+        self.leave_type = leave_type
+        self.year = year
+        self.available = available
+
+
+def leave_entitlements():
+    entitlements = {}
+    for item in settings.leave_entitlements.split(","):
+        if "=" in item:
+            leave_type, days = item.split("=", 1)
+            entitlements[leave_type.strip()] = int(days)
+    return entitlements
+
+
+def canonical_leave_type(leave_type: str):
+    # Matches the configured types plus Unpaid, ignoring case and spacing;
+    # None means the type is unknown and must be rejected
+    wanted = " ".join(leave_type.split()).lower()
+    for known in (*leave_entitlements(), UNPAID_LEAVE):
+        if known.lower() == wanted:
+            return known
+    return None
+
+
+def leave_days_by_year(start_date: date, end_date: date):
+    # Inclusive calendar days, split where a leave crosses New Year
+    days = {}
+    while start_date <= end_date:
+        year_end = min(end_date, date(start_date.year, 12, 31))
+        days[start_date.year] = (year_end - start_date).days + 1
+        start_date = year_end + timedelta(days=1)
+    return days
+
+
+def _balance_filter(employee_id: int, leave_type: str, year: int):
+    return (
+        LeaveBalance.employee_id == employee_id,
+        LeaveBalance.leave_type == leave_type,
+        LeaveBalance.year == year,
+    )
+
+
+# -------------------------
+# APPLY
+# -------------------------
+def reserve_leave_days(db, employee_id: int, leave_type: str,
+                       start_date: date, end_date: date):
+    # Moves the requested days into `pending`, but only while
+    # used + pending stays within the entitlement; the check and the write
+    # are one conditional UPDATE, so concurrent applications cannot overdraw.
+    for year, days in leave_days_by_year(start_date, end_date).items():
+        keys = _balance_filter(employee_id, leave_type, year)
+        within = or_(
+            LeaveBalance.entitlement.is_(None),
+            LeaveBalance.used_days + LeaveBalance.pending_days + days
+            <= LeaveBalance.entitlement
+        )
+
+        updated = db.execute(
+            update(LeaveBalance).where(*keys, within).values(
+                pending_days=LeaveBalance.pending_days + days
+            )
+        ).rowcount
+        if updated:
+            continue
+
+        balance = db.query(LeaveBalance).filter(*keys).first()
+        if balance is None:
+            entitlement = leave_entitlements().get(leave_type)
+            balance = LeaveBalance(
+                employee_id=employee_id,
+                leave_type=leave_type,
+                year=year,
+                entitlement=entitlement,
+                used_days=0,
+                pending_days=0
+            )
+            if entitlement is None or days <= entitlement:
+                balance.pending_days = days
+                db.add(balance)
+                db.flush()
+                continue
+
+        raise InsufficientLeaveBalance(
+            leave_type, year, _available(balance)
+        )
+
+
+# -------------------------
+# APPROVE / REJECT
+# -------------------------
+def _settle(db, employee_id: int, leave_type: str, year: int, days: int,
+            new_status: str):
+    values = {"pending_days": LeaveBalance.pending_days - days}
+    if new_status == "Approved":
+        values["used_days"] = LeaveBalance.used_days + days
+
+    db.execute(
+        update(LeaveBalance).where(
+            *_balance_filter(employee_id, leave_type, year)
+        ).values(**values)
+    )
+
+
+def settle_leave_days(db, employee_id: int, leave_type: str,
+                      start_date: date, end_date: date, new_status: str):
+    # Runs inside the caller's transaction, next to the status change
+    for year, days in leave_days_by_year(start_date, end_date).items():
+        _settle(db, employee_id, leave_type, year, days, new_status)
+
+
+def settle_leave_batch(db, leaves, new_status: str):
+    # leaves: (employee_id, leave_type, start_date, end_date) rows; one
+    # UPDATE per ledger row however many leaves it covers
+    totals = defaultdict(int)
+    for employee_id, leave_type, start_date, end_date in leaves:
+        for year, days in leave_days_by_year(start_date, end_date).items():
+            totals[(employee_id, leave_type, year)] += days
+
+    for (employee_id, leave_type, year), days in totals.items():
+        _settle(db, employee_id, leave_type, year, days, new_status)
+
+
+# -------------------------
+# READ
+# -------------------------
+def _available(balance):
+    if balance.entitlement is None:
+        return None
+    return balance.entitlement - balance.used_days - balance.pending_days
+
+
+def get_leave_balances(db, employee_id: int, year: int):
+    rows = {
+        row.leave_type: row
+        for row in db.query(LeaveBalance).filter(
+            LeaveBalance.employee_id == employee_id,
+            LeaveBalance.year == year
+        )
+    }
+
+    balances = []
+    entitlements = leave_entitlements()
+    for leave_type in sorted(set(entitlements) | set(rows)):
+        row = rows.get(leave_type) or LeaveBalance(
+            leave_type=leave_type,
+            entitlement=entitlements[leave_type],
+            used_days=0,
+            pending_days=0
+        )
+        balances.append({
+            "leave_type": leave_type,
+            "entitlement": row.entitlement,
+            "used_days": row.used_days,
+            "pending_days": row.pending_days,
+            "available_days": _available(row)
+        })
+
+    return balances
+
+
+# -------------------------
+# RECOMPUTE
+# -------------------------
+def recompute_leave_balances(db, year=None):
+    # Rebuild the ledger from pending and approved leave requests, applying
+    # the current entitlements; works on a Session or a Connection
+    totals = defaultdict(lambda: {"used_days": 0, "pending_days": 0})
+
+    source = select(
+        LeaveRequest.employee_id,
+        LeaveRequest.leave_type,
+        LeaveRequest.start_date,
+        LeaveRequest.end_date,
+        LeaveRequest.status
+    ).where(LeaveRequest.status.in_(("Pending", "Approved")))
+
+    clear = delete(LeaveBalance)
+    if year is not None:
+        clear = clear.where(LeaveBalance.year == year)
+        source = source.where(
+            LeaveRequest.start_date <= date(year, 12, 31),
+            LeaveRequest.end_date >= date(year, 1, 1)
+        )
+
+    for employee_id, leave_type, start_date, end_date, status in db.execute(source):
+        column = "used_days" if status == "Approved" else "pending_days"
+        for leave_year, days in leave_days_by_year(start_date, end_date).items():
+            if year is None or leave_year == year:
+                totals[(employee_id, leave_type, leave_year)][column] += days
+
+    entitlements = leave_entitlements()
+    rows = [
+        {
+            "employee_id": employee_id,
+            "leave_type": leave_type,
+            "year": leave_year,
+            "entitlement": entitlements.get(leave_type),
+            **counts
+        }
+        for (employee_id, leave_type, leave_year), counts in totals.items()
+    ]
+
+    db.execute(clear)
+    if rows:
+        db.execute(insert(LeaveBalance), rows)
+
+    return len(rows)
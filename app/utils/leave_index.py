@@ -0,0 +1,162 @@
+import itertools
+import logging
+import threading
+from collections import namedtuple
+from datetime import timedelta
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.models.leave import LeaveRequest
+from app.utils.interval_tree import IntervalTree
+
+logger = logging.getLogger("dayflow.leave_index")
+
+ACTIVE_STATUSES = ("Pending", "Approved")
+
+LeaveEntry = namedtuple(
+    "LeaveEntry",
+    ["leave_id", "employee_id", "leave_type", "start_date", "end_date", "status", "order"]
+)
+
+
+class LeaveOverlapError(Exception):
+    def __init__(self, leave_ids):
+        super().__init__(f"Overlaps leave requests {leave_ids}")
+        self.leave_ids = leave_ids
+
+
+# -------------------------
+# OVERLAP CHECK
+# -------------------------
+def overlapping_leave_ids(db: Session, employee_id: int, start_date, end_date):
+    # Authoritative check against the table (ix_leave_requests_employee_period);
+    # run it in the transaction that inserts the leave
+    return [
+        leave_id for (leave_id,) in db.query(LeaveRequest.id).filter(
+            LeaveRequest.employee_id == employee_id,
+            LeaveRequest.status.in_(ACTIVE_STATUSES),
+            LeaveRequest.start_date <= end_date,
+            LeaveRequest.end_date >= start_date
+        ).order_by(LeaveRequest.id)
+    ]
+
+
+def check_leave_overlap(db: Session, employee_id: int, start_date, end_date):
+    leave_ids = overlapping_leave_ids(db, employee_id, start_date, end_date)
+    if leave_ids:
+        raise LeaveOverlapError(leave_ids)
+
+
+# -------------------------
+# LEAVE INTERVAL INDEX
+# -------------------------
+# Every approved leave org-wide ("who is out") in process memory. Writes
+# served by this process update it in place (record); before each read the
+# index compares a stamp of leave_requests (row count, max id, latest
+# updated_at) with the last one it saw, and on a change applies only the
+# rows updated since then, so writes from other workers arrive as a delta.
+# Rows are re-read from a little before the last updated_at, because a
+# transaction can commit after a later one stamped its rows.
+DELTA_OVERLAP = timedelta(seconds=30)
+
+
+class LeaveIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._order = itertools.count()
+        self._reset()
+        self.stamp = None
+
+    def _reset(self):
+        self._entries = {}
+        self._approved = IntervalTree()
+
+    def _put(self, leave_id, employee_id, leave_type, start_date, end_date,
+             status):
+        old = self._entries.pop(leave_id, None)
+        if old is not None:
+            self._approved.remove(old.start_date, old.order)
+
+        if status == "Approved":
+            entry = LeaveEntry(
+                leave_id, employee_id, leave_type, start_date, end_date,
+                status, next(self._order)
+            )
+            self._entries[leave_id] = entry
+            self._approved.insert(start_date, end_date, entry.order, entry)
+
+    @staticmethod
+    def current_stamp(db: Session):
+        return tuple(db.query(
+            func.count(LeaveRequest.id),
+            func.max(LeaveRequest.id),
+            func.max(LeaveRequest.updated_at)
+        ).one())
+
+    @staticmethod
+    def _columns(db: Session):
+        return db.query(
+            LeaveRequest.id,
+            LeaveRequest.employee_id,
+            LeaveRequest.leave_type,
+            LeaveRequest.start_date,
+            LeaveRequest.end_date,
+            LeaveRequest.status
+        )
+
+    def rebuild(self, db: Session, stamp=None):
+        # stamp first: a write landing during the load is picked up as delta
+        stamp = stamp if stamp is not None else self.current_stamp(db)
+        rows = self._columns(db).filter(LeaveRequest.status == "Approved").all()
+
+        with self._lock:
+            self._reset()
+            for row in rows:
+                self._put(*row)
+            self.stamp = stamp
+
+        logger.info("Leave index loaded with %s approved leaves", len(rows))
+
+    def ensure_current(self, db: Session):
+        stamp = self.current_stamp(db)
+        previous = self.stamp
+        if stamp == previous:
+            return
+
+        # nothing deletes leaves; a shrinking table means a restore or a
+        # manual clean-up
+        if previous is None or stamp[0] < previous[0]:
+            self.rebuild(db, stamp)
+            return
+
+        # rows without updated_at predate the column and were loaded already
+        changed = (
+            LeaveRequest.updated_at.isnot(None) if previous[2] is None
+            else LeaveRequest.updated_at >= previous[2] - DELTA_OVERLAP
+        )
+        rows = self._columns(db).filter(changed).all()
+
+        with self._lock:
+            for row in rows:
+                self._put(*row)
+            self.stamp = stamp
+
+    def record(self, leave_id, employee_id, leave_type, start_date, end_date,
+               status):
+        # After this process committed a write; the stamp still moves, so the
+        # next read re-applies the row from the delta, which is idempotent
+        with self._lock:
+            self._put(
+                leave_id, employee_id, leave_type, start_date, end_date, status
+            )
+
+    # -------------------------
+    # QUERIES
+    # -------------------------
+    def out_between(self, start_date, end_date):
+        with self._lock:
+            return self._approved.overlap(start_date, end_date)
+
+
+leave_index = LeaveIndex()
@@ -0,0 +1,277 @@
+import threading
+import time
+from bisect import bisect_left
+from collections import OrderedDict
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.routing import Match
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+UNMATCHED_ROUTE = "unmatched"
+
+
+# -------------------------
+# METRIC TYPES
+# -------------------------
+class Histogram:
+    __slots__ = ("buckets", "counts", "total", "count")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names, values, extra=""):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class MetricsRegistry:
+    # Plain dicts behind one lock; every update is a few dict operations
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._families = OrderedDict()
+
+    def _family(self, name, kind, help_text, label_names, buckets=None):
+        family = self._families.get(name)
+        if family is None:
+            family = {
+                "kind": kind,
+                "help": help_text,
+                "labels": label_names,
+                "buckets": buckets,
+                "series": {},
+            }
+            self._families[name] = family
+        return family
+
+    def counter(self, name, help_text, label_names=()):
+        with self._lock:
+            self._family(name, "counter", help_text, label_names)
+
+    def gauge(self, name, help_text, label_names=()):
+        with self._lock:
+            self._family(name, "gauge", help_text, label_names)
+
+    def histogram(self, name, help_text, label_names=(), buckets=LATENCY_BUCKETS):
+        with self._lock:
+            self._family(name, "histogram", help_text, label_names, buckets)
+
+    def inc(self, name, labels=(), value=1):
+        with self._lock:
+            series = self._families[name]["series"]
+            series[labels] = series.get(labels, 0) + value
+
+    def value(self, name, labels=()):
+        # current value of a counter or gauge series
+        with self._lock:
+            return self._families[name]["series"].get(labels, 0)
+
+    def observe(self, name, labels, value):
+        with self._lock:
+            family = self._families[name]
+            histogram = family["series"].get(labels)
+            if histogram is None:
+                histogram = family["series"][labels] = Histogram(family["buckets"])
+            histogram.observe(value)
+
+    def render(self):
+        lines = []
+        with self._lock:
+            for name, family in self._families.items():
+                lines.append(f"# HELP {name} {family['help']}")
+                lines.append(f"# TYPE {name} {family['kind']}")
+                names = family["labels"]
+
+                for labels, value in family["series"].items():
+                    if family["kind"] != "histogram":
+                        lines.append(f"{name}{_labels(names, labels)} {value}")
+                        continue
+
+                    cumulative = 0
+                    bounds = [*value.buckets, "+Inf"]
+                    for bound, count in zip(bounds, value.counts):
+                        cumulative += count
+                        le = f'le="{bound}"'
+                        lines.append(
+                            f"{name}_bucket{_labels(names, labels, le)} {cumulative}"
+                        )
+                    lines.append(f"{name}_sum{_labels(names, labels)} {value.total}")
+                    lines.append(f"{name}_count{_labels(names, labels)} {value.count}")
+
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+metrics.histogram(
+    "dayflow_http_request_duration_seconds",
+    "HTTP request latency by route",
+    ("method", "route", "status")
+)
+metrics.gauge(
+    "dayflow_http_requests_in_flight",
+    "HTTP requests currently being served",
+    ("method", "route")
+)
+metrics.histogram(
+    "dayflow_db_queries_per_request",
+    "SQL statements issued per HTTP request",
+    ("method", "route"),
+    buckets=QUERY_COUNT_BUCKETS
+)
+metrics.histogram(
+    "dayflow_db_seconds_per_request",
+    "Time spent executing SQL per HTTP request",
+    ("method", "route")
+)
+metrics.counter(
+    "dayflow_db_statements_total",
+    "SQL statements executed, inside and outside requests"
+)
+
+
+# -------------------------
+# PER-REQUEST SQL STATS
+# -------------------------
+# The middleware puts a mutable RequestStats in a context variable; the thread
+# pool and AsyncSession.run_sync both run with a copy of the request context,
+# so every statement of the request lands in the same object.
+class RequestStats:
+    __slots__ = ("queries", "db_seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+
+
+request_stats: ContextVar = ContextVar("dayflow_request_stats", default=None)
+
+_hooks_installed = False
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context,
+                           executemany):
+    conn.info.setdefault("dayflow_query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context,
+                          executemany):
+    elapsed = time.perf_counter() - conn.info["dayflow_query_start"].pop()
+    metrics.inc("dayflow_db_statements_total")
+
+    stats = request_stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_seconds += elapsed
+
+
+def _handle_error(context):
+    # A failed statement never reaches after_cursor_execute
+    conn = context.connection
+    if conn is not None and conn.info.get("dayflow_query_start"):
+        conn.info["dayflow_query_start"].pop()
+
+
+def install_db_hooks():
+    # Listens on the Engine class, so the sync engine and the async engine's
+    # sync_engine are both covered
+    global _hooks_installed
+    if _hooks_installed:
+        return
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(Engine, "handle_error", _handle_error)
+    _hooks_installed = True
+
+
+# -------------------------
+# ASGI MIDDLEWARE
+# -------------------------
+class MetricsMiddleware:
+    # Pure ASGI (no BaseHTTPMiddleware), labelled by route template so
+    # /leaves/12/approve and /leaves/13/approve share one series
+    def __init__(self, app, router, route_cache_size=2048):
+        self.app = app
+        self.router = router
+        self.route_cache_size = route_cache_size
+        self._routes = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _route_template(self, scope):
+        key = (scope["method"], scope["path"])
+        with self._lock:
+            template = self._routes.get(key)
+            if template is not None:
+                self._routes.move_to_end(key)
+                return template
+
+        template = UNMATCHED_ROUTE
+        for route in self.router.routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                template = getattr(route, "path", UNMATCHED_ROUTE)
+                break
+            if match == Match.PARTIAL and template == UNMATCHED_ROUTE:
+                template = getattr(route, "path", UNMATCHED_ROUTE)
+
+        with self._lock:
+            self._routes[key] = template
+            while len(self._routes) > self.route_cache_size:
+                self._routes.popitem(last=False)
+
+        return template
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        route = self._route_template(scope)
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        stats = RequestStats()
+        token = request_stats.set(stats)
+        metrics.inc("dayflow_http_requests_in_flight", (method, route))
+        start = time.perf_counter()
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            request_stats.reset(token)
+            metrics.inc("dayflow_http_requests_in_flight", (method, route), -1)
+            metrics.observe(
+                "dayflow_http_request_duration_seconds",
+                (method, route, status),
+                elapsed
+            )
+            metrics.observe(
+                "dayflow_db_queries_per_request", (method, route), stats.queries
+            )
+            metrics.observe(
+                "dayflow_db_seconds_per_request", (method, route), stats.db_seconds
+            )
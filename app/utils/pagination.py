@@ -0,0 +1,202 @@
+import base64
+import heapq
+import json
+from datetime import date
+from itertools import chain, islice
+
+import orjson
+from fastapi import HTTPException
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from sqlalchemy import Date, tuple_
+
+from app.database.db import read_session
+from app.database.session import run_db
+
+STREAM_CHUNK_SIZE = 500
+
+
+def row_to_dict(obj):
+    # column-projection rows and ORM instances alike
+    if hasattr(obj, "_asdict"):
+        return obj._asdict()
+    return {c.key: getattr(obj, c.key) for c in obj.__table__.columns}
+
+
+def schema_columns(model, schema):
+    # Only the columns a response schema exposes, so list endpoints select
+    # plain tuples instead of hydrating ORM objects
+    return [getattr(model, name) for name in schema.model_fields]
+
+
+# -------------------------
+# CURSORS
+# -------------------------
+def encode_cursor(values):
+    raw = json.dumps(values, default=str, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, key_columns):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded))
+
+        if len(values) != len(key_columns):
+            raise ValueError("cursor length mismatch")
+
+        return [
+            date.fromisoformat(value) if isinstance(col.type, Date) else value
+            for col, value in zip(key_columns, values)
+        ]
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+# -------------------------
+# KEYSET PAGINATION
+# -------------------------
+def keyset_query(query, key_columns, after=None):
+    # Newest first; `after` is the key of the last row already returned
+    if after:
+        query = query.filter(tuple_(*key_columns) < tuple_(*after))
+
+    return query.order_by(*(col.desc() for col in key_columns))
+
+
+def keyset_page(query, key_columns, limit, after=None):
+    rows = keyset_query(query, key_columns, after).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(
+            [getattr(rows[-1], col.key) for col in key_columns]
+        )
+
+    return {"items": rows, "next_cursor": next_cursor}
+
+
+def merge_newest_first(rows, other, key_columns, other_newest=None):
+    # Two row-dict streams that are each newest first by key_columns. Rows
+    # whose first key is past other_newest (the newest first-key value in
+    # `other`) come out before `other` is read at all.
+    keys = [col.key for col in key_columns]
+    rows = iter(rows)
+
+    if other_newest is not None:
+        for row in rows:
+            if row[keys[0]] <= other_newest:
+                rows = chain([row], rows)
+                break
+            yield row
+        else:
+            yield from other
+            return
+
+    yield from heapq.merge(
+        rows, other,
+        key=lambda row: tuple(row[key] for key in keys),
+        reverse=True
+    )
+
+
+def _merged_rows(db, query, key_columns, after, limit, archived):
+    # Live rows plus the second store: archived(db, after) returns
+    # (newest first-key value or None, row dicts newest first)
+    newest, other = archived(db, after)
+    rows = (row_to_dict(obj) for obj in query)
+    rows = merge_newest_first(rows, other, key_columns, newest)
+    return islice(rows, limit) if limit else rows
+
+
+# -------------------------
+# NDJSON STREAMING
+# -------------------------
+def iter_ndjson(build_query, key_columns, after=None, limit=None,
+                chunk_size=STREAM_CHUNK_SIZE, archived=None):
+    # The stream outlives the request session, so it owns a synchronous
+    # session; yield_per keeps a server-side cursor and one chunk in memory
+    db = read_session()
+    try:
+        query = keyset_query(build_query(db), key_columns, after)
+        if limit:
+            query = query.limit(limit)
+
+        rows = query.yield_per(chunk_size)
+        if archived:
+            rows = _merged_rows(db, rows, key_columns, after, limit, archived)
+
+        buffer = []
+        for obj in rows:
+            buffer.append(orjson.dumps(
+                obj if archived else row_to_dict(obj), default=str
+            ))
+
+            if len(buffer) >= chunk_size:
+                yield b"\n".join(buffer) + b"\n"
+                buffer = []
+
+        if buffer:
+            yield b"\n".join(buffer) + b"\n"
+    finally:
+        db.close()
+
+
+def _merged_list(db, build_query, key_columns, limit, after, archived):
+    query = keyset_query(build_query(db), key_columns, after)
+    if not limit:
+        return list(_merged_rows(db, query, key_columns, None, None, archived))
+
+    rows = list(_merged_rows(
+        db, query.limit(limit + 1), key_columns, after, limit + 1, archived
+    ))
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor([rows[-1][col.key] for col in key_columns])
+
+    return {"items": rows, "next_cursor": next_cursor}
+
+
+def _list(db, build_query, key_columns, limit, after, archived=None):
+    if archived:
+        return _merged_list(db, build_query, key_columns, limit, after, archived)
+
+    if limit:
+        page = keyset_page(build_query(db), key_columns, limit, after)
+        page["items"] = [row_to_dict(row) for row in page["items"]]
+        return page
+
+    # Unbounded legacy response, kept for existing clients
+    return [
+        row_to_dict(row)
+        for row in keyset_query(build_query(db), key_columns).all()
+    ]
+
+
+async def paginate(db, build_query, key_columns, limit=None, cursor=None,
+                   stream=False, archived=None):
+    # archived(db, after), if given, returns (newest first-key value, row
+    # dicts) from a second store in the same newest-first key order; they
+    # are merged into every page
+    after = decode_cursor(cursor, key_columns) if cursor else None
+
+    if stream:
+        return StreamingResponse(
+            iter_ndjson(build_query, key_columns, after, limit,
+                        archived=archived),
+            media_type="application/x-ndjson"
+        )
+
+    if cursor and not limit:
+        limit = 100
+
+    # List queries select exactly the response schema's columns
+    # (schema_columns), so rows go straight to orjson instead of being
+    # validated one by one against the response model
+    return ORJSONResponse(
+        await run_db(
+            db, _list, build_query, key_columns, limit, after, archived
+        )
+    )
@@ -0,0 +1,254 @@
+from datetime import timedelta
+from itertools import chain
+
+import numpy as np
+from sqlalchemy import case, extract, func, select
+
+from app.models.attendance import Attendance
+from app.models.employee import Employee
+from app.models.leave import LeaveRequest
+from app.models.payroll import Payroll
+from app.utils.attendance_archive import ArchivedAttendance
+from app.utils.dates import month_range
+
+NO_CHECK_IN = -2
+OPEN_CHECK_IN = -1
+
+
+def _positions(ids, values):
+    # Row index of every value in the sorted ids array, and which were found
+    positions = np.searchsorted(ids, values)
+    found = positions < len(ids)
+    found[found] = ids[positions[found]] == values[found]
+    return positions, found
+
+
+def _int_columns(rows, width):
+    flat = np.fromiter(chain.from_iterable(rows), dtype=np.int64,
+                       count=len(rows) * width)
+    return flat.reshape(-1, width).T
+
+
+# -------------------------
+# LOAD ONE MONTH
+# -------------------------
+class PayrollMonth:
+    # The month as employee x day matrices, loaded once and shared by every
+    # rule set of a simulation
+
+    def __init__(self, db, year: int, month: int, department=None):
+        start, end = month_range(year, month)
+        # plain Core rows; the ORM result layer costs more than SQLite here
+        conn = db.connection()
+
+        employee_query = select(Employee.id, Employee.department)
+        if department:
+            employee_query = employee_query.where(
+                Employee.department == department
+            )
+        employees = conn.execute(employee_query.order_by(Employee.id)).all()
+
+        self.employee_ids = np.array([row[0] for row in employees], dtype=np.int64)
+        self.departments = [row[1] for row in employees]
+
+        last_day = end - timedelta(days=1)
+        days = np.arange(start, end, dtype="datetime64[D]")
+        shape = (len(employees), len(days))
+        self.weekdays = np.is_busday(days)
+
+        # Attendance: one cell per row. minutes is -2 without a check-in and
+        # -1 for a check-in that was never closed
+        self.has_row = np.zeros(shape, dtype=bool)
+        self.minutes = np.full(shape, NO_CHECK_IN, dtype=np.int64)
+
+        rows = conn.execute(
+            select(
+                Attendance.employee_id,
+                extract("day", Attendance.attendance_date),
+                case(
+                    (Attendance.check_in.is_(None), NO_CHECK_IN),
+                    else_=func.coalesce(Attendance.work_hours, OPEN_CHECK_IN)
+                )
+            ).where(
+                Attendance.attendance_date >= start,
+                Attendance.attendance_date < end
+            )
+        ).all()
+
+        if rows:
+            employee_id, day, minutes = _int_columns(rows, 3)
+            positions, found = _positions(self.employee_ids, employee_id)
+            cells = (positions[found], day[found] - 1)
+            self.has_row[cells] = True
+            self.minutes[cells] = minutes[found]
+
+        # Closed months may live in the archive instead
+        archived = ArchivedAttendance(conn, year, month, department=department)
+        if len(archived):
+            positions, found = _positions(
+                self.employee_ids, archived.employee_ids
+            )
+            day = (archived.dates - np.datetime64(start, "D")).astype(np.int64)
+            cells = (positions[found], day[found])
+            self.has_row[cells] = True
+            self.minutes[cells] = np.where(
+                archived.check_in < 0,
+                NO_CHECK_IN,
+                np.where(archived.minutes >= 0, archived.minutes, OPEN_CHECK_IN)
+            )[found]
+
+        self.checked_in = self.minutes != NO_CHECK_IN
+
+        # Approved leave: leave type code per day, -1 = not on leave
+        self.leave_types = []
+        self.leave_code = np.full(shape, -1, dtype=np.int16)
+        leave_codes = {}
+
+        leaves = conn.execute(
+            select(
+                LeaveRequest.employee_id,
+                LeaveRequest.leave_type,
+                LeaveRequest.start_date,
+                LeaveRequest.end_date
+            ).where(
+                LeaveRequest.status == "Approved",
+                LeaveRequest.start_date < end,
+                LeaveRequest.end_date >= start
+            )
+        ).all()
+
+        if leaves:
+            positions, found = _positions(
+                self.employee_ids,
+                np.array([row[0] for row in leaves], dtype=np.int64)
+            )
+            for (_, leave_type, first, last), row, ok in zip(
+                leaves, positions, found
+            ):
+                if not ok:
+                    continue
+                code = leave_codes.setdefault(leave_type, len(leave_codes))
+                first = (max(first, start) - start).days
+                stop = (min(last, last_day) - start).days + 1
+                self.leave_code[row, first:stop] = code
+
+            self.leave_types = list(leave_codes)
+
+        # Persisted payroll of the month; NaN = not generated yet
+        self.current = np.full(len(employees), np.nan)
+        payrolls = conn.execute(
+            select(Payroll.employee_id, Payroll.salary_amount).where(
+                Payroll.year == year,
+                Payroll.month == month
+            )
+        ).all()
+
+        if payrolls:
+            positions, found = _positions(
+                self.employee_ids,
+                np.array([row[0] for row in payrolls], dtype=np.int64)
+            )
+            amounts = np.array([row[1] for row in payrolls], dtype=np.float64)
+            self.current[positions[found]] = amounts[found]
+
+    def base_salaries(self, base_salary: float, department_base_salaries):
+        base = np.full(len(self.departments), float(base_salary))
+        if department_base_salaries:
+            names = np.array(self.departments, dtype=object)
+            for name, salary in department_base_salaries.items():
+                base[names == name] = salary
+        return base
+
+
+# -------------------------
+# RULE SETS
+# -------------------------
+def simulate_rule_set(data: PayrollMonth, rules):
+    # Same formula as generate_payroll, present / working days * base,
+    # with the rule set's adjustments applied to every employee at once:
+    # - half_day_minutes: check-outs under the threshold count as half a day
+    #   (open check-ins still count as full days)
+    # - paid_leave_types: approved leave of these types on weekdays without
+    #   a check-in counts as a present working day
+    # - working_days="weekdays": every weekday of the month is a working
+    #   day, instead of only the days with an attendance row
+    credit = data.checked_in.astype(np.float64)
+    counted = data.has_row.copy()
+    if rules.working_days == "weekdays":
+        counted |= data.weekdays[None, :]
+
+    if rules.half_day_minutes:
+        short = data.checked_in & (data.minutes >= 0) & (
+            data.minutes < rules.half_day_minutes
+        )
+        credit[short] = 0.5
+
+    codes = [
+        data.leave_types.index(leave_type)
+        for leave_type in rules.paid_leave_types
+        if leave_type in data.leave_types
+    ]
+    if codes:
+        paid = (
+            np.isin(data.leave_code, codes)
+            & data.weekdays[None, :]
+            & ~data.checked_in
+        )
+        credit[paid] = 1.0
+        counted |= paid
+
+    present_days = credit.sum(axis=1)
+    working_days = counted.sum(axis=1)
+    base = data.base_salaries(rules.base_salary, rules.department_base_salaries)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        salary = np.where(
+            working_days > 0,
+            np.round(present_days / working_days * base, 2),
+            0.0
+        )
+
+    return present_days, working_days, salary
+
+
+def simulate_payroll(db, year: int, month: int, rule_sets, department=None):
+    data = PayrollMonth(db, year, month, department)
+    results = [simulate_rule_set(data, rules) for rules in rule_sets]
+
+    # Employees that would be paid under any rule set or already have a
+    # payroll for the month
+    has_payroll = ~np.isnan(data.current)
+    keep = has_payroll.copy()
+    for _, working_days, _ in results:
+        keep |= working_days > 0
+
+    current = np.where(has_payroll, data.current, 0.0)[keep]
+    scenarios = []
+    for rules, (present_days, working_days, salary) in zip(rule_sets, results):
+        salary = salary[keep]
+        deltas = np.round(salary - current, 2)
+        scenarios.append({
+            "name": rules.name,
+            "present_days": present_days[keep].tolist(),
+            "working_days": working_days[keep].tolist(),
+            "salary_amounts": salary.tolist(),
+            "deltas": deltas.tolist(),
+            "total": round(float(salary.sum()), 2),
+            "delta_total": round(float(salary.sum() - current.sum()), 2),
+            "employees_changed": int(np.count_nonzero(deltas)),
+        })
+
+    return {
+        "month": month,
+        "year": year,
+        "department": department,
+        "employee_ids": data.employee_ids[keep].tolist(),
+        "departments": [
+            name for name, kept in zip(data.departments, keep) if kept
+        ],
+        "current_amounts": np.where(
+            has_payroll[keep], data.current[keep], None
+        ).tolist(),
+        "current_total": round(float(current.sum()), 2),
+        "scenarios": scenarios,
+    }
@@ -0,0 +1,114 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from fastapi import HTTPException, Request
+
+from app.config import settings
+from app.utils.metrics import metrics
+from app.utils.security import normalize_email
+
+metrics.counter(
+    "dayflow_auth_throttled_total",
+    "Login/signup attempts rejected with 429, by endpoint and limiter",
+    ("endpoint", "scope")
+)
+metrics.counter(
+    "dayflow_auth_admitted_total",
+    "Login/signup attempts that passed admission control",
+    ("endpoint",)
+)
+
+
+class TokenBucketLimiter:
+    # One token bucket per key: `burst` tokens, refilled at `rate` tokens per
+    # second. Buckets live in a bounded LRU; a key dropped to make room
+    # starts over with a full bucket, which only matters for keys that went
+    # quiet for longer than the busiest `maxsize` others.
+
+    def __init__(self, rate: float, burst: int, maxsize: int):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.maxsize = maxsize
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def acquire(self, key, now=None):
+        # 0.0 when a token was taken, else seconds until one is available
+        now = time.monotonic() if now is None else now
+
+        with self._lock:
+            entry = self._buckets.get(key)
+            if entry is None:
+                tokens = self.burst
+            else:
+                tokens, updated = entry
+                tokens = min(self.burst, tokens + (now - updated) * self.rate)
+
+            if tokens >= 1:
+                tokens -= 1
+                wait = 0.0
+            elif self.rate > 0:
+                wait = (1 - tokens) / self.rate
+            else:
+                wait = math.inf
+
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.maxsize:
+                self._buckets.popitem(last=False)
+
+        return wait
+
+    def __len__(self):
+        return len(self._buckets)
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+ip_limiter = TokenBucketLimiter(
+    settings.auth_ip_per_minute / 60,
+    settings.auth_ip_burst,
+    settings.auth_rate_limit_keys
+)
+email_limiter = TokenBucketLimiter(
+    settings.auth_email_per_minute / 60,
+    settings.auth_email_burst,
+    settings.auth_rate_limit_keys
+)
+
+
+# -------------------------
+# ADMISSION
+# -------------------------
+def client_ip(request: Request):
+    # Behind a proxy, run uvicorn with --proxy-headers/--forwarded-allow-ips
+    # so this is the real client address
+    return request.client.host if request.client else "unknown"
+
+
+def admit(endpoint: str, request: Request, email: str):
+    if not settings.auth_rate_limit:
+        return
+
+    for scope, limiter, key in (
+        ("ip", ip_limiter, client_ip(request)),
+        ("email", email_limiter, normalize_email(email)),
+    ):
+        wait = limiter.acquire((endpoint, key))
+        if wait:
+            metrics.inc("dayflow_auth_throttled_total", (endpoint, scope))
+            raise HTTPException(
+                status_code=429,
+                detail="Too many attempts, please retry later",
+                headers={
+                    "Retry-After": str(
+                        math.ceil(wait) if math.isfinite(wait) else 3600
+                    )
+                }
+            )
+
+    metrics.inc("dayflow_auth_admitted_total", (endpoint,))
@@ -0,0 +1,102 @@
+import hashlib
+from urllib.parse import urlencode
+
+from fastapi import Response
+from sqlalchemy import insert, update
+
+from app.database.session import run_db
+from app.models.record_version import RecordVersion
+
+_NOT_MODIFIED = object()
+
+
+# -------------------------
+# VERSION COUNTERS
+# -------------------------
+def bump_record_versions(db, employee_ids, resource: str):
+    # Runs inside the caller's transaction, next to the write it describes
+    employee_ids = set(employee_ids)
+    if not employee_ids:
+        return
+
+    bumped = db.execute(
+        update(RecordVersion).where(
+            RecordVersion.employee_id.in_(employee_ids),
+            RecordVersion.resource == resource
+        ).values(
+            version=RecordVersion.version + 1
+        ).returning(RecordVersion.employee_id)
+    ).scalars().all()
+
+    missing = employee_ids.difference(bumped)
+    if missing:
+        db.execute(insert(RecordVersion), [
+            {"employee_id": employee_id, "resource": resource, "version": 1}
+            for employee_id in sorted(missing)
+        ])
+
+
+def bump_record_version(db, employee_id: int, resource: str):
+    bump_record_versions(db, (employee_id,), resource)
+
+
+def get_record_version(db, employee_id: int, resource: str):
+    return db.query(RecordVersion.version).filter(
+        RecordVersion.employee_id == employee_id,
+        RecordVersion.resource == resource
+    ).scalar() or 0
+
+
+# -------------------------
+# CONDITIONAL GET
+# -------------------------
+def make_etag(resource: str, employee_id: int, version: int, query: str = ""):
+    # Strong validator: same version and same query string = same bytes
+    digest = hashlib.blake2s(query.encode(), digest_size=6).hexdigest()
+    return f'"{resource}-{employee_id}-{version}-{digest}"'
+
+
+def etag_matches(if_none_match, etag: str):
+    # If-None-Match uses the weak comparison, so W/"x" matches "x"
+    if not if_none_match:
+        return False
+
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+async def conditional_get(db, request, response, resource: str, employee_id,
+                          fn, *args):
+    # Serve fn(db, *args) with an ETag taken from the employee's version
+    # counter. A matching If-None-Match costs one lookup on the counter and
+    # never reaches the history tables. Counter and rows are read in the
+    # same transaction, so the ETag always describes the body sent with it.
+    if employee_id is None:
+        return await run_db(db, fn, *args)
+
+    query = urlencode(sorted(request.query_params.multi_items()))
+    if_none_match = request.headers.get("if-none-match")
+
+    def load(session):
+        version = get_record_version(session, employee_id, resource)
+        etag = make_etag(resource, employee_id, version, query)
+
+        if etag_matches(if_none_match, etag):
+            return etag, _NOT_MODIFIED
+        return etag, fn(session, *args)
+
+    etag, body = await run_db(db, load)
+    headers = {
+        "ETag": etag,
+        "Cache-Control": "private, no-cache",
+        "Vary": "Authorization"
+    }
+
+    if body is _NOT_MODIFIED:
+        return Response(status_code=304, headers=headers)
+
+    response.headers.update(headers)
+    return body
@@ -1,9 +1,128 @@
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
 from passlib.context import CryptContext
+from starlette.concurrency import run_in_threadpool
+
+from app.config import settings
+from app.utils.metrics import metrics
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+metrics.counter(
+    "dayflow_password_operations_total",
+    "bcrypt hashes and verifications started, by operation",
+    ("operation",)
+)
+
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=settings.bcrypt_rounds
+)
 
 def hash_password(password: str):
     return pwd_context.hash(password)
 
 def verify_password(plain, hashed):
     return pwd_context.verify(plain, hashed)
+
+def normalize_email(email: str):
+    # One form for storing, looking up and rate limiting an address
+    return email.strip().lower()
+
+
+# -------------------------
+# PASSWORD POOL
+# -------------------------
+# bcrypt is CPU bound; running it in its own process pool keeps it from
+# filling the request thread pool during a login storm.
+class PasswordHasherBusy(Exception):
+    pass
+
+
+_executor = None
+_pending = 0
+_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=settings.password_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _executor
+
+
+async def _run_password_task(fn, *args):
+    global _pending
+    with _lock:
+        if _pending >= settings.password_queue_limit:
+            raise PasswordHasherBusy()
+        _pending += 1
+
+    try:
+        if settings.password_workers <= 0:
+            return await run_in_threadpool(fn, *args)
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_get_executor(), fn, *args)
+    finally:
+        with _lock:
+            _pending -= 1
+
+
+async def hash_password_async(password: str):
+    metrics.inc("dayflow_password_operations_total", ("hash",))
+    return await _run_password_task(hash_password, password)
+
+
+async def verify_password_async(plain, hashed):
+    metrics.inc("dayflow_password_operations_total", ("verify",))
+    return await _run_password_task(verify_password, plain, hashed)
+
+
+def _hash_many(passwords):
+    return [hash_password(password) for password in passwords]
+
+
+async def hash_passwords_async(passwords, chunk_size=8):
+    # Bulk hashing (imports): small chunks spread over the pool, at most one
+    # per worker in flight, so logins still get a worker between chunks
+    metrics.inc("dayflow_password_operations_total", ("hash",), len(passwords))
+    if settings.password_workers <= 0:
+        return await run_in_threadpool(_hash_many, passwords)
+
+    loop = asyncio.get_running_loop()
+    executor = _get_executor()
+    gate = asyncio.Semaphore(settings.password_workers)
+
+    async def run(chunk):
+        async with gate:
+            return await loop.run_in_executor(executor, _hash_many, chunk)
+
+    chunks = await asyncio.gather(*(
+        run(passwords[i:i + chunk_size])
+        for i in range(0, len(passwords), chunk_size)
+    ))
+    return [hashed for chunk in chunks for hashed in chunk]
+
+
+async def warm_password_pool():
+    # Spawn every worker now instead of on the first logins
+    if settings.password_workers > 0:
+        await asyncio.gather(*(
+            hash_password_async("warm-up")
+            for _ in range(settings.password_workers)
+        ))
+
+
+def shutdown_password_pool():
+    global _executor
+    with _lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
@@ -0,0 +1,70 @@
+import logging
+import time
+from datetime import date
+
+from app.database import db as database
+
+logger = logging.getLogger("dayflow.warmup")
+
+
+def _prime_pool(target, size: int):
+    # Check out `size` connections at once so the pool keeps them open
+    connections = [target.connect() for _ in range(size)]
+    for connection in connections:
+        connection.close()
+
+
+def _prime_jwt():
+    from app.auth.dependencies import _decode_token
+    from app.utils.token import create_access_token
+
+    _decode_token(create_access_token({"sub": "0", "role": "employee"}))
+
+
+def _prime_queries(db):
+    # Run the hot statements once with ids that match nothing, so their
+    # compiled forms are in the engine's cache before the first request
+    from app.auth.dependencies import load_principal
+    from app.models import Attendance, LeaveRequest, Payroll
+    from app.routes.attendance import ATTENDANCE_COLUMNS
+    from app.routes.leave import LEAVE_COLUMNS
+    from app.routes.payroll import PAYROLL_COLUMNS
+    from app.utils.attendance_rollup import get_attendance_rollup
+    from app.utils.leave_balance import get_leave_balances
+    from app.utils.pagination import keyset_page
+    from app.utils.record_versions import get_record_version
+
+    today = date.today()
+    with db:
+        load_principal(db, 0)
+        db.query(Attendance).filter(
+            Attendance.employee_id == 0,
+            Attendance.attendance_date == today
+        ).first()
+        get_attendance_rollup(db, 0, today.year, today.month)
+        get_leave_balances(db, 0, today.year)
+        get_record_version(db, 0, "attendance")
+        keyset_page(
+            db.query(*ATTENDANCE_COLUMNS),
+            [Attendance.attendance_date, Attendance.id], 1
+        )
+        keyset_page(
+            db.query(*LEAVE_COLUMNS), [LeaveRequest.start_date, LeaveRequest.id], 1
+        )
+        keyset_page(
+            db.query(*PAYROLL_COLUMNS),
+            [Payroll.year, Payroll.month, Payroll.id], 1
+        )
+
+
+def warm_up(pool_size: int):
+    started = time.perf_counter()
+    _prime_pool(database.engine, pool_size)
+    _prime_jwt()
+    _prime_queries(database.SessionLocal())
+    if database.read_engine is not None:
+        _prime_pool(database.read_engine, pool_size)
+        _prime_queries(database.read_session())
+    logger.info(
+        "Warm-up finished in %.0f ms", (time.perf_counter() - started) * 1000
+    )
@@ -0,0 +1,86 @@
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from contextlib import asynccontextmanager
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(latencies, statuses, elapsed=None, queries=None):
+    summary = {
+        "requests": len(latencies),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "max_ms": round(max(latencies, default=0) * 1000, 2),
+        "statuses": {str(k): statuses.count(k) for k in sorted(set(statuses))},
+    }
+    if elapsed is not None:
+        summary["elapsed_s"] = round(elapsed, 3)
+        summary["throughput_rps"] = round(len(latencies) / elapsed, 1) if elapsed else 0.0
+    if queries is not None:
+        summary["queries_per_request"] = round(queries / len(latencies), 2) if latencies else 0.0
+    return summary
+
+
+def use_scratch_directory():
+    # The app uses ./dayflow.db; benchmarks run inside a throwaway directory
+    sys.path.insert(0, os.getcwd())
+    os.chdir(tempfile.mkdtemp(prefix="dayflow-bench-"))
+
+
+def prepare_schema():
+    # Workers no longer create tables on import; do what `app.cli migrate` does
+    from app.database.db import engine
+    from app.database.migrations import upgrade_schema
+
+    upgrade_schema(engine)
+
+
+def statement_count():
+    from app.utils.metrics import metrics
+
+    return metrics.value("dayflow_db_statements_total")
+
+
+@asynccontextmanager
+async def asgi_client(app):
+    import httpx
+
+    # ASGITransport does not run startup/shutdown, so enter the lifespan here
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app), httpx.AsyncClient(
+        transport=transport, base_url="http://bench", timeout=None
+    ) as client:
+        yield client
+
+
+async def run_requests(client, requests, concurrency: int):
+    # requests: [(method, url, kwargs)] -> summary with latency percentiles,
+    # throughput and SQL statements per request
+    in_flight = asyncio.Semaphore(concurrency)
+    latencies = []
+    statuses = []
+
+    async def timed(method, url, kwargs):
+        async with in_flight:
+            started = time.perf_counter()
+            response = await client.request(method, url, **kwargs)
+            latencies.append(time.perf_counter() - started)
+            statuses.append(response.status_code)
+
+    queries = statement_count()
+    started = time.perf_counter()
+    await asyncio.gather(*(timed(*request) for request in requests))
+    elapsed = time.perf_counter() - started
+
+    return summarize(
+        latencies, statuses, elapsed, statement_count() - queries
+    )
@@ -0,0 +1,203 @@
+"""Synthetic data generator for benchmarks.
+
+Fills a database with N employees, Y years of attendance up to yesterday,
+leave requests and monthly payrolls, using bulk inserts only:
+
+    python -m benchmarks.datagen --employees 1000 --years 2
+
+Everything is derived from --seed, so the same arguments give the same data.
+Every user's password is "password".
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, time as clock, timedelta
+
+PASSWORD = "password"
+CHUNK_SIZE = 5000
+LEAVE_TYPES = ("Paid", "Sick", "Unpaid")
+
+
+def email_for(index: int):
+    return f"user{index}@bench.local"
+
+
+def _insert_chunks(conn, table, rows):
+    from sqlalchemy import insert
+
+    for start in range(0, len(rows), CHUNK_SIZE):
+        conn.execute(insert(table), rows[start:start + CHUNK_SIZE])
+    return len(rows)
+
+
+def _working_days(start: date, end: date):
+    day = start
+    while day <= end:
+        if day.weekday() < 5:
+            yield day
+        day += timedelta(days=1)
+
+
+def _month_starts(start: date, end: date):
+    month = date(start.year, start.month, 1)
+    while month <= end:
+        yield month
+        month = date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def generate(engine, employees=200, years=1, departments=10, seed=42,
+             admins=1):
+    from app.models import Attendance, Employee, LeaveRequest, Payroll, User
+    from app.utils.attendance_rollup import rebuild_attendance_rollups
+    from app.utils.leave_balance import recompute_leave_balances
+    from app.utils.security import hash_password
+
+    rng = random.Random(seed)
+    hashed = hash_password(PASSWORD)
+    end = date.today() - timedelta(days=1)
+    start = end - timedelta(days=365 * years - 1)
+    counts = {}
+
+    with engine.begin() as conn:
+        counts["users"] = _insert_chunks(conn, User.__table__, [
+            {
+                "id": i + 1,
+                "email": email_for(i),
+                "password": hashed,
+                "role": "admin" if i < admins else "employee"
+            }
+            for i in range(employees)
+        ])
+
+        counts["employees"] = _insert_chunks(conn, Employee.__table__, [
+            {
+                "id": i + 1,
+                "user_id": i + 1,
+                "full_name": f"Employee {i}",
+                "department": f"Dept {i % departments:02d}",
+                "designation": "Engineer"
+            }
+            for i in range(employees)
+        ])
+
+        # Attendance: ~92% of working days, 08:00-10:00 in, 8-9h later out
+        rows = []
+        total = 0
+        for day in _working_days(start, end):
+            for employee_id in range(1, employees + 1):
+                if rng.random() > 0.92:
+                    continue
+                check_in = datetime.combine(day, clock(8)) + timedelta(
+                    minutes=rng.randrange(120)
+                )
+                minutes = rng.randrange(480, 540)
+                rows.append({
+                    "employee_id": employee_id,
+                    "attendance_date": day,
+                    "check_in": check_in.time(),
+                    "check_out": (check_in + timedelta(minutes=minutes)).time(),
+                    "work_hours": minutes
+                })
+            if len(rows) >= CHUNK_SIZE:
+                total += _insert_chunks(conn, Attendance.__table__, rows)
+                rows = []
+        counts["attendance"] = total + _insert_chunks(
+            conn, Attendance.__table__, rows
+        )
+
+        # Leaves: a few non-overlapping requests per employee per year
+        rows = []
+        span = (end - start).days
+        for employee_id in range(1, employees + 1):
+            offsets = sorted(rng.sample(range(0, span, 20), min(4 * years, span // 20)))
+            for offset in offsets:
+                first = start + timedelta(days=offset)
+                rows.append({
+                    "employee_id": employee_id,
+                    "leave_type": rng.choice(LEAVE_TYPES),
+                    "start_date": first,
+                    "end_date": first + timedelta(days=rng.randrange(3)),
+                    "reason": "benchmark",
+                    "status": rng.choice(("Approved", "Approved", "Rejected", "Pending")),
+                    "applied_on": first - timedelta(days=7)
+                })
+        counts["leave_requests"] = _insert_chunks(
+            conn, LeaveRequest.__table__, rows
+        )
+
+        counts["attendance_monthly"] = rebuild_attendance_rollups(conn)
+        counts["leave_balances"] = recompute_leave_balances(conn)
+
+        # Payrolls for every complete month, straight from the rollups
+        this_month = date(end.year, end.month, 1)
+        rows = [
+            {
+                "employee_id": employee_id,
+                "month": month,
+                "year": year,
+                "present_days": present_days,
+                "salary_amount": round(present_days / total_days * 50000, 2),
+                "status": "Paid"
+            }
+            for employee_id, year, month, present_days, total_days in conn.execute(
+                _rollup_rows()
+            )
+            if date(year, month, 1) < this_month and total_days
+        ]
+        counts["payrolls"] = _insert_chunks(conn, Payroll.__table__, rows)
+
+    return counts
+
+
+def _rollup_rows():
+    from sqlalchemy import select
+
+    from app.models import AttendanceMonthly
+
+    return select(
+        AttendanceMonthly.employee_id,
+        AttendanceMonthly.year,
+        AttendanceMonthly.month,
+        AttendanceMonthly.present_days,
+        AttendanceMonthly.total_days
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--employees", type=int, default=200)
+    parser.add_argument("--years", type=int, default=1)
+    parser.add_argument("--departments", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--database-url",
+        help="target database (default: DATABASE_URL); must be empty"
+    )
+    args = parser.parse_args(argv)
+
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    sys.path.insert(0, os.getcwd())
+
+    from app.database.db import engine
+    from app.database.migrations import upgrade_schema
+
+    upgrade_schema(engine)
+
+    started = time.perf_counter()
+    counts = generate(
+        engine, args.employees, args.years, args.departments, args.seed
+    )
+
+    print(json.dumps({
+        "database": engine.url.render_as_string(hide_password=True),
+        "elapsed_s": round(time.perf_counter() - started, 2),
+        **counts,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""Mixed login storm: login p99 vs check-in p99.
+
+Runs the app in-process against a throwaway database. Compare the
+dedicated password pool with the old behaviour (bcrypt on the request
+thread pool) by setting the worker count to 0:
+
+    python -m benchmarks.login_storm --password-workers 4
+    python -m benchmarks.login_storm --password-workers 0
+
+--flood adds credential stuffing from a single address (wrong passwords
+over every account); compare bcrypt work and CPU with and without the
+login/signup admission limits:
+
+    python -m benchmarks.login_storm --flood 2000 --rate-limit
+    python -m benchmarks.login_storm --flood 2000
+
+Requires httpx.
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import time
+from contextlib import AsyncExitStack
+
+from benchmarks.common import prepare_schema, summarize, use_scratch_directory
+
+
+def seed(employees: int):
+    from app.database.db import SessionLocal
+    from app.models import Employee, User
+    from app.utils.security import hash_password
+    from app.utils.token import create_access_token
+
+    hashed = hash_password("password")
+    db = SessionLocal()
+    try:
+        users = [
+            User(email=f"user{i}@bench.local", password=hashed, role="employee")
+            for i in range(employees)
+        ]
+        db.add_all(users)
+        db.flush()
+        db.add_all(
+            Employee(user_id=u.id, full_name=f"user{u.id}") for u in users
+        )
+        db.commit()
+
+        return [
+            create_access_token({"sub": str(u.id), "role": u.role})
+            for u in users
+        ]
+    finally:
+        db.close()
+
+
+def cpu_seconds():
+    # this process plus password workers that have exited
+    total = 0.0
+    for who in (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN):
+        usage = resource.getrusage(who)
+        total += usage.ru_utime + usage.ru_stime
+    return total
+
+
+async def storm(app, tokens, logins: int, concurrency: int, flood: int):
+    import httpx
+
+    results = {"login": ([], []), "check-in": ([], [])}
+    if flood:
+        results["flood"] = ([], [])
+    in_flight = asyncio.Semaphore(concurrency)
+
+    async def timed(kind, client, method, url, **kwargs):
+        async with in_flight:
+            started = time.perf_counter()
+            response = await client.request(method, url, **kwargs)
+            results[kind][0].append(time.perf_counter() - started)
+            results[kind][1].append(response.status_code)
+
+    def client_for(address):
+        # one client per source address, so per-IP limits see distinct users
+        return httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app, client=(address, 50000)),
+            base_url="http://bench"
+        )
+
+    # ASGITransport does not run startup/shutdown, so enter the lifespan here
+    async with app.router.lifespan_context(app), AsyncExitStack() as stack:
+        users = [
+            await stack.enter_async_context(
+                client_for(f"10.0.{i // 250}.{i % 250 + 1}")
+            )
+            for i in range(len(tokens))
+        ]
+        attacker = await stack.enter_async_context(client_for("203.0.113.7"))
+
+        tasks = [
+            timed(
+                "login", users[i % len(users)], "POST", "/auth/login",
+                json={
+                    "email": f"user{i % len(tokens)}@bench.local",
+                    "password": "password"
+                }
+            )
+            for i in range(logins)
+        ]
+        tasks += [
+            timed(
+                "flood", attacker, "POST", "/auth/login",
+                json={
+                    "email": f"user{i % len(tokens)}@bench.local",
+                    "password": f"guess{i}"
+                }
+            )
+            for i in range(flood)
+        ]
+        tasks += [
+            timed(
+                "check-in", users[i], "POST", "/attendance/check-in",
+                headers={"Authorization": f"Bearer {token}"}
+            )
+            for i, token in enumerate(tokens)
+        ]
+
+        started = time.perf_counter()
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started
+
+    return elapsed, {
+        kind: summarize(latencies, statuses)
+        for kind, (latencies, statuses) in results.items()
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--employees", type=int, default=200)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--password-workers", type=int, default=None)
+    parser.add_argument("--bcrypt-rounds", type=int, default=None)
+    parser.add_argument("--flood", type=int, default=0,
+                        help="bad-password logins from one attacking address")
+    parser.add_argument("--rate-limit", action="store_true",
+                        help="enable login/signup admission limits")
+    args = parser.parse_args(argv)
+
+    os.environ["DAYFLOW_AUTH_RATE_LIMIT"] = "1" if args.rate_limit else "0"
+
+    if args.password_workers is not None:
+        os.environ["DAYFLOW_PASSWORD_WORKERS"] = str(args.password_workers)
+    if args.bcrypt_rounds is not None:
+        os.environ["DAYFLOW_BCRYPT_ROUNDS"] = str(args.bcrypt_rounds)
+
+    use_scratch_directory()
+
+    from app.config import settings
+    from app.main import app
+    from app.utils.metrics import metrics
+    from app.utils.security import shutdown_password_pool
+
+    prepare_schema()
+    tokens = seed(args.employees)
+    cpu_started = cpu_seconds()
+    try:
+        elapsed, report = asyncio.run(
+            storm(app, tokens, args.logins, args.concurrency, args.flood)
+        )
+    finally:
+        shutdown_password_pool()
+    cpu = cpu_seconds() - cpu_started
+
+    print(json.dumps({
+        "scenario": "login_storm",
+        "password_workers": settings.password_workers,
+        "bcrypt_rounds": settings.bcrypt_rounds,
+        "auth_rate_limit": settings.auth_rate_limit,
+        "concurrency": args.concurrency,
+        "elapsed_s": round(elapsed, 3),
+        "cpu_s": round(cpu, 2),
+        "bcrypt_verifications": metrics.value(
+            "dayflow_password_operations_total", ("verify",)
+        ),
+        "throttled": {
+            scope: metrics.value(
+                "dayflow_auth_throttled_total", ("login", scope)
+            )
+            for scope in ("ip", "email")
+        },
+        **report,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
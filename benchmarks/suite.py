@@ -0,0 +1,245 @@
+"""Benchmark suite: check-in storm, month-end payroll, admin lists, logins.
+
+Generates a synthetic dataset (see benchmarks.datagen) in a throwaway
+directory, runs every scenario in-process over the ASGI transport and
+prints one JSON document, optionally saved and compared with an earlier run:
+
+    python -m benchmarks.suite --employees 500 --years 1 --output run.json
+    python -m benchmarks.suite --employees 500 --years 1 --compare run.json
+
+Results carry the git commit, so runs from different commits can be kept
+side by side. Requires httpx.
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from datetime import date, timedelta
+
+from benchmarks.common import (
+    asgi_client,
+    prepare_schema,
+    run_requests,
+    use_scratch_directory,
+)
+from benchmarks.datagen import email_for, generate
+
+SCENARIOS = ("checkin_storm", "month_end_payroll", "admin_lists", "login_burst")
+PAGE_SIZE = 500
+
+
+def _git_commit(path):
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=path, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _tokens(employees: int):
+    from app.utils.token import create_access_token
+
+    # user 1 is the admin (see datagen); everyone else is an employee
+    return [
+        create_access_token(
+            {"sub": str(user_id), "role": "admin" if user_id == 1 else "employee"}
+        )
+        for user_id in range(1, employees + 1)
+    ]
+
+
+def _auth(token):
+    return {"headers": {"Authorization": f"Bearer {token}"}}
+
+
+# -------------------------
+# SCENARIOS
+# -------------------------
+async def checkin_storm(client, tokens, args):
+    # every employee checks in at once, then checks out
+    report = {}
+    for kind in ("check-in", "check-out"):
+        report[kind] = await run_requests(client, [
+            ("POST", f"/attendance/{kind}", _auth(token)) for token in tokens[1:]
+        ], args.concurrency)
+    return report
+
+
+async def month_end_payroll(client, tokens, args):
+    last_month = date.today().replace(day=1) - timedelta(days=1)
+    params = {
+        "month": last_month.month,
+        "year": last_month.year,
+        "base_salary": 50000,
+        "overwrite": "true"
+    }
+    return {
+        "batch": await run_requests(client, [
+            ("POST", "/payroll/generate/batch", {**_auth(tokens[0]), "params": params})
+            for _ in range(args.repeat)
+        ], 1)
+    }
+
+
+async def admin_lists(client, tokens, args):
+    admin = _auth(tokens[0])
+    today = date.today()
+    month_ago = today - timedelta(days=30)
+    lists = {
+        "attendance_page": ("/attendance/all", {"limit": PAGE_SIZE}),
+        "leaves_page": ("/leaves/all", {"limit": PAGE_SIZE}),
+        "payroll_page": ("/payroll/all", {"limit": PAGE_SIZE}),
+        "presence_30d": ("/analytics/presence", {
+            "start_date": month_ago.isoformat(), "end_date": today.isoformat()
+        }),
+        "who_is_out_30d": ("/leaves/out", {
+            "from": month_ago.isoformat(), "to": today.isoformat()
+        }),
+    }
+
+    report = {}
+    for name, (url, params) in lists.items():
+        # one untimed request first: principal cache and page cache warm-up
+        await client.get(url, params=params, **admin)
+        report[name] = await run_requests(client, [
+            ("GET", url, {**admin, "params": params}) for _ in range(args.repeat)
+        ], args.concurrency)
+    return report
+
+
+async def login_burst(client, tokens, args):
+    return {
+        "login": await run_requests(client, [
+            ("POST", "/auth/login", {
+                "json": {"email": email_for(i % len(tokens)), "password": "password"}
+            })
+            for i in range(args.logins)
+        ], args.concurrency)
+    }
+
+
+async def run_scenarios(app, tokens, args):
+    report = {}
+    async with asgi_client(app) as client:
+        for name in args.scenarios:
+            report[name] = await globals()[name](client, tokens, args)
+    return report
+
+
+# -------------------------
+# COMPARISON
+# -------------------------
+def compare(baseline, current, tolerance: float):
+    # Regressions: p99 up or throughput down by more than `tolerance`
+    regressions = []
+    for scenario, steps in current["scenarios"].items():
+        for step, result in steps.items():
+            before = baseline.get("scenarios", {}).get(scenario, {}).get(step)
+            if not before:
+                continue
+            if result["p99_ms"] > before["p99_ms"] * (1 + tolerance):
+                regressions.append(
+                    f"{scenario}.{step}: p99 {before['p99_ms']} -> {result['p99_ms']} ms"
+                )
+            if result["throughput_rps"] < before["throughput_rps"] * (1 - tolerance):
+                regressions.append(
+                    f"{scenario}.{step}: throughput {before['throughput_rps']} -> "
+                    f"{result['throughput_rps']} req/s"
+                )
+            if result["queries_per_request"] > before["queries_per_request"]:
+                regressions.append(
+                    f"{scenario}.{step}: queries/request "
+                    f"{before['queries_per_request']} -> {result['queries_per_request']}"
+                )
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--employees", type=int, default=200)
+    parser.add_argument("--years", type=int, default=1)
+    parser.add_argument("--departments", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--repeat", type=int, default=20,
+                        help="requests per admin list / payroll step")
+    parser.add_argument("--logins", type=int, default=100)
+    parser.add_argument("--bcrypt-rounds", type=int, default=None)
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS,
+                        default=list(SCENARIOS))
+    parser.add_argument("--output", help="write the JSON report to this file")
+    parser.add_argument("--compare", help="earlier JSON report to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="allowed relative slowdown before flagging (0.2 = 20%%)")
+    args = parser.parse_args(argv)
+
+    if args.bcrypt_rounds is not None:
+        os.environ["DAYFLOW_BCRYPT_ROUNDS"] = str(args.bcrypt_rounds)
+    # every request comes from one address; login_burst measures bcrypt,
+    # not the admission limits (see benchmarks.login_storm --flood)
+    os.environ.setdefault("DAYFLOW_AUTH_RATE_LIMIT", "0")
+
+    repo = os.getcwd()
+    baseline = None
+    if args.compare:
+        with open(args.compare) as handle:
+            baseline = json.load(handle)
+    output = os.path.abspath(args.output) if args.output else None
+
+    use_scratch_directory()
+
+    from app.config import settings
+    from app.database.db import engine
+    from app.main import app
+    from app.utils.security import shutdown_password_pool
+
+    prepare_schema()
+    started = time.perf_counter()
+    dataset = generate(
+        engine, args.employees, args.years, args.departments, args.seed
+    )
+    dataset["elapsed_s"] = round(time.perf_counter() - started, 2)
+
+    try:
+        scenarios = asyncio.run(run_scenarios(app, _tokens(args.employees), args))
+    finally:
+        shutdown_password_pool()
+
+    report = {
+        "commit": _git_commit(repo),
+        "settings": {
+            "employees": args.employees,
+            "years": args.years,
+            "concurrency": args.concurrency,
+            "repeat": args.repeat,
+            "bcrypt_rounds": settings.bcrypt_rounds,
+            "password_workers": settings.password_workers,
+            "auth_rate_limit": settings.auth_rate_limit,
+            "db_async": settings.db_async,
+            "group_commit": settings.group_commit,
+        },
+        "dataset": dataset,
+        "scenarios": scenarios,
+    }
+
+    if baseline is not None:
+        report["baseline_commit"] = baseline.get("commit")
+        report["regressions"] = compare(baseline, report, args.tolerance)
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if output:
+        with open(output, "w") as handle:
+            handle.write(text + "\n")
+
+    if report.get("regressions"):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
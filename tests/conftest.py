@@ -0,0 +1,57 @@
+import os
+import tempfile
+
+# Settings and engines are built at import time, so the environment has to
+# be in place before anything from app is imported
+_tmp = tempfile.mkdtemp(prefix="dayflow-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmp}/dayflow.db"
+os.environ["DAYFLOW_EXPORT_DIR"] = os.path.join(_tmp, "exports")
+os.environ["DAYFLOW_PASSWORD_WORKERS"] = "0"
+os.environ["DAYFLOW_BCRYPT_ROUNDS"] = "4"
+os.environ["DAYFLOW_AUTH_RATE_LIMIT"] = "0"
+os.environ["DAYFLOW_SCHEMA_AUTO_CREATE"] = "0"
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.database.db import SessionLocal, engine
+from app.database.migrations import upgrade_schema
+
+
+@pytest.fixture(scope="session")
+def schema():
+    upgrade_schema(engine)
+
+
+@pytest.fixture
+def db(schema):
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture(scope="module")
+def client(schema):
+    # Module scoped: the lifespan starts the job runner, which should not
+    # pick up rows other modules put in the jobs table
+    from app.main import app
+
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture(scope="module")
+def login(client):
+    def login(email: str, role: str = "employee"):
+        client.post(
+            "/auth/signup",
+            json={"email": email, "password": "pw", "role": role}
+        )
+        response = client.post(
+            "/auth/login", json={"email": email, "password": "pw"}
+        )
+        return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    return login
@@ -0,0 +1,16 @@
+from dataclasses import replace
+
+import pytest
+
+from app.config import settings
+from app.main import create_app
+
+
+def test_create_app_accepts_app_settings():
+    app = create_app(replace(settings, warmup=True, group_commit=True))
+    assert app.state.settings.group_commit
+
+
+def test_create_app_rejects_process_wide_settings():
+    with pytest.raises(ValueError, match="db_pool_size"):
+        create_app(replace(settings, db_pool_size=settings.db_pool_size + 1))
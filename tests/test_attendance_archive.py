@@ -0,0 +1,270 @@
+import random
+from datetime import date, time
+
+import numpy as np
+import pytest
+
+from app.models.attendance import Attendance
+from app.models.attendance_archive import AttendanceArchive
+from app.models.employee import Employee
+from app.routes.analytics import presence_cache
+from app.utils.attendance_archive import (
+    RECORD,
+    ArchivedAttendance,
+    archive_attendance,
+    iter_archived_attendance,
+    max_archived_id,
+    pack_month,
+    unpack_month,
+)
+from app.utils.attendance_rollup import rebuild_attendance_rollups
+
+
+# -------------------------
+# PACKING
+# -------------------------
+def test_pack_unpack_round_trip():
+    days = {
+        1: (10, time(9, 0, 0, 123456), time(17, 30), 510),
+        2: (11, time(9, 15), None, None),
+        17: (12, None, None, None),
+        31: (13, time(0, 0), time(23, 59, 59, 999999), 0),
+    }
+
+    packed = pack_month(days)
+
+    assert packed["day_bitmap"] == (1 << 0) | (1 << 1) | (1 << 16) | (1 << 30)
+    assert packed["present_bitmap"] == (1 << 0) | (1 << 1) | (1 << 30)
+    assert packed["present_days"] == 3
+    assert packed["total_days"] == 4
+    assert packed["work_minutes"] == 510
+    assert len(packed["records"]) == 4 * RECORD.itemsize
+
+    assert unpack_month(packed["day_bitmap"], packed["records"]) == days
+
+
+def test_pack_empty_month():
+    packed = pack_month({})
+
+    assert packed["day_bitmap"] == 0
+    assert unpack_month(0, packed["records"]) == {}
+
+
+# -------------------------
+# READS BEFORE AND AFTER ARCHIVING
+# -------------------------
+def _seed(db, employee_ids):
+    rng = random.Random(1)
+    for employee_id, department in zip(employee_ids, ("Eng", "Ops", None)):
+        db.get(Employee, employee_id).department = department
+
+        for month, days in ((2, 28), (3, 31)):
+            for day in range(1, days + 1):
+                roll = rng.random()
+                if roll < 0.15:
+                    continue
+                row = Attendance(
+                    employee_id=employee_id,
+                    attendance_date=date(2026, month, day)
+                )
+                if roll >= 0.25:
+                    row.check_in = time(9, 0, 0, rng.randrange(10 ** 6))
+                if roll >= 0.35:
+                    row.check_out = time(17, 30)
+                    row.work_hours = rng.randrange(200, 600)
+                db.add(row)
+
+        # April stays live
+        db.add(Attendance(
+            employee_id=employee_id, attendance_date=date(2026, 4, 1),
+            check_in=time(8), check_out=time(16), work_hours=480
+        ))
+
+    db.commit()
+    rebuild_attendance_rollups(db)
+    db.commit()
+
+
+def _all_pages(client, headers, limit):
+    rows, cursor = [], None
+    while True:
+        params = {"limit": limit, **({"cursor": cursor} if cursor else {})}
+        page = client.get("/attendance/all", params=params, headers=headers).json()
+        rows += page["items"]
+        cursor = page["next_cursor"]
+        if not cursor:
+            return rows
+
+
+def _reads(client, admin, employees):
+    presence_cache.clear()
+    presence = "/analytics/presence?start_date=2026-02-01&end_date=2026-04-01"
+    simulation = {
+        "month": 3,
+        "year": 2026,
+        "scenarios": [
+            {"name": "calendar", "base_salary": 1000, "half_day_minutes": 300},
+            {"name": "weekdays", "base_salary": 1000, "working_days": "weekdays"},
+        ],
+    }
+
+    return {
+        "me": [client.get("/attendance/me", headers=h).json() for h in employees],
+        "all": client.get("/attendance/all", headers=admin).json(),
+        "all_range": client.get(
+            "/attendance/all?start_date=2026-02-10&end_date=2026-03-05",
+            headers=admin
+        ).json(),
+        "pages": _all_pages(client, admin, 37),
+        "stream": client.get(
+            "/attendance/all?stream=true", headers=admin
+        ).text,
+        "summary": [
+            client.get("/attendance/me/summary?month=3&year=2026", headers=h).json()
+            for h in employees
+        ],
+        "export": client.get("/attendance/export", headers=admin).text,
+        "export_department": client.get(
+            "/attendance/export?department=Eng&start_date=2026-02-20",
+            headers=admin
+        ).text,
+        "presence": client.get(presence, headers=admin).json(),
+        "presence_department": client.get(
+            presence + "&department=Unassigned", headers=admin
+        ).json(),
+        "simulation": client.post(
+            "/payroll/simulate", json=simulation, headers=admin
+        ).json(),
+    }
+
+
+@pytest.fixture(scope="module")
+def archived(client, login, schema):
+    from app.database.db import SessionLocal
+
+    admin = login("archive-admin@example.com", "admin")
+    employees = [login(f"archive-{i}@example.com") for i in range(3)]
+    employee_ids = [
+        client.get("/employees/me", headers=h).json()["id"] for h in employees
+    ]
+
+    with SessionLocal() as db:
+        _seed(db, employee_ids)
+        raw = [
+            (row.attendance_date, row.id, row.employee_id, row.check_in,
+             row.check_out, row.work_hours)
+            for row in db.query(Attendance).filter(
+                Attendance.employee_id.in_(employee_ids)
+            )
+        ]
+
+        before = _reads(client, admin, employees)
+        result = archive_attendance(db, date(2026, 4, 1))
+        after = _reads(client, admin, employees)
+        live = db.query(Attendance).filter(
+            Attendance.employee_id.in_(employee_ids)
+        ).count()
+
+    return {
+        "before": before, "after": after, "result": result, "live": live,
+        "raw": raw, "employee_ids": employee_ids,
+    }
+
+
+def test_archiving_moves_closed_months(archived):
+    assert archived["result"] == (2, len(archived["raw"]) - 3)
+    assert archived["live"] == 3
+
+
+@pytest.mark.parametrize("read", [
+    "me", "all", "all_range", "pages", "stream", "summary", "export",
+    "export_department", "presence", "presence_department", "simulation",
+])
+def test_reads_unchanged_by_archiving(archived, read):
+    assert archived["before"][read] == archived["after"][read]
+
+
+def test_pages_match_full_list(archived):
+    assert len(archived["after"]["all"]) > 100
+    assert archived["after"]["pages"] == archived["after"]["all"]
+    assert len(archived["after"]["stream"].splitlines()) == len(
+        archived["after"]["all"]
+    )
+    assert "scenarios" in archived["after"]["simulation"]
+
+
+def _expected(archived, start=None, end=None):
+    rows = [
+        row for row in archived["raw"]
+        if row[0].month in (2, 3)
+        and (start is None or row[0] >= start)
+        and (end is None or row[0] <= end)
+    ]
+    return sorted(rows, key=lambda row: (row[0], row[1]), reverse=True)
+
+
+def _as_tuple(row):
+    return (
+        row["attendance_date"], row["id"], row["employee_id"],
+        row["check_in"], row["check_out"], row["work_hours"]
+    )
+
+
+def test_archived_attendance_arrays(db, archived):
+    data = ArchivedAttendance(db, 2026, 3)
+    ours = np.isin(data.employee_ids, archived["employee_ids"])
+
+    rows = sorted(
+        _as_tuple(data.row(i)) for i in np.flatnonzero(ours)
+    )
+    expected = sorted(_expected(archived, date(2026, 3, 1), date(2026, 3, 31)))
+    assert rows == expected
+
+    data.sort_by_key()
+    assert np.all(np.diff(data.keys) > 0)
+
+
+def test_iter_archived_attendance_order_and_cursor(db, archived):
+    employee_ids = set(archived["employee_ids"])
+
+    def ours(rows):
+        return [_as_tuple(row) for row in rows if row["employee_id"] in employee_ids]
+
+    assert ours(iter_archived_attendance(db)) == _expected(archived)
+
+    start, end = date(2026, 2, 10), date(2026, 3, 5)
+    assert ours(iter_archived_attendance(db, start, end)) == _expected(
+        archived, start, end
+    )
+
+    expected = _expected(archived)
+    cursor = expected[20]
+    assert ours(iter_archived_attendance(db, after=cursor[:2])) == expected[21:]
+
+
+def test_archive_rows_are_per_employee_month(db, archived):
+    count = db.query(AttendanceArchive).filter(
+        AttendanceArchive.employee_id.in_(archived["employee_ids"])
+    ).count()
+    assert count == 2 * len(archived["employee_ids"])
+
+
+# runs last: archives every closed month, not just the fixture's
+def test_current_month_is_never_archived(client, login, db, archived):
+    admin = login("archive-admin@example.com", "admin")
+    employee = login("archive-today@example.com")
+    client.get("/employees/me", headers=employee)
+    assert client.post("/attendance/check-in", headers=employee).status_code == 200
+
+    response = client.post("/jobs/archive-attendance?before=2099-01-01", headers=admin)
+    assert response.status_code == 400
+
+    archive_attendance(db, date(2099, 1, 1))
+    assert client.post("/attendance/check-out", headers=employee).status_code == 200
+
+    today = [
+        row for row in client.get("/attendance/me", headers=employee).json()
+        if row["attendance_date"] == date.today().isoformat()
+    ]
+    assert len(today) == 1
+    assert today[0]["id"] > max_archived_id(db)
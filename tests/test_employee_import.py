@@ -0,0 +1,60 @@
+import pytest
+
+from app.routes import employee as employee_routes
+
+
+@pytest.fixture(scope="module")
+def admin(login):
+    return login("import-admin@example.com", "admin")
+
+
+def _import(client, headers, body: bytes):
+    return client.post(
+        "/employees/import", headers=headers,
+        files={"file": ("people.csv", body, "text/csv")}
+    )
+
+
+def _rows(prefix: str, count: int):
+    return b"".join(
+        f"{prefix}{i}@example.com,pw{i},Ops\n".encode() for i in range(count)
+    )
+
+
+def test_rows_are_imported_in_batches_as_they_are_read(client, admin,
+                                                        monkeypatch):
+    monkeypatch.setattr(employee_routes, "IMPORT_BATCH_SIZE", 10)
+    sizes = []
+    import_batch = employee_routes._import_batch
+
+    async def recording(db, batch, errors):
+        sizes.append(len(batch))
+        return await import_batch(db, batch, errors)
+
+    monkeypatch.setattr(employee_routes, "_import_batch", recording)
+
+    body = b"email,password,department\n" + _rows("batched", 25)
+    response = _import(client, admin, body)
+
+    assert response.json()["created"] == 25
+    assert response.json()["total_rows"] == 25
+    assert sizes == [10, 10, 5]
+
+
+def test_undecodable_upload_is_rejected(client, admin):
+    response = _import(client, admin, b"email,password\n\xff\xfe@x,pw\n")
+    assert response.status_code == 400
+    assert response.json()["detail"] == "CSV must be UTF-8 encoded"
+
+
+def test_bad_bytes_halfway_keep_the_committed_batches(client, admin,
+                                                      monkeypatch):
+    monkeypatch.setattr(employee_routes, "IMPORT_BATCH_SIZE", 100)
+    # Well past the text wrapper's first read, so earlier batches commit
+    body = b"email,password,department\n" + _rows("halfway", 600) + b"\xff\n"
+    response = _import(client, admin, body)
+
+    result = response.json()
+    assert response.status_code == 200
+    assert result["created"] >= 100
+    assert result["errors"][-1]["error"] == "CSV must be UTF-8 encoded"
@@ -0,0 +1,150 @@
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.database.db import SessionLocal
+from app.models.job import Job
+from app.utils.jobs import JobRunner
+
+
+def _runner(**overrides):
+    options = dict(workers=1, queue_limit=10, stale_after=30, max_attempts=2)
+    options.update(overrides)
+    # never started: no worker threads, so recover() does not run anything
+    return JobRunner(SessionLocal, **options)
+
+
+@pytest.fixture
+def make_job(db):
+    def make_job(job_type="test", status="queued", **values):
+        job = Job(job_type=job_type, status=status, params={}, **values)
+        db.add(job)
+        db.commit()
+        return job.id
+
+    return make_job
+
+
+def _job(db, job_id):
+    db.expire_all()
+    return db.get(Job, job_id)
+
+
+def test_only_one_worker_claims_a_job(db, make_job):
+    job_id = make_job()
+    first, second = _runner(), _runner()
+
+    assert first._claim(job_id)
+    assert not second._claim(job_id)
+    assert not first._claim(job_id)
+
+    job = _job(db, job_id)
+    assert (job.status, job.owner, job.attempts) == (
+        "running", first.worker_id, 1
+    )
+
+
+def test_recover_requeues_stale_resumable_jobs(db, make_job):
+    runner = _runner()
+    runner.register("test", lambda db, params, progress: {})
+    stale = datetime.now() - timedelta(seconds=60)
+
+    job_id = make_job(
+        status="running", owner="gone", attempts=1, heartbeat_at=stale
+    )
+    fresh_id = make_job(
+        status="running", owner="alive", attempts=1,
+        heartbeat_at=datetime.now()
+    )
+
+    runner.recover()
+
+    job = _job(db, job_id)
+    assert (job.status, job.owner) == ("queued", None)
+    assert _job(db, fresh_id).status == "running"
+
+
+@pytest.mark.parametrize("resumable, attempts", [(False, 1), (True, 2)])
+def test_recover_fails_jobs_that_cannot_be_retried(db, make_job, resumable,
+                                                    attempts):
+    runner = _runner(max_attempts=2)
+    runner.register("test", lambda db, params, progress: {}, resumable=resumable)
+
+    job_id = make_job(
+        status="running", owner="gone", attempts=attempts,
+        heartbeat_at=datetime.now() - timedelta(seconds=60)
+    )
+
+    runner.recover()
+
+    job = _job(db, job_id)
+    assert job.status == "failed"
+    assert job.error == "Interrupted before it finished"
+
+
+def test_stopping_requeues_interrupted_job(db, make_job):
+    def handler(db, params, progress):
+        progress(10)
+        return {"done": True}
+
+    runner = _runner()
+    runner.register("test", handler)
+    job_id = make_job()
+
+    assert runner._claim(job_id)
+    runner._stopping.set()
+    runner._run(job_id)
+
+    job = _job(db, job_id)
+    assert (job.status, job.owner, job.attempts) == ("queued", None, 0)
+
+
+def test_stop_does_not_wait_for_a_stuck_handler(db, make_job):
+    release = threading.Event()
+    runner = _runner()
+    # Its own type, so recover() does not pick up other tests' queued jobs
+    runner.register("stuck", lambda db, params, progress: release.wait(30))
+    runner.start()
+    try:
+        job_id = runner.enqueue(db, "stuck", {}).id
+        while _job(db, job_id).status != "running":
+            time.sleep(0.01)
+
+        started = time.monotonic()
+        runner.stop(timeout=0.2)
+        assert time.monotonic() - started < 1
+
+        # Daemon workers, so the interpreter does not join them at exit
+        workers = [
+            thread for thread in threading.enumerate()
+            if thread.name.startswith("dayflow-job-")
+        ]
+        assert workers and all(thread.daemon for thread in workers)
+    finally:
+        release.set()
+
+
+def test_expire_finished_cleans_up_old_results(db, make_job):
+    expired = []
+    runner = _runner()
+    runner.register(
+        "test", lambda db, params, progress: {},
+        expire=expired.append, expire_after=timedelta(days=7)
+    )
+    old_id = make_job(
+        status="succeeded", result={"file": "old.csv"},
+        finished_at=datetime.now() - timedelta(days=8)
+    )
+    new_id = make_job(
+        status="succeeded", result={"file": "new.csv"},
+        finished_at=datetime.now()
+    )
+
+    runner.expire_finished()
+    runner.expire_finished()
+
+    assert expired == [{"file": "old.csv"}]
+    assert _job(db, old_id).status == "expired"
+    assert _job(db, new_id).status == "succeeded"
@@ -0,0 +1,42 @@
+import pytest
+
+from app.utils.leave_balance import canonical_leave_type
+
+
+@pytest.fixture(scope="module")
+def employee(client, login):
+    headers = login("balance-employee@example.com")
+    client.get("/employees/me", headers=headers)
+    return headers
+
+
+def _apply(client, headers, leave_type, start, end):
+    return client.post("/leaves/apply", headers=headers, json={
+        "leave_type": leave_type,
+        "start_date": start,
+        "end_date": end,
+    })
+
+
+def test_leave_types_are_normalised():
+    assert canonical_leave_type("paid") == "Paid"
+    assert canonical_leave_type(" Sick ") == "Sick"
+    assert canonical_leave_type("UNPAID") == "Unpaid"
+    assert canonical_leave_type("Sick2") is None
+
+
+@pytest.mark.parametrize("leave_type", ["Sick2", "Vacation", ""])
+def test_unknown_leave_types_are_rejected(client, employee, leave_type):
+    response = _apply(client, employee, leave_type, "2028-01-03", "2028-01-04")
+    assert response.status_code == 400
+    assert "Unknown leave type" in response.json()["detail"]
+
+
+def test_variant_spellings_share_the_entitlement(client, employee):
+    # Sick=10 by default: the second application would need days 11-15
+    response = _apply(client, employee, "sick ", "2028-02-01", "2028-02-10")
+    assert response.status_code == 200
+
+    response = _apply(client, employee, "SICK", "2028-03-01", "2028-03-05")
+    assert response.status_code == 400
+    assert "Insufficient Sick leave balance" in response.json()["detail"]
@@ -0,0 +1,76 @@
+import pytest
+from sqlalchemy import update
+
+from app.models.leave import LeaveRequest
+from app.utils.leave_index import leave_index
+
+
+@pytest.fixture(scope="module")
+def people(client, login):
+    admin = login("leave-admin@example.com", "admin")
+    employee = login("leave-employee@example.com")
+    client.get("/employees/me", headers=employee)
+    return admin, employee
+
+
+def _apply(client, headers, start, end, leave_type="Unpaid"):
+    return client.post("/leaves/apply", headers=headers, json={
+        "leave_type": leave_type,
+        "start_date": start,
+        "end_date": end,
+        "reason": "test"
+    })
+
+
+def _out(client, admin, start="2027-05-01", end="2027-05-31"):
+    response = client.get(f"/leaves/out?from={start}&to={end}", headers=admin)
+    return [row["leave_id"] for row in response.json()]
+
+
+def test_overlapping_apply_is_rejected(client, people):
+    _, employee = people
+    assert _apply(client, employee, "2027-03-01", "2027-03-03").status_code == 200
+
+    response = _apply(client, employee, "2027-03-03", "2027-03-04")
+    assert response.status_code == 400
+    assert "overlaps" in response.json()["detail"]
+
+
+def test_decisions_update_the_index_without_rebuilding(client, people,
+                                                       monkeypatch):
+    admin, employee = people
+    leave_id = _apply(client, employee, "2027-05-04", "2027-05-06").json()["leave_id"]
+    _out(client, admin)
+
+    monkeypatch.setattr(
+        leave_index, "rebuild",
+        lambda *args, **kwargs: pytest.fail("full rebuild")
+    )
+
+    client.put(f"/leaves/{leave_id}/approve", headers=admin)
+    assert leave_id in _out(client, admin)
+
+
+def test_writes_from_other_workers_arrive_as_delta(client, people, db,
+                                                   monkeypatch):
+    admin, employee = people
+    leave_id = _apply(client, employee, "2027-05-10", "2027-05-11").json()["leave_id"]
+    assert leave_id not in _out(client, admin)
+
+    monkeypatch.setattr(
+        leave_index, "rebuild",
+        lambda *args, **kwargs: pytest.fail("full rebuild")
+    )
+
+    # as another process would: straight to the table
+    db.execute(update(LeaveRequest).where(
+        LeaveRequest.id == leave_id
+    ).values(status="Approved"))
+    db.commit()
+    assert leave_id in _out(client, admin)
+
+    db.execute(update(LeaveRequest).where(
+        LeaveRequest.id == leave_id
+    ).values(status="Rejected"))
+    db.commit()
+    assert leave_id not in _out(client, admin)
@@ -0,0 +1,41 @@
+from dataclasses import replace
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from app.config import settings
+from app.database.db import engine
+from app.main import create_app
+
+
+def test_metrics_need_the_apps_own_token(schema):
+    app = create_app(replace(settings, metrics_token="secret"))
+
+    with TestClient(app) as client:
+        assert client.get("/metrics").status_code == 403
+        wrong = client.get("/metrics", headers={"Authorization": "Bearer x"})
+        assert wrong.status_code == 403
+
+        response = client.get(
+            "/metrics", headers={"Authorization": "Bearer secret"}
+        )
+        assert response.status_code == 200
+        assert "dayflow_db_statements_total" in response.text
+
+
+def test_metrics_are_not_served_without_a_token(schema):
+    app = create_app(replace(settings, metrics_token=""))
+
+    with TestClient(app) as client:
+        assert client.get("/metrics").status_code == 404
+
+
+def test_failed_statements_do_not_leak_timers(schema):
+    create_app(settings)  # installs the engine hooks
+
+    with engine.connect() as conn:
+        with pytest.raises(OperationalError):
+            conn.execute(text("SELECT * FROM no_such_table"))
+        assert conn.info.get("dayflow_query_start") == []
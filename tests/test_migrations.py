@@ -0,0 +1,63 @@
+import pytest
+from sqlalchemy import create_engine, inspect, text
+
+from app.database.migrations import DuplicateRowsError, upgrade_schema
+
+OLD_SCHEMA = [
+    "CREATE TABLE users (id INTEGER PRIMARY KEY, email VARCHAR NOT NULL, "
+    "password VARCHAR NOT NULL, role VARCHAR NOT NULL)",
+    "CREATE TABLE employees (id INTEGER PRIMARY KEY, user_id INTEGER, "
+    "full_name VARCHAR NOT NULL, department VARCHAR, designation VARCHAR, "
+    "phone VARCHAR, address VARCHAR)",
+    "CREATE TABLE attendance (id INTEGER PRIMARY KEY, employee_id INTEGER NOT NULL, "
+    "attendance_date DATE, check_in TIME, check_out TIME, work_hours INTEGER)",
+    "CREATE TABLE payrolls (id INTEGER PRIMARY KEY, employee_id INTEGER NOT NULL, "
+    "month INTEGER NOT NULL, year INTEGER NOT NULL, present_days INTEGER NOT NULL, "
+    "salary_amount FLOAT NOT NULL, status VARCHAR)",
+    "INSERT INTO users VALUES (1, 'a@example.com', 'x', 'employee')",
+    "INSERT INTO employees (id, user_id, full_name) VALUES (1, 1, 'a')",
+    "INSERT INTO attendance VALUES (1, 1, '2026-01-05', '09:00:00.000000', "
+    "'17:00:00.000000', 480)",
+    "INSERT INTO payrolls VALUES (1, 1, 1, 2026, 1, 100.0, 'Paid')",
+    "INSERT INTO payrolls VALUES (2, 1, 1, 2026, 1, 100.0, 'Generated')",
+]
+
+
+@pytest.fixture
+def old_engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/old.db")
+    with engine.begin() as conn:
+        for statement in OLD_SCHEMA:
+            conn.execute(text(statement))
+    yield engine
+    engine.dispose()
+
+
+def test_duplicates_stop_the_migration_before_any_change(old_engine):
+    with pytest.raises(DuplicateRowsError) as error:
+        upgrade_schema(old_engine)
+
+    assert error.value.table == "payrolls"
+    assert error.value.groups == [((1, 2026, 1), 2)]
+    assert set(inspect(old_engine).get_table_names()) == {
+        "users", "employees", "attendance", "payrolls"
+    }
+    with old_engine.connect() as conn:
+        assert conn.execute(text("SELECT count(*) FROM payrolls")).scalar() == 2
+
+
+def test_rerun_after_clean_up_backfills_derived_tables(old_engine):
+    with pytest.raises(DuplicateRowsError):
+        upgrade_schema(old_engine)
+
+    with old_engine.begin() as conn:
+        conn.execute(text("DELETE FROM payrolls WHERE id = 2"))
+    upgrade_schema(old_engine)
+
+    with old_engine.connect() as conn:
+        assert conn.execute(
+            text("SELECT present_days FROM attendance_monthly")
+        ).scalar() == 1
+        assert conn.execute(text(
+            "SELECT sql FROM sqlite_master WHERE name = 'attendance'"
+        )).scalar().upper().count("AUTOINCREMENT") == 1
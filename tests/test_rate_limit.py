@@ -0,0 +1,88 @@
+import math
+
+from app.config import settings
+from app.routes import auth as auth_routes
+from app.utils.metrics import metrics
+from app.utils.rate_limit import TokenBucketLimiter, email_limiter, ip_limiter
+
+
+def test_burst_then_wait_for_refill():
+    limiter = TokenBucketLimiter(rate=0.5, burst=3, maxsize=10)
+
+    assert [limiter.acquire("k", now=100.0) for _ in range(3)] == [0.0] * 3
+    # empty bucket: one token takes 1 / rate seconds
+    assert limiter.acquire("k", now=100.0) == 2.0
+    assert limiter.acquire("k", now=101.0) == 1.0
+    assert limiter.acquire("k", now=102.0) == 0.0
+
+
+def test_partial_refill_is_kept():
+    limiter = TokenBucketLimiter(rate=1.0, burst=1, maxsize=10)
+
+    assert limiter.acquire("k", now=0.0) == 0.0
+    assert limiter.acquire("k", now=0.25) == 0.75
+    # the rejected attempt did not spend the quarter token
+    assert limiter.acquire("k", now=0.5) == 0.5
+    assert limiter.acquire("k", now=1.0) == 0.0
+
+
+def test_refill_is_capped_at_burst():
+    limiter = TokenBucketLimiter(rate=10.0, burst=2, maxsize=10)
+
+    limiter.acquire("k", now=0.0)
+    # an hour idle still only refills `burst` tokens
+    assert limiter.acquire("k", now=3600.0) == 0.0
+    assert limiter.acquire("k", now=3600.0) == 0.0
+    assert limiter.acquire("k", now=3600.0) > 0
+
+
+def test_zero_rate_never_refills():
+    limiter = TokenBucketLimiter(rate=0, burst=1, maxsize=10)
+
+    assert limiter.acquire("k", now=0.0) == 0.0
+    assert math.isinf(limiter.acquire("k", now=10 ** 6))
+
+
+def test_keys_are_independent_and_bounded():
+    limiter = TokenBucketLimiter(rate=1.0, burst=1, maxsize=2)
+
+    assert limiter.acquire("a", now=0.0) == 0.0
+    assert limiter.acquire("b", now=0.0) == 0.0
+    assert limiter.acquire("a", now=0.0) > 0
+    assert limiter.acquire("c", now=0.0) == 0.0
+    assert len(limiter) == 2
+
+    # "b" was least recently used and starts over with a full bucket
+    assert limiter.acquire("b", now=0.0) == 0.0
+    limiter.clear()
+    assert len(limiter) == 0
+
+
+def test_throttled_login_skips_database_and_bcrypt(client, login, monkeypatch):
+    login("throttled@example.com")
+    monkeypatch.setattr(settings, "auth_rate_limit", True)
+    ip_limiter.clear()
+    email_limiter.clear()
+
+    lookups = []
+    find_user = auth_routes._find_user
+
+    def counting(db, email):
+        lookups.append(email)
+        return find_user(db, email)
+
+    monkeypatch.setattr(auth_routes, "_find_user", counting)
+    attempt = {"email": "throttled@example.com", "password": "wrong"}
+
+    for _ in range(settings.auth_email_burst):
+        assert client.post("/auth/login", json=attempt).status_code == 401
+
+    verified = metrics.value("dayflow_password_operations_total", ("verify",))
+    response = client.post("/auth/login", json=attempt)
+
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+    assert len(lookups) == settings.auth_email_burst
+    assert metrics.value(
+        "dayflow_password_operations_total", ("verify",)
+    ) == verified